@@ -0,0 +1,211 @@
+import json
+import time
+import atexit
+import hashlib
+from pathlib import Path
+from collections import OrderedDict
+from dataclasses import dataclass, asdict, field
+
+import numpy as np
+
+from vector_index import HashingEmbedder, tokenize
+from context_compression import content_terms
+from fx_store import USD_RATES
+
+# Words that flip or narrow a question's meaning while barely moving its embedding.
+NEGATIONS = frozenset("not no without except excluding never".split())
+# Superlatives, comparatives, ordinals, directions, periods and settlement statuses: "largest" and
+# "smallest", or "first quarter" and "second quarter", embed almost identically but differ in answer.
+QUALIFIERS = frozenset(
+    "largest biggest highest greatest most maximum max top smallest lowest least minimum min bottom "
+    "more less fewer over under above below greater larger smaller higher lower "
+    "first second third fourth fifth last latest earliest newest oldest next previous recent "
+    "buy buys bought buying sell sells sold selling before after since until between during "
+    "today yesterday week weekly month monthly quarter quarterly year yearly annual daily "
+    "january february march april may june july august september october november december "
+    "approved pending approval rejected netted uninstructed all".split()
+)
+
+
+def normalize_question(question: str) -> str:
+    """Content words of the question, in order: "Show me my approved transactions?" -> "approved transactions"."""
+    return " ".join(content_terms(question))
+
+
+def anchor_terms(question: str) -> frozenset:
+    """Tokens two questions must share to be served the same answer: numbers, currency codes, negations, qualifiers."""
+    return frozenset(
+        token for token in tokenize(question)
+        if any(c.isdigit() for c in token) or token.upper() in USD_RATES or token in NEGATIONS or token in QUALIFIERS
+    )
+
+
+def context_hash(tool_results: list) -> str:
+    """Hash of the (tool name, result text) pairs an answer was generated from."""
+    digest = hashlib.sha256()
+    for name, content in tool_results:
+        digest.update(f"{name}\0{content}\0".encode("utf-8"))
+    return digest.hexdigest()
+
+
+@dataclass
+class AnswerCacheStats:
+    lookups: int = 0
+    hits: int = 0
+    misses: int = 0
+    invalidations: int = 0
+    evictions: int = 0
+    saved_seconds: float = 0.0
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.lookups if self.lookups else 0.0
+
+
+@dataclass
+class CachedAnswer:
+    question: str
+    normalized: str
+    tool_calls: list
+    context_hash: str
+    final_text: str
+    turn_seconds: float
+    created_at: float = field(default_factory=time.time)
+
+
+class AnswerCache:
+    """
+    Size-bounded LRU cache of whole agent turns for repeated questions.
+
+    A question matches an entry when their normalized forms are equal, or when the cosine
+    similarity of their embeddings is at least `threshold` and they share the same anchor
+    terms (so "CAD" never matches "EUR", nor "largest" "smallest"). An entry keeps the tool calls of the original turn
+    and a hash of their results. The caller re-runs those calls and serves the entry only
+    when `context_hash` of the fresh results is unchanged; otherwise it drops the entry with
+    `invalidate`. With a `path`, entries are saved as JSON every `save_every` changes and at
+    exit, and reloaded on start.
+    """
+
+    def __init__(self, max_entries: int = 1024, threshold: float = 0.85, path=None, embedder: HashingEmbedder = None, save_every: int = 32):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.path = Path(path) if path else None
+        self.embedder = embedder or HashingEmbedder()
+        self.save_every = save_every
+        self._entries: OrderedDict = OrderedDict()
+        self._matrix = None
+        self._keys = []
+        self._unsaved = 0
+        self.stats = AnswerCacheStats()
+        if self.path:
+            self._load()
+            atexit.register(self.save)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return
+        for item in data.get("entries", [])[-self.max_entries:]:
+            entry = CachedAnswer(**item)
+            self._entries[entry.normalized] = entry
+
+    def save(self):
+        if not self.path:
+            return
+        self._unsaved = 0
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"entries": [asdict(entry) for entry in self._entries.values()]}, f)
+            tmp_path.replace(self.path)
+        except OSError as e:
+            print(f"Could not write answer cache {self.path}: {e}")
+
+    def _changed(self):
+        self._unsaved += 1
+        if self._unsaved >= self.save_every:
+            self.save()
+
+    def _drop_row(self, normalized: str):
+        if self._matrix is not None:
+            i = self._keys.index(normalized)
+            self._matrix = np.delete(self._matrix, i, axis=0)
+            del self._keys[i]
+
+    def _index(self):
+        # Built once; put/invalidate/eviction then update single rows, so a lookup is one matrix-vector product.
+        if self._matrix is None:
+            self._keys = list(self._entries)
+            self._matrix = self.embedder.embed(self._keys)
+        return self._matrix
+
+    def lookup(self, question: str):
+        """Best matching entry for `question`, or None. Counts a lookup; record_hit/invalidate settle it."""
+        self.stats.lookups += 1
+        normalized = normalize_question(question)
+        entry = self._entries.get(normalized)
+        if entry is None and self._entries and normalized:
+            scores = self._index() @ self.embedder.embed_one(normalized)
+            anchors = anchor_terms(question)
+            for i in np.argsort(-scores):
+                if scores[i] < self.threshold:
+                    break
+                candidate = self._entries[self._keys[i]]
+                if anchor_terms(candidate.question) == anchors:
+                    entry = candidate
+                    break
+        if entry is None:
+            self.stats.misses += 1
+            return None
+        self._entries.move_to_end(entry.normalized)
+        return entry
+
+    def record_hit(self, entry: CachedAnswer, seconds: float):
+        self.stats.hits += 1
+        self.stats.saved_seconds += max(0.0, entry.turn_seconds - seconds)
+
+    def record_miss(self):
+        # A matching entry that cannot be served in this conversation; it stays cached.
+        self.stats.misses += 1
+
+    def invalidate(self, entry: CachedAnswer):
+        """Drop an entry whose tool context changed (or that cannot be served); counts as a miss."""
+        self.stats.misses += 1
+        self.stats.invalidations += 1
+        if self._entries.pop(entry.normalized, None) is not None:
+            self._drop_row(entry.normalized)
+            self._changed()
+
+    def put(self, question: str, tool_calls: list, tool_results: list, final_text: str, turn_seconds: float):
+        normalized = normalize_question(question)
+        if not normalized:
+            return
+        is_new = normalized not in self._entries
+        self._entries[normalized] = CachedAnswer(question, normalized, tool_calls, context_hash(tool_results), final_text, turn_seconds)
+        self._entries.move_to_end(normalized)
+        if is_new and self._matrix is not None:
+            self._matrix = np.vstack([self._matrix, self.embedder.embed_one(normalized)[None, :]])
+            self._keys.append(normalized)
+        while len(self._entries) > self.max_entries:
+            evicted, _ = self._entries.popitem(last=False)
+            self._drop_row(evicted)
+            self.stats.evictions += 1
+        self._changed()
+
+    def clear(self):
+        self._entries.clear()
+        self._matrix = None
+        self._keys = []
+        self.save()
+
+    def summary(self) -> dict:
+        return {
+            **asdict(self.stats),
+            "hit_rate": self.stats.hit_rate,
+            "entries": len(self._entries),
+        }
@@ -0,0 +1,115 @@
+"""
+Wall-clock time of a turn that needs both ForeignExchangeLookup (mcp2) and SemanticSearch (mcp1).
+
+    python benchmarks/bench_concurrent_tools.py --delay 0.5 --turns 5
+
+Both dummy servers are started on spare ports with TOOL_DELAY_SECONDS set, and TestAgent is
+pointed at them with an offline scripted model. "sequential" asks for one tool per model step,
+which is how the react loop runs calls that are not requested together. "concurrent" asks for
+both in one step, so the tool node gathers them. With the delay dominating, the concurrent turn
+should take about max(call) instead of sum(calls).
+"""
+import os
+import sys
+import time
+import asyncio
+import argparse
+import tempfile
+import statistics
+import subprocess
+import urllib.request
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from cl_agent import TestAgent
+from tool_schema_cache import ToolSchemaCache
+from tool_result_cache import ToolResultCache
+from fake_chat_model import ScriptedChatModel, tool_step
+
+LOOKUP = ("ForeignExchangeLookup", {"currencyCode": "USD/CAD", "date_range": "2023/01/01-2024/01/01"})
+SEARCH = ("SemanticSearch", {"message": "april showers bond yields"})
+
+
+def tools_done(messages):
+    last_user = max(i for i, m in enumerate(messages) if isinstance(m, HumanMessage))
+    return {m.name for m in messages[last_user:] if isinstance(m, ToolMessage)}
+
+
+def sequential(messages):
+    done = tools_done(messages)
+    if LOOKUP[0] not in done:
+        return tool_step(LOOKUP)
+    if SEARCH[0] not in done:
+        return tool_step(SEARCH)
+    return AIMessage(content="USD/CAD context and April Showers commentary retrieved.")
+
+
+def concurrent(messages):
+    if tools_done(messages):
+        return AIMessage(content="USD/CAD context and April Showers commentary retrieved.")
+    return tool_step(LOOKUP, SEARCH)
+
+
+def start_server(script, port, delay):
+    env = {**os.environ, "MCP_PORT": str(port), "TOOL_DELAY_SECONDS": str(delay), "FX_STORE_SIZE": "2000"}
+    process = subprocess.Popen([sys.executable, script], cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            urllib.request.urlopen(f"http://127.0.0.1:{port}/health", timeout=1)
+            return process
+        except OSError:
+            time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"{script} did not start on port {port}")
+
+
+async def run(args, cache_path):
+    agent = TestAgent(connect=False, tool_cache=ToolSchemaCache(cache_path))
+    agent.multi_mcp_config = {
+        "mcp1": {"url": f"http://127.0.0.1:{args.port}/mcp", "transport": "streamable_http"},
+        "mcp2": {"url": f"http://127.0.0.1:{args.port + 1}/mcp", "transport": "streamable_http"},
+    }
+    agent.multi_mcp_client = MultiServerMCPClient(agent.multi_mcp_config)
+    # Measure the servers, not the result or answer caches.
+    agent.tool_result_cache = ToolResultCache(default_ttl=0, ttls={})
+    agent.answer_cache = None
+    results = {}
+    for name, respond in (("sequential", sequential), ("concurrent", concurrent)):
+        agent.model_client = ScriptedChatModel(respond=respond)
+        agent.connection_info = await agent.create_mcp_session(revalidate=False)
+        times = []
+        for i in range(args.turns):
+            session = agent.new_session(f"{name}-{i}")
+            started = time.perf_counter()
+            await agent.ask_agent("What is USD/CAD doing, and what do the April Showers notes say?", session=session)
+            times.append(time.perf_counter() - started)
+            assert session.last_turn_stats.tool_calls == 2, session.last_turn_stats
+        results[name] = statistics.median(times)
+    print(f"per-call server delay: {args.delay:.2f} s, {args.turns} turns each")
+    print(f"  sequential (one call per step): {results['sequential']:.2f} s/turn")
+    print(f"  concurrent (both in one step):  {results['concurrent']:.2f} s/turn")
+    print(f"  speed-up: {results['sequential'] / results['concurrent']:.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--delay", type=float, default=0.5)
+    parser.add_argument("--turns", type=int, default=5)
+    parser.add_argument("--port", type=int, default=18001)
+    args = parser.parse_args()
+    servers = [start_server("server_dummy.py", args.port, args.delay), start_server("server_dummy2.py", args.port + 1, args.delay)]
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            asyncio.run(run(args, Path(tmp) / "tools.json"))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""
+Answer-input size before and after query-focused extractive compression of retrieved chunks.
+
+    python benchmarks/bench_context_compression.py --chunks 2000 --queries 100 --ratio 0.25
+
+A fixture corpus of multi-sentence research paragraphs is indexed with HybridSearcher; each
+paragraph contains one fact sentence naming a unique deal reference. Every query asks about
+one deal. The top-k hits are assembled into the retrieval context exactly as the agent does
+(context_assembly.assemble_context), with and without compression. The answer is retained
+when the fact sentence survives.
+"""
+import sys
+import time
+import random
+import argparse
+import tempfile
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vector_index import VectorIndex
+from hybrid_search import HybridSearcher
+from history_store import estimate_tokens
+from context_assembly import assemble_context
+
+FILLER = [
+    "Persistent inflationary pressures in developed economies have created a complex policy environment.",
+    "Central banks must balance growth concerns against price stability mandates.",
+    "Bond yields fluctuated between 4.2% and 4.6% throughout the quarter.",
+    "Supply chain adjustments continue to ripple through manufacturing and shipping.",
+    "Consumer spending patterns remain difficult to forecast with standard regression models.",
+    "Analysts rely more heavily on scenario planning than on precise quantitative predictions.",
+    "Geopolitical uncertainty has widened credit spreads for lower rated issuers.",
+    "Liquidity conditions in funding markets have tightened since the start of the year.",
+]
+
+
+def fixture_corpus(rng, size):
+    records = []
+    for i in range(size):
+        sentences = rng.sample(FILLER, 6)
+        fact = f"Deal DL{i:06d} settled {rng.randint(1, 90)} million {rng.choice(['USD', 'EUR', 'CAD', 'JPY'])} with counterparty CP{i % 97:02d}."
+        sentences.insert(rng.randint(0, len(sentences)), fact)
+        records.append({
+            "chunk_id": f"c{i}",
+            "document_id": f"https://research.example/doc/{i // 5}",
+            "title": f"Research note {i // 5}",
+            "raw_context": " ".join(sentences),
+            "fact": fact,
+        })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--ratio", type=float, default=0.25)
+    parser.add_argument("--budget", type=int, default=1500)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    records = fixture_corpus(rng, args.chunks)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp)
+        index.add(records)
+        searcher = HybridSearcher(index)
+        before, after, retained, latencies = [], [], 0, []
+        for i in rng.sample(range(args.chunks), min(args.queries, args.chunks)):
+            query = f"How much did deal DL{i:06d} settle for and with whom?"
+            hits = searcher.search(query, k=args.k)["result"]["hits"]
+            ranked = [(hit["score"], hit["record"]) for hit in hits]
+            full, _ = assemble_context(ranked, token_budget=args.budget)
+            started = time.perf_counter()
+            compressed, urls = assemble_context(ranked, token_budget=args.budget, query=query, compression_ratio=args.ratio)
+            latencies.append((time.perf_counter() - started) * 1000)
+            before.append(estimate_tokens(full))
+            after.append(estimate_tokens(compressed))
+            retained += records[i]["fact"] in compressed
+        print(f"answer-input tokens per retrieval turn (k={args.k}, budget={args.budget}):")
+        print(f"  before: {statistics.mean(before):,.0f}")
+        print(f"  after:  {statistics.mean(after):,.0f}  ({statistics.mean(before) / statistics.mean(after):.1f}x smaller)")
+        print(f"  answer sentence retained: {retained / len(before):.1%}")
+        print(f"  compression time: {statistics.median(latencies):.2f} ms/turn")
+
+
+if __name__ == "__main__":
+    main()
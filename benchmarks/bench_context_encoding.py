@@ -0,0 +1,50 @@
+"""
+Prompt tokens per FX transaction for each context encoder.
+
+    python benchmarks/bench_context_encoding.py --sizes 1 10 100 500
+
+Token counts use history_store.estimate_tokens (about 4 characters per token); the ratios
+between encoders are what matter, not the absolute numbers.
+"""
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fx_store import TransactionStore
+from context_encoders import ENCODERS, get_encoder
+
+
+def make_transactions(count: int, seed: int = 7) -> list:
+    # The MCP server's own synthetic rows, which vary in every column.
+    store = TransactionStore.generate(count, seed=seed)
+    return [store.record(row) for row in range(count)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 100, 500])
+    args = parser.parse_args()
+
+    baseline = get_encoder("json")
+    header = f"{'records':>8} " + " ".join(f"{name:>14}" for name in ENCODERS)
+    print("tokens per transaction")
+    print(header)
+    for size in args.sizes:
+        transactions = make_transactions(size)
+        data = transactions[0] if size == 1 else transactions
+        cells = []
+        for name in ENCODERS:
+            cells.append(f"{get_encoder(name).tokens(data) / size:>14.1f}")
+        print(f"{size:>8} " + " ".join(cells))
+    print("\nsavings vs json at the largest size")
+    transactions = make_transactions(args.sizes[-1])
+    base_tokens = baseline.tokens(transactions)
+    for name in ENCODERS:
+        tokens = get_encoder(name).tokens(transactions)
+        print(f"{name:>14}: {tokens:>8} tokens ({tokens / base_tokens:.0%} of json)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Record, replay and cached runs of eval_runner over a generated golden suite.
+
+    python benchmarks/bench_eval_runner.py --goldens 500 --concurrency 32
+
+1. record: both dummy servers run and a ScriptedChatModel (--llm-delay seconds per call) stands
+   in for Gemini; model replies, tool results and tool schemas go to a temporary cassette.
+2. replay: the servers are stopped and the suite runs again from the cassette alone. Its
+   outputs and tool calls must match the recorded run.
+3. cached: the replay again with an EvalCache filled by step 2, so nothing runs.
+"""
+import re
+import sys
+import time
+import asyncio
+import argparse
+import itertools
+import tempfile
+from contextlib import redirect_stdout
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from cl_agent import FX_TRANSACTION_TOOL, TestAgent, message_text
+from eval_runner import Cassette, EvalCache, run_goldens, summarize
+from fake_chat_model import ScriptedChatModel, tool_step
+from bench_concurrent_tools import start_server, tools_done
+
+CURRENCIES = ["CAD", "USD", "EUR", "GBP", "JPY", "AUD", "INR"]
+STATUSES = ["approved", "rejected", "netted", "uninstructed"]
+YEARS = [2019, 2020, 2021, 2022, 2023]
+TOPICS = ["bond yields", "housing", "inflation", "the labour market", "oil prices", "consumer spending"]
+DIRECT = ["What is an FX forward?", "Explain what a currency swap is", "Hello!", "What does pip mean in forex?"]
+
+FX_RE = re.compile(r"^Show my (\w+) (\w{3}) transactions$")
+RATE_RE = re.compile(r"^How did (\w{3}/\w{3}) move in (\d{4})\?$")
+SEARCH_RE = re.compile(r"^What are the April Showers notes saying about (.+)\?$")
+
+
+def make_goldens(count: int) -> list:
+    questions = [f"Show my {s} {c} transactions" for s, c in itertools.product(STATUSES, CURRENCIES)]
+    questions += [f"How did {a}/{b} move in {y}?" for a, b in itertools.permutations(CURRENCIES[:5], 2) for y in YEARS]
+    questions += [f"What are the April Showers notes saying about {t}?" for t in TOPICS] + DIRECT
+    goldens = []
+    for question in itertools.islice(itertools.cycle(questions), count):
+        tool = FX_TRANSACTION_TOOL if FX_RE.match(question) else "ForeignExchangeLookup" if RATE_RE.match(question) else \
+            "SemanticSearch" if SEARCH_RE.match(question) else None
+        goldens.append({"input": question, "expected_output": None, "expected_tools": [tool] if tool else []})
+    return goldens
+
+
+def respond(messages):
+    question = message_text(next(m for m in reversed(messages) if isinstance(m, HumanMessage)).content)
+    if not tools_done(messages):
+        if match := FX_RE.match(question):
+            return tool_step((FX_TRANSACTION_TOOL, {"settlement_status": match[1].title(), "currency": match[2], "page_size": 20}))
+        if match := RATE_RE.match(question):
+            return tool_step(("ForeignExchangeLookup", {"currencyCode": match[1], "date_range": f"{match[2]}/01/01-{int(match[2]) + 1}/01/01"}))
+        if match := SEARCH_RE.match(question):
+            return tool_step(("SemanticSearch", {"message": match[1]}))
+    return AIMessage(content=f"Scripted answer to: {question}")
+
+
+async def run(args, cassette: Cassette, goldens: list, cache: EvalCache = None) -> tuple:
+    agent = TestAgent(connect=False)
+    agent.multi_mcp_config = {
+        "mcp1": {"url": f"http://127.0.0.1:{args.port}/mcp", "transport": "streamable_http"},
+        "mcp2": {"url": f"http://127.0.0.1:{args.port + 1}/mcp", "transport": "streamable_http"},
+    }
+    agent.multi_mcp_client = MultiServerMCPClient(agent.multi_mcp_config)
+    agent.model_client = ScriptedChatModel(respond=respond, delay_seconds=args.llm_delay)
+    cassette.attach(agent)
+    agent.connection_info = await agent.create_mcp_session(revalidate=False)
+    started = time.perf_counter()
+    results = await run_goldens(agent, goldens, concurrency=args.concurrency, cache=cache)
+    wall = time.perf_counter() - started
+    cassette.save()
+    return results, wall
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--goldens", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--llm-delay", type=float, default=0.5, help="seconds per fake model call while recording")
+    parser.add_argument("--port", type=int, default=18401)
+    args = parser.parse_args()
+
+    goldens = make_goldens(args.goldens)
+    with tempfile.TemporaryDirectory() as tmp:
+        cassette_path, cache = Path(tmp) / "cassette", EvalCache(Path(tmp) / "outputs")
+        servers = [start_server("server_dummy.py", args.port, 0.0), start_server("server_dummy2.py", args.port + 1, 0.0)]
+        try:
+            with redirect_stdout(sys.stderr):
+                recorded, record_wall = asyncio.run(run(args, Cassette(cassette_path, "record"), goldens))
+        finally:
+            for server in servers:
+                server.terminate()
+                server.wait()
+        with redirect_stdout(sys.stderr):
+            replayed, replay_wall = asyncio.run(run(args, Cassette(cassette_path, "replay"), goldens, cache))
+            cached, cached_wall = asyncio.run(run(args, Cassette(cassette_path, "replay"), goldens, cache))
+
+    mismatches = sum(a.actual_output != b.actual_output or a.tools_called != b.tools_called for a, b in zip(recorded, replayed))
+    tool_hits = sum(sorted(t["name"] for t in r.tools_called) == sorted(r.expected_tools) for r in replayed)
+    print(f"{len(goldens)} goldens, concurrency {args.concurrency}")
+    for name, results, wall in (("record", recorded, record_wall), ("replay", replayed, replay_wall), ("cached", cached, cached_wall)):
+        s = summarize(results)
+        print(f"  {name:<7} {wall:>7.2f} s wall, {s['goldens'] / wall:>8.1f} goldens/s, {s['cached']:>4} cached, {s['errors']} errors, {s['llm_calls']} LLM calls")
+    print(f"  replay matches record: {len(goldens) - mismatches}/{len(goldens)}; expected tools called: {tool_hits}/{len(goldens)}")
+
+
+if __name__ == "__main__":
+    main()
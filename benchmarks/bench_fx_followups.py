@@ -0,0 +1,71 @@
+"""
+Local follow-up queries over stored FX transactions versus sending the rows back to the model.
+
+    python benchmarks/bench_fx_followups.py --sizes 100 1000 10000
+
+For each size, the frame build time and the parse + execute time of each follow-up in QUESTIONS
+are measured, next to the prompt tokens the graph path would spend re-sending the rows
+(context encoders, as in followup_context_message). Questions the rules cannot read are marked
+"llm": in "rules+llm" mode they cost one small spec-translation call instead.
+"""
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fx_store import TransactionStore
+from fx_query import TransactionQuery
+from fx_frame import TransactionFrame, parse_followup, render_result, spec_prompt
+from context_encoders import get_encoder
+from history_store import estimate_tokens
+
+QUESTIONS = [
+    "Which ones were in CAD?",
+    "Total buy amount?",
+    "Which of those were booked through FX Online?",
+    "How many transactions per channel?",
+    "Average buy amount of EUR transactions by channel",
+    "Top 5 largest",
+    "How many were over 10,000?",
+    "How many distinct banks?",
+    "What share of these trades were forwards versus spots?",
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--encoding", default="table", help="context encoder used by the graph path")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoder = get_encoder(args.encoding)
+    store = TransactionStore.generate(max(args.sizes) * 2)
+    rows = store.query_rows(TransactionQuery(settlement_status="All").normalized())
+    for size in args.sizes:
+        records = [store.record(int(r)) for r in rows[:size]]
+        started = time.perf_counter()
+        frame = TransactionFrame(records)
+        build_ms = (time.perf_counter() - started) * 1000
+        context_tokens = estimate_tokens(encoder.encode(records))
+        print(f"\n{size} rows: frame built in {build_ms:.1f} ms; graph path re-sends ~{context_tokens} prompt tokens per follow-up, "
+              f"spec translation prompt ~{estimate_tokens(spec_prompt(frame))} tokens")
+        print(f"{'question':<58} {'path':>6} {'local ms':>9} {'matched':>8}")
+        for question in QUESTIONS:
+            timings = []
+            for _ in range(args.repeat):
+                started = time.perf_counter()
+                spec = parse_followup(question, frame)
+                result = frame.execute(spec) if spec else None
+                if result:
+                    render_result(result, spec)
+                timings.append(time.perf_counter() - started)
+            path = "rules" if spec else "llm"
+            matched = result["matched"] if result else "-"
+            print(f"{question:<58} {path:>6} {min(timings) * 1000:>9.2f} {matched:>8}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Latency of ForeignExchangeLookup range summaries on the memory-mapped RateStore.
+
+    python benchmarks/bench_fx_rates.py --years 10 --iterations 20000
+
+Generates a store of daily fixings in a temporary directory and times summaries over
+multi-year ranges for a direct pair, an inverse pair and a cross derived through USD.
+"""
+import sys
+import timeit
+import argparse
+import tempfile
+from pathlib import Path
+from datetime import date
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fx_rates import RateStore
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--years", type=int, default=10)
+    parser.add_argument("--iterations", type=int, default=20000)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        end = date(2025, 12, 31)
+        RateStore.generate(tmp, start=date(end.year - args.years, 1, 1), end=end)
+        store = RateStore(tmp)
+        print(f"{len(store.pairs)} quoted pairs x {len(store.days):,} business days "
+              f"({store.rates.nbytes / 2**10:.0f} KiB memory-mapped)")
+        date_range = f"{end.year - args.years + 1}/01/01-{end.year}/06/30"
+        print(f"range {date_range}\n{'pair':>8} {'source':>14} {'obs':>6} {'us/query':>9}")
+        for pair in ("USD/CAD", "CAD/USD", "EUR/GBP", "CAD/JPY", "MXN/INR"):
+            result = store.summary(pair, date_range)
+            seconds = timeit.timeit(lambda: store.summary(pair, date_range), number=args.iterations)
+            print(f"{pair:>8} {result['source']:>14} {result['observations']:>6} {seconds / args.iterations * 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
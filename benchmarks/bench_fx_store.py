@@ -0,0 +1,63 @@
+"""
+Build time, memory and lookup latency of the FX TransactionStore.
+
+    python benchmarks/bench_fx_store.py --sizes 10000 1000000 5000000
+
+Each query is timed end to end as the MCP tool runs it: index lookup plus materializing one
+50-row page.
+"""
+import sys
+import time
+import argparse
+import statistics
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from fx_query import TransactionQuery, paginate
+from fx_store import TransactionStore
+
+QUERIES = {
+    "company+Approved": (TransactionQuery("Approved"), "SITCOMP2"),
+    "company+All": (TransactionQuery("All"), "SITCOMP2"),
+    "Netted (all companies)": (TransactionQuery("Netted"), None),
+    "Uninstructed+JPY": (TransactionQuery("Uninstructed", currency="JPY"), None),
+    "pair USD/CAD+date range": (TransactionQuery("All", currency_pair="USD/CAD", value_date_from="2023-06-01", value_date_to="2023-06-30"), None),
+    "value date range": (TransactionQuery("All", value_date_from="2024-02-01", value_date_to="2024-02-07"), None),
+    "company+CAD+FXFWD": (TransactionQuery("All", currency="CAD", product_type="FXFWD"), "SITCOMP2"),
+}
+
+
+def time_query(store, query, company_id, repeats):
+    query = query.normalized()
+    samples = []
+    matched = 0
+    for _ in range(repeats):
+        started = time.perf_counter()
+        rows = store.query_rows(query, company_id=company_id)
+        paginate(rows, query, 50, materialize=store.record)
+        samples.append((time.perf_counter() - started) * 1000)
+        matched = len(rows)
+    return statistics.median(samples), matched
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 1_000_000])
+    parser.add_argument("--repeats", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    for size in args.sizes:
+        started = time.perf_counter()
+        store = TransactionStore.generate(size, seed=args.seed)
+        build_s = time.perf_counter() - started
+        print(f"\n== {size:,} records: built in {build_s:.2f} s, {store.nbytes / 2**20:.1f} MiB ({store.nbytes / size:.0f} B/record)")
+        print(f"{'query':<28} {'matched':>10} {'median ms':>10}")
+        for name, (query, company_id) in QUERIES.items():
+            median_ms, matched = time_query(store, query, company_id, args.repeats)
+            print(f"{name:<28} {matched:>10,} {median_ms:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Prompt size, append latency and memory of HistoryStore over a long conversation.
+
+    python benchmarks/bench_history.py --turns 200
+"""
+import sys
+import time
+import argparse
+import tracemalloc
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from history_store import HistoryStore, estimate_tokens
+
+USER_TURN = "Show me my approved transactions for CAD and explain the largest one in detail?"
+ASSISTANT_TURN = (
+    "Here are your approved transactions. The largest one was a spot CAD purchase settled through FX Online. "
+    * 8
+)
+
+
+def run(turns: int, token_budget: int, policy: str, checkpoints: set):
+    """Yield (turn, prompt tokens, turn µs, traced bytes) at each checkpoint turn."""
+    tracemalloc.start()
+    history = HistoryStore(token_budget=token_budget, policy=policy)
+    for turn in range(1, turns + 1):
+        started = time.perf_counter()
+        history.append("user", f"{USER_TURN} (turn {turn})")
+        prompt_tokens = sum(estimate_tokens(m["content"]) for m in history.messages())
+        history.append("assistant", ASSISTANT_TURN)
+        elapsed_us = (time.perf_counter() - started) * 1e6
+        if turn in checkpoints:
+            current, _ = tracemalloc.get_traced_memory()
+            yield turn, prompt_tokens, elapsed_us, current
+    tracemalloc.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--turns", type=int, default=200)
+    parser.add_argument("--budget", type=int, default=4000)
+    parser.add_argument("--policy", choices=["summarize", "drop"], default="summarize")
+    args = parser.parse_args()
+
+    checkpoints = {1, 10, 25, 50, 100, 150, args.turns}
+    print(f"{'turn':>6} {'prompt tokens':>14} {'turn µs':>10} {'traced KiB':>11}")
+    for turn, tokens, elapsed_us, current in run(args.turns, args.budget, args.policy, checkpoints):
+        print(f"{turn:>6} {tokens:>14} {elapsed_us:>10.1f} {current / 1024:>11.1f}")
+    unbounded = sum(estimate_tokens(USER_TURN) + estimate_tokens(ASSISTANT_TURN) for _ in range(args.turns))
+    print(f"\nUnbounded history after {args.turns} turns would be ~{unbounded} tokens")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,98 @@
+"""
+Latency and recall@k of vector-only, BM25-only and hybrid SemanticSearch retrieval.
+
+    python benchmarks/bench_hybrid_search.py --size 50000 --queries 200
+
+The fixture corpus is generated: every chunk mixes a topic paragraph shared by many chunks
+with a rare identifier (deal reference, ticker, counterparty) that only it contains, plus
+filterable metadata. Each query paraphrases one chunk's topic and names its identifier, so
+the chunk is the single relevant result. Half of the queries also carry that chunk's
+metadata filters.
+"""
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vector_index import VectorIndex
+from hybrid_search import HybridSearcher
+
+TOPICS = [
+    "bond yields fluctuate as central banks adjust interest rate policy",
+    "foreign exchange settlement risk across counterparties and currencies",
+    "econometric forecasting under supply chain disruption and inflation",
+    "liquidity coverage ratio stress testing for treasury desks",
+    "credit spreads widen on corporate issuance and rating downgrades",
+    "commodity prices respond to weather shocks and shipping constraints",
+    "equity volatility rises around earnings announcements and guidance",
+    "regulatory capital requirements for trading book exposures",
+]
+USECASES = ["GENAI101_CEOPT", "GENAI202_FXOPS", "GENAI303_RISK"]
+CLASSIFICATIONS = ["internal", "confidential", "public"]
+
+
+def fixture_corpus(rng, size):
+    records = []
+    for i in range(size):
+        topic = TOPICS[rng.integers(len(TOPICS))]
+        ident = f"DEAL{i:07d} ticker X{i * 7919 % 1000003:07d}"
+        records.append({
+            "chunk_id": f"c{i}",
+            "document_id": f"d{i // 10}",
+            "raw_context": f"{topic}. Reference {ident} reviewed by the desk for quarter {i % 4 + 1}.",
+            "usecase_id": USECASES[i % len(USECASES)],
+            "data_classification": CLASSIFICATIONS[i % len(CLASSIFICATIONS)],
+            "book": f"book{i % 40}",
+            "sor_last_modified": f"2024-{i % 12 + 1:02d}-15T12:00:00",
+        })
+    return records
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=50_000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    records = fixture_corpus(rng, args.size)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp)
+        started = time.perf_counter()
+        index.add(records)
+        searcher = HybridSearcher(index)
+        print(f"indexed {args.size:,} chunks in {time.perf_counter() - started:.1f} s "
+              f"({len(searcher.bm25.postings):,} BM25 terms)")
+
+        targets = rng.choice(args.size, size=min(args.queries, args.size), replace=False)
+        print(f"\n{'mode':>8} {'filters':>8} {'p50 ms':>8} {'p95 ms':>8} {'recall@' + str(args.k):>10}")
+        for mode in ("vector", "bm25", "hybrid"):
+            for filtered in (False, True):
+                latencies = []
+                found = 0
+                for row in targets:
+                    record = records[row]
+                    topic = record["raw_context"].split(".")[0]
+                    text = f"what did the desk say about {topic.split()[0]} {topic.split()[-1]} for DEAL{row:07d}"
+                    filters = None
+                    if filtered:
+                        filters = {"usecase_id": record["usecase_id"], "book": record["book"],
+                                   "modified_after": "2024-01-01T00:00:00"}
+                    t = time.perf_counter()
+                    hits = searcher.search(text, k=args.k, filters=filters, mode=mode)["result"]["hits"]
+                    latencies.append((time.perf_counter() - t) * 1000)
+                    found += any(hit["record"]["chunk_id"] == record["chunk_id"] for hit in hits)
+                latencies.sort()
+                p95 = latencies[int(0.95 * (len(latencies) - 1))]
+                print(f"{mode:>8} {'yes' if filtered else 'no':>8} {statistics.median(latencies):>8.2f} "
+                      f"{p95:>8.2f} {found / len(targets):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
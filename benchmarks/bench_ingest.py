@@ -0,0 +1,59 @@
+"""
+Ingestion throughput (chunks/s) and peak memory for the SemanticSearch ingest pipeline.
+
+    python benchmarks/bench_ingest.py --files 2000 --pages 5 --workers 1 2 4
+
+A synthetic corpus of form-feed paginated text files is written to a temporary directory and
+ingested into a fresh index once per worker count. A final re-run over the last index shows
+that unchanged files are skipped by content hash.
+"""
+import sys
+import random
+import argparse
+import tempfile
+from pathlib import Path
+from dataclasses import asdict
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ingest import Ingestor
+from vector_index import VectorIndex
+
+WORDS = (
+    "inflation bond yields central bank policy growth forecast supply chain demand labour market "
+    "currency settlement counterparty risk equity volatility liquidity credit spread issuance "
+    "commodity shipping weather earnings guidance capital requirement treasury desk quarter"
+).split()
+
+
+def write_corpus(root: Path, files: int, pages: int, words_per_page: int, seed: int = 0):
+    rng = random.Random(seed)
+    for i in range(files):
+        text = "\f".join(" ".join(rng.choice(WORDS) for _ in range(words_per_page)) for _ in range(pages))
+        (root / f"doc{i:06d}.txt").write_text(text, encoding="utf-8")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=1000)
+    parser.add_argument("--pages", type=int, default=5)
+    parser.add_argument("--words-per-page", type=int, default=600)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--batch-size", type=int, default=256)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        docs = Path(tmp) / "docs"
+        docs.mkdir()
+        write_corpus(docs, args.files, args.pages, args.words_per_page)
+        print(f"{'workers':>7} {'chunks':>8} {'seconds':>8} {'chunks/s':>9} {'peak MiB':>9}")
+        for workers in args.workers:
+            index = VectorIndex(Path(tmp) / f"index{workers}")
+            stats = Ingestor(index, batch_size=args.batch_size, workers=workers).run([docs])
+            print(f"{workers:>7} {stats.chunks:>8} {stats.seconds:>8.1f} {stats.chunks_per_second:>9.0f} {stats.peak_rss_mb:>9.0f}")
+        rerun = Ingestor(index, workers=args.workers[-1]).run([docs])
+        print(f"\nre-run over unchanged files: {asdict(rerun)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+"""
+Routing accuracy of intent_router.IntentRouter on a labeled query set, and what routing saves per route.
+
+    python benchmarks/bench_intent_router.py --llm-delay 0.3 --seconds-per-1k-tokens 0.05
+
+Both dummy servers are started on spare ports. Accuracy counts a query as correct only when its
+exact route is chosen; "all" (the router was unsure and kept every tool) is reported separately,
+since it costs tokens but never loses a tool.
+
+Each query then runs through two agents with a ScriptedChatModel whose delay grows with the
+prompt, bound tool schemas included: one with intent routing and one with every tool on every
+turn. Follow-ups run after their setup question in the same session. The answer cache and
+local FX follow-ups are off, so every turn goes through the graph.
+"""
+import sys
+import json
+import time
+import asyncio
+import argparse
+import tempfile
+from collections import Counter, defaultdict
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from cl_agent import FX_TRANSACTION_TOOL, TestAgent, message_text
+from tool_schema_cache import ToolSchemaCache
+from history_store import estimate_tokens
+from fake_chat_model import ScriptedChatModel, tool_step
+from bench_concurrent_tools import start_server, tools_done
+
+FX_TABLE = "Show my approved CAD transactions"
+RATE = "How did USD/CAD move in 2023?"
+SEARCH = "What are the April Showers economics notes saying about bond yields?"
+
+# (question, expected route, question asked earlier in the same session)
+LABELED = [
+    ("Hi there!", "direct", None),
+    ("Good morning, how are you today?", "direct", None),
+    ("Thanks, that's all I needed", "direct", None),
+    ("What is the difference between an FX spot and an FX forward?", "direct", None),
+    ("Explain what a currency swap is", "direct", None),
+    ("What does pip mean in forex?", "direct", None),
+    ("How does a forward contract work?", "direct", None),
+    ("Write a short email to my manager about the quarterly review", "direct", None),
+    ("What is hedging?", "direct", None),
+    ("Who are you?", "direct", None),
+    ("What can you do for me?", "direct", None),
+    ("Define value date", "direct", None),
+    ("Why do central banks raise interest rates?", "direct", None),
+    ("Give me a tip for learning Python", "direct", None),
+    (FX_TABLE, "fx_transactions", None),
+    ("Show me my approved transactions?", "fx_transactions", None),
+    ("List all pending approval trades", "fx_transactions", None),
+    ("Which of our payments were rejected?", "fx_transactions", None),
+    ("Get my FX transaction data for EUR", "fx_transactions", None),
+    ("Show transactions booked through FX Online in 2024", "fx_transactions", None),
+    ("What deals did we do in GBP last month?", "fx_transactions", None),
+    ("Show my netted trades", "fx_transactions", None),
+    ("How many FX forwards did my company buy this year?", "fx_transactions", None),
+    ("List uninstructed deals", "fx_transactions", None),
+    ("Show the settlement status of my trades", "fx_transactions", None),
+    ("Which beneficiaries did we pay in USD?", "fx_transactions", None),
+    (RATE, "fx_lookup", None),
+    ("What was the EUR/USD rate over 2022?", "fx_lookup", None),
+    ("Give me the historical exchange rate for GBP to JPY from 2021 to 2022", "fx_lookup", None),
+    ("How volatile was AUD/USD last year?", "fx_lookup", None),
+    ("Did the euro strengthen against the dollar in 2023?", "fx_lookup", None),
+    ("What is the exchange rate between CAD and INR for January 2024?", "fx_lookup", None),
+    ("Show the high and low of USD/JPY in 2020", "fx_lookup", None),
+    ("How much did the pound depreciate against the euro in 2022?", "fx_lookup", None),
+    ("EUR/CHF performance 2019/01/01-2019/12/31", "fx_lookup", None),
+    ("What were the daily fixings for NZD/USD in March 2023?", "fx_lookup", None),
+    (SEARCH, "semantic_search", None),
+    ("What are the April Showers notes about housing?", "semantic_search", None),
+    ("What does the economics report say about inflation?", "semantic_search", None),
+    ("Summarize the commentary on the labour market", "semantic_search", None),
+    ("What are analysts saying about emerging markets?", "semantic_search", None),
+    ("Find documents about monetary policy", "semantic_search", None),
+    ("According to the outlook, what happens to oil prices?", "semantic_search", None),
+    ("What are the key themes in the latest newsletter?", "semantic_search", None),
+    ("What are the main risks to the Canadian economy this spring?", "semantic_search", None),
+    ("What are the economists predicting for GDP growth?", "semantic_search", None),
+    ("Which of those were booked through FX Online?", "followup", FX_TABLE),
+    ("Show me the next page of those", "followup", FX_TABLE),
+    ("Which ones settled in 2024?", "followup", FX_TABLE),
+    ("What about the same period for EUR/USD?", "followup", RATE),
+    ("And the volatility for them?", "followup", RATE),
+    ("What do those notes say about mortgages?", "followup", SEARCH),
+    ("Summarize these in one sentence", "followup", SEARCH),
+    ("How about the first one?", "followup", FX_TABLE),
+    # A cue word, but a new intent: the keyword route wins over the previous tool.
+    ("What about the EUR/USD exchange rate in 2023?", "fx_lookup", FX_TABLE),
+    ("Also, what are the April Showers notes saying about housing?", "semantic_search", FX_TABLE),
+    ("Show the USD/CAD rate and the volatility for 2023", "fx_lookup", SEARCH),
+    ("Now show me my rejected transactions instead", "fx_transactions", SEARCH),
+]
+
+# The tool call the scripted model makes for each route (follow-ups answer from the stored context).
+ROUTE_CALLS = {
+    "fx_transactions": (FX_TRANSACTION_TOOL, {"settlement_status": "Approved", "page_size": 20}),
+    "fx_lookup": ("ForeignExchangeLookup", {"currencyCode": "USD/CAD", "date_range": "2023/01/01-2024/01/01"}),
+    "semantic_search": ("SemanticSearch", {"message": "april showers"}),
+}
+SETUP_TOOLS = {FX_TABLE: FX_TRANSACTION_TOOL, RATE: "ForeignExchangeLookup", SEARCH: "SemanticSearch"}
+LABELS = {question: route for question, route, _ in LABELED}
+
+
+def respond(messages):
+    question = message_text(next(m for m in reversed(messages) if isinstance(m, HumanMessage)).content)
+    call = ROUTE_CALLS.get(LABELS.get(question))
+    if call and not tools_done(messages):
+        return tool_step(call)
+    return AIMessage(content=f"Scripted answer to: {question}")
+
+
+async def make_agent(args, cache_path, intent_routing: bool) -> TestAgent:
+    agent = TestAgent(connect=False, tool_cache=ToolSchemaCache(cache_path), intent_routing=intent_routing, fx_followup_mode="off")
+    agent.answer_cache = None
+    agent.multi_mcp_config = {
+        "mcp1": {"url": f"http://127.0.0.1:{args.port}/mcp", "transport": "streamable_http"},
+        "mcp2": {"url": f"http://127.0.0.1:{args.port + 1}/mcp", "transport": "streamable_http"},
+    }
+    agent.multi_mcp_client = MultiServerMCPClient(agent.multi_mcp_config)
+    agent.model_client = ScriptedChatModel(respond=respond, delay_seconds=args.llm_delay, seconds_per_1k_tokens=args.seconds_per_1k_tokens)
+    agent.connection_info = await agent.create_mcp_session(revalidate=False)
+    return agent
+
+
+def schema_tokens(tools) -> int:
+    return estimate_tokens(json.dumps([convert_to_openai_tool(t) for t in tools])) if tools else 0
+
+
+def accuracy(router) -> dict:
+    confusion = defaultdict(Counter)
+    timings = []
+    for question, expected, setup in LABELED:
+        started = time.perf_counter()
+        route = router.route(question, last_tool=SETUP_TOOLS.get(setup), has_context=setup is not None)
+        timings.append(time.perf_counter() - started)
+        confusion[expected][route.name] += 1
+    return {"confusion": confusion, "timings": timings}
+
+
+async def run(args, cache_path) -> tuple:
+    routed = await make_agent(args, cache_path, intent_routing=True)
+    full = await make_agent(args, cache_path, intent_routing=False)
+    turns = defaultdict(lambda: defaultdict(list))
+    for question, expected, setup in LABELED:
+        for name, agent in (("full", full), ("routed", routed)):
+            session = agent.new_session(f"{name}-{question}")
+            if setup:
+                await agent.ask_agent(setup, session=session)
+            route = agent.route_turn(session, question)
+            tools = agent.graph_tools if route.tools is None else [t for t in agent.graph_tools if t.name in route.tools]
+            started = time.perf_counter()
+            await agent.ask_agent(question, session=session)
+            stats = session.last_turn_stats
+            turns[expected][name].append(time.perf_counter() - started)
+            turns[expected][f"{name}_tokens"].append(stats.prompt_tokens + stats.llm_calls * schema_tokens(tools))
+    return accuracy(routed.intent_router), turns
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--llm-delay", type=float, default=0.3, help="fixed seconds per fake model call")
+    parser.add_argument("--seconds-per-1k-tokens", type=float, default=0.05, help="extra fake model seconds per 1k prompt tokens, tool schemas included")
+    parser.add_argument("--port", type=int, default=18301)
+    args = parser.parse_args()
+
+    servers = [start_server("server_dummy.py", args.port, 0.0), start_server("server_dummy2.py", args.port + 1, 0.0)]
+    try:
+        # The agent's own prints go to stderr so stdout is only the report.
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(sys.stderr):
+            routing, turns = asyncio.run(run(args, Path(tmp) / "tools.json"))
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    confusion, timings = routing["confusion"], routing["timings"]
+    routes = list(confusion)
+    correct = sum(confusion[r][r] for r in routes)
+    fallback = sum(confusion[r]["all"] for r in routes)
+    print(f"routing accuracy on {len(LABELED)} labeled queries")
+    print(f"  exact {correct}/{len(LABELED)} ({correct / len(LABELED):.0%}), kept all tools {fallback}, wrong route {len(LABELED) - correct - fallback}")
+    print(f"  classification {np.mean(timings) * 1e6:.0f} us mean, {max(timings) * 1e6:.0f} us max")
+    print(f"  {'expected':<16} " + " ".join(f"{r:>16}" for r in routes + ["all"]))
+    for expected in routes:
+        print(f"  {expected:<16} " + " ".join(f"{confusion[expected][r]:>16}" for r in routes + ["all"]))
+
+    print(f"\nturn latency and prompt tokens per route (llm delay {args.llm_delay} s + {args.seconds_per_1k_tokens} s per 1k tokens)")
+    print(f"  {'route':<16} {'full ms':>9} {'routed ms':>10} {'saved':>7} {'full tok':>9} {'routed tok':>11}")
+    for route in routes:
+        t = turns[route]
+        full_ms, routed_ms = np.mean(t["full"]) * 1000, np.mean(t["routed"]) * 1000
+        print(f"  {route:<16} {full_ms:>9.0f} {routed_ms:>10.0f} {(full_ms - routed_ms) / full_ms:>7.0%} "
+              f"{np.mean(t['full_tokens']):>9.0f} {np.mean(t['routed_tokens']):>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+Offline load test of TestAgent.ask_agent: many scripted conversations at once against local servers.
+
+    python benchmarks/bench_load.py --conversations 1000 --concurrency 50 --output load.json
+    python benchmarks/bench_load.py --compare baseline.json load.json
+
+Both dummy servers are started on spare ports and the Gemini model is replaced by a
+ScriptedChatModel with --llm-delay seconds per call. Each conversation is one of SCENARIOS: an
+FX table query, the same query followed by a follow-up answered from the stored context, a
+SemanticSearch question, an FX rate lookup, or a direct answer. Each conversation gets its own
+session on the one shared agent.
+
+The report is JSON: turn latency percentiles (overall and per scenario), throughput, LLM calls,
+prompt tokens and tool calls per turn, error count, and peak RSS of the agent and of each server.
+--trace also writes the timing spans of every turn (see tracing.Tracer) for a phase breakdown.
+--compare prints the relative change of every number between two reports.
+"""
+import os
+import sys
+import json
+import time
+import random
+import asyncio
+import argparse
+import platform
+import resource
+import tempfile
+import subprocess
+from contextlib import redirect_stdout
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from cl_agent import TestAgent, message_text
+from tool_schema_cache import ToolSchemaCache
+from tool_result_cache import ToolResultCache
+from tracing import JsonlSink, Tracer
+from fake_chat_model import ScriptedChatModel, tool_step
+from bench_concurrent_tools import start_server, tools_done
+
+FX_TABLE = "Show my approved CAD transactions"
+FX_FOLLOWUP = "Which of those were booked through FX Online?"
+SEARCH = "What are the April Showers economics notes saying about bond yields?"
+RATE = "How did USD/CAD move in 2023?"
+DIRECT = "What is the difference between an FX spot and an FX forward?"
+
+# User message -> tool calls the model asks for on that turn (none: answered directly).
+TOOL_SCRIPTS = {
+    FX_TABLE: [("GetForeignExchangeTransactionData", {"settlement_status": "Approved", "currency": "CAD", "page_size": 20})],
+    SEARCH: [("SemanticSearch", {"message": "april showers bond yields"})],
+    RATE: [("ForeignExchangeLookup", {"currencyCode": "USD/CAD", "date_range": "2023/01/01-2024/01/01"})],
+}
+
+SCENARIOS = {
+    "fx_table": [FX_TABLE],
+    "fx_followup": [FX_TABLE, FX_FOLLOWUP],
+    "semantic_search": [SEARCH],
+    "fx_rate": [RATE],
+    "direct": [DIRECT],
+}
+
+
+def respond(messages):
+    question = message_text(next(m for m in reversed(messages) if isinstance(m, HumanMessage)).content)
+    calls = TOOL_SCRIPTS.get(question)
+    if calls and not tools_done(messages):
+        return tool_step(*calls)
+    return AIMessage(content=f"Scripted answer to: {question}")
+
+
+def percentiles(values) -> dict:
+    if not values:
+        return {}
+    p50, p95, p99 = np.percentile(values, [50, 95, 99])
+    return {"p50_ms": round(p50 * 1000, 2), "p95_ms": round(p95 * 1000, 2), "p99_ms": round(p99 * 1000, 2),
+            "mean_ms": round(float(np.mean(values)) * 1000, 2), "max_ms": round(max(values) * 1000, 2)}
+
+
+def peak_rss_mb(pid: int = None) -> float:
+    if pid is None:
+        # ru_maxrss is KiB on Linux, bytes on macOS.
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return round(rss / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+    try:
+        with open(f"/proc/{pid}/status", "r") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    return None
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args, cache_path) -> dict:
+    tracer = Tracer(JsonlSink(args.trace)) if args.trace else Tracer()
+    agent = TestAgent(connect=False, tool_cache=ToolSchemaCache(cache_path), tracer=tracer)
+    agent.multi_mcp_config = {
+        "mcp1": {"url": f"http://127.0.0.1:{args.port}/mcp", "transport": "streamable_http"},
+        "mcp2": {"url": f"http://127.0.0.1:{args.port + 1}/mcp", "transport": "streamable_http"},
+    }
+    agent.multi_mcp_client = MultiServerMCPClient(agent.multi_mcp_config)
+    if args.no_result_cache:
+        agent.tool_result_cache = ToolResultCache(default_ttl=0, ttls={})
+    if args.no_answer_cache:
+        agent.answer_cache = None
+    agent.model_client = ScriptedChatModel(respond=respond, delay_seconds=args.llm_delay)
+    agent.connection_info = await agent.create_mcp_session(revalidate=False)
+
+    rng = random.Random(args.seed)
+    names = list(SCENARIOS) if args.scenarios == "all" else args.scenarios.split(",")
+    plan = [rng.choice(names) for _ in range(args.conversations)]
+    turns = []
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def conversation(i, scenario):
+        async with semaphore:
+            session = agent.new_session(f"{scenario}-{i}")
+            for question in SCENARIOS[scenario]:
+                started = time.perf_counter()
+                answer = await agent.ask_agent(question, session=session)
+                stats = session.last_turn_stats
+                turns.append({
+                    "scenario": scenario,
+                    "seconds": time.perf_counter() - started,
+                    "llm_calls": stats.llm_calls,
+                    "prompt_tokens": stats.prompt_tokens,
+                    "tool_calls": stats.tool_calls,
+                    "answer_cache_hit": stats.answer_cache_hit,
+                    "error": answer.startswith("❌"),
+                })
+
+    started = time.perf_counter()
+    await asyncio.gather(*(conversation(i, scenario) for i, scenario in enumerate(plan)))
+    wall = time.perf_counter() - started
+
+    def summarize(rows):
+        return {
+            "turns": len(rows),
+            "errors": sum(r["error"] for r in rows),
+            "latency": percentiles([r["seconds"] for r in rows]),
+            "llm_calls_per_turn": round(float(np.mean([r["llm_calls"] for r in rows])), 3),
+            "prompt_tokens_per_turn": round(float(np.mean([r["prompt_tokens"] for r in rows])), 1),
+            "prompt_tokens_p95": float(np.percentile([r["prompt_tokens"] for r in rows], 95)),
+            "tool_calls_per_turn": round(float(np.mean([r["tool_calls"] for r in rows])), 3),
+            "answer_cache_hit_rate": round(float(np.mean([r["answer_cache_hit"] for r in rows])), 3),
+        }
+
+    return {
+        **summarize(turns),
+        "conversations": len(plan),
+        "wall_seconds": round(wall, 3),
+        "turns_per_second": round(len(turns) / wall, 2),
+        "answer_cache": agent.answer_cache.summary() if agent.answer_cache is not None else None,
+        "scenarios": {name: summarize([r for r in turns if r["scenario"] == name]) for name in names if any(r["scenario"] == name for r in turns)},
+    }
+
+
+def flatten(report: dict, prefix: str = "") -> dict:
+    flat = {}
+    for key, value in report.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[prefix + key] = value
+    return flat
+
+
+def compare(baseline_path: str, candidate_path: str):
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = flatten(json.load(f)["results"])
+    with open(candidate_path, "r", encoding="utf-8") as f:
+        candidate = flatten(json.load(f)["results"])
+    print(f"{'metric':<48} {'baseline':>12} {'candidate':>12} {'change':>9}")
+    for key in sorted(baseline.keys() & candidate.keys()):
+        before, after = baseline[key], candidate[key]
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        print(f"{key:<48} {before:>12} {after:>12} {change:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--conversations", type=int, default=1000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--scenarios", default="all", help=f"comma-separated subset of: {', '.join(SCENARIOS)}")
+    parser.add_argument("--llm-delay", type=float, default=0.05, help="seconds per fake model call")
+    parser.add_argument("--tool-delay", type=float, default=0.0, help="TOOL_DELAY_SECONDS for both servers")
+    parser.add_argument("--no-result-cache", action="store_true", help="send every tool call to the servers")
+    parser.add_argument("--no-answer-cache", action="store_true", help="always run the graph, even for repeated questions")
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--port", type=int, default=18101)
+    parser.add_argument("--trace", help="append per-turn timing spans to this JSONL file")
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--compare", nargs=2, metavar=("BASELINE", "CANDIDATE"), help="diff two JSON reports and exit")
+    args = parser.parse_args()
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    servers = [start_server("server_dummy.py", args.port, args.tool_delay), start_server("server_dummy2.py", args.port + 1, args.tool_delay)]
+    try:
+        # The agent's own prints go to stderr so stdout stays valid JSON.
+        with tempfile.TemporaryDirectory() as tmp, redirect_stdout(sys.stderr):
+            results = asyncio.run(run(args, Path(tmp) / "tools.json"))
+        results["peak_rss_mb"] = {
+            "agent": peak_rss_mb(),
+            "server_dummy": peak_rss_mb(servers[0].pid),
+            "server_dummy2": peak_rss_mb(servers[1].pid),
+        }
+    finally:
+        for server in servers:
+            server.terminate()
+            server.wait()
+
+    report = {
+        "benchmark": "bench_load",
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "compare")},
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+        print(f"{results['turns']} turns, {results['turns_per_second']} turns/s, p95 {results['latency']['p95_ms']} ms -> {args.output}")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
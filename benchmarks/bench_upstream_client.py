@@ -0,0 +1,110 @@
+"""
+Requests per second to a local stub upstream: a fresh httpx.AsyncClient per call (the old
+make_dummy_post_request) versus the shared, pooled UpstreamClient.
+
+    python benchmarks/bench_upstream_client.py --requests 2000 --concurrency 50
+
+The stub runs in a subprocess (uvicorn) and answers POST with the JSON it received. With
+--fail-rate the stub returns 503 for that share of requests, which exercises the retries.
+"""
+import sys
+import time
+import random
+import asyncio
+import argparse
+import subprocess
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import httpx
+from upstream_client import UpstreamClient
+
+
+def run_stub(port: int, fail_rate: float):
+    import uvicorn
+    from starlette.applications import Starlette
+    from starlette.responses import JSONResponse
+    from starlette.routing import Route
+
+    async def echo(request):
+        if fail_rate and random.random() < fail_rate:
+            return JSONResponse({"error": "unavailable"}, status_code=503)
+        return JSONResponse({"json": await request.json()})
+
+    async def health(request):
+        return JSONResponse({"ok": True})
+
+    app = Starlette(routes=[Route("/post", echo, methods=["POST"]), Route("/health", health)])
+    uvicorn.run(app, host="127.0.0.1", port=port, log_level="warning")
+
+
+async def per_call_client(url, data):
+    async with httpx.AsyncClient() as client:
+        try:
+            response = await client.post(url, json=data, timeout=10.0)
+            response.raise_for_status()
+            return response.json()
+        except Exception as e:
+            return {"error": str(e)}
+
+
+async def load(call, requests, concurrency):
+    semaphore = asyncio.Semaphore(concurrency)
+    errors = 0
+
+    async def one(i):
+        nonlocal errors
+        async with semaphore:
+            result = await call({"i": i})
+            errors += "error" in result
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return requests / (time.perf_counter() - started), errors
+
+
+async def bench(args, url):
+    before, before_errors = await load(lambda data: per_call_client(url, data), args.requests, args.concurrency)
+    async with UpstreamClient(max_connections=args.concurrency, max_keepalive_connections=args.concurrency) as upstream:
+        async def pooled(data):
+            try:
+                return await upstream.post_json(url, data)
+            except Exception as e:
+                return {"error": str(e)}
+        after, after_errors = await load(pooled, args.requests, args.concurrency)
+        summary = upstream.summary()
+    print(f"{args.requests} POSTs, concurrency {args.concurrency}, stub fail rate {args.fail_rate:.0%}")
+    print(f"  client per call: {before:8.0f} req/s  ({before_errors} errors)")
+    print(f"  pooled client:   {after:8.0f} req/s  ({after_errors} errors)  {after / before:.1f}x")
+    print(f"  pooled client stats: {summary}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--port", type=int, default=18090)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    parser.add_argument("--stub", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.stub:
+        run_stub(args.port, args.fail_rate)
+        return
+    stub = subprocess.Popen([sys.executable, __file__, "--stub", "--port", str(args.port), "--fail-rate", str(args.fail_rate)])
+    try:
+        for _ in range(100):
+            try:
+                urllib.request.urlopen(f"http://127.0.0.1:{args.port}/health", timeout=1)
+                break
+            except OSError:
+                time.sleep(0.1)
+        asyncio.run(bench(args, f"http://127.0.0.1:{args.port}/post"))
+    finally:
+        stub.terminate()
+        stub.wait()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Exact vs IVF search latency and IVF recall for the SemanticSearch VectorIndex.
+
+    python benchmarks/bench_vector_index.py --size 1000000 --queries 50
+
+Vectors are random clustered unit vectors written straight into the index (embedding cost
+is measured separately on a small text sample), so large sizes build quickly. The index
+lives in a temporary directory and is memory-mapped like in the server.
+"""
+import sys
+import time
+import argparse
+import tempfile
+import statistics
+import numpy as np
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from vector_index import HashingEmbedder, VectorIndex
+
+SAMPLE_TEXT = (
+    "April Showers economic environment of 2025 presents an unprecedented challenge for econometric "
+    "modeling and forecasting as bond yields fluctuate between 4.2% and 4.6%."
+)
+
+
+def clustered_vectors(rng, count, dim, clusters=256):
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    vectors = centers[rng.integers(0, clusters, count)] + 0.6 * rng.normal(size=(count, dim)).astype(np.float32)
+    return vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[4, 8, 16, 32])
+    parser.add_argument("--batch", type=int, default=100_000)
+    args = parser.parse_args()
+
+    embedder = HashingEmbedder()
+    started = time.perf_counter()
+    embedder.embed([f"{SAMPLE_TEXT} {i}" for i in range(1000)])
+    print(f"embedding: {1000 / (time.perf_counter() - started):,.0f} chunks/s")
+
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex(tmp, embedder=embedder)
+        started = time.perf_counter()
+        for start in range(0, args.size, args.batch):
+            n = min(args.batch, args.size - start)
+            records = [{"chunk_id": f"c{start + i}", "raw_context": ""} for i in range(n)]
+            index.add(records, clustered_vectors(rng, n, index.dim))
+        print(f"built {args.size:,} rows in {time.perf_counter() - started:.1f} s "
+              f"({args.size * index.dim * 4 / 2**20:.0f} MiB of vectors on disk)")
+        started = time.perf_counter()
+        index.train_ivf()
+        print(f"trained IVF with {len(index.centroids)} lists in {time.perf_counter() - started:.1f} s")
+
+        queries = clustered_vectors(rng, args.queries, index.dim)
+        started = time.perf_counter()
+        exact = index.search_vectors(queries, k=args.k, mode="exact")
+        batched_ms = (time.perf_counter() - started) * 1000 / args.queries
+        single = []
+        for q in queries[:10]:
+            t = time.perf_counter()
+            index.search_vectors(q, k=args.k, mode="exact")
+            single.append((time.perf_counter() - t) * 1000)
+        print(f"\nexact: {statistics.median(single):.2f} ms/query single, {batched_ms:.2f} ms/query batched")
+
+        print(f"{'nprobe':>7} {'ms/query':>9} {'recall@' + str(args.k):>10}")
+        for nprobe in args.nprobe:
+            latencies = []
+            recall = []
+            for q, (_, exact_ids) in zip(queries, exact):
+                t = time.perf_counter()
+                _, ids = index.search_vectors(q, k=args.k, mode="ivf", nprobe=nprobe)[0]
+                latencies.append((time.perf_counter() - t) * 1000)
+                recall.append(len(set(ids.tolist()) & set(exact_ids.tolist())) / max(1, len(exact_ids)))
+            print(f"{nprobe:>7} {statistics.median(latencies):>9.2f} {statistics.mean(recall):>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
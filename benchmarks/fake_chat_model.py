@@ -0,0 +1,56 @@
+"""Offline stand-in for the Gemini chat model, shared by the benchmarks that drive TestAgent."""
+import json
+import time
+import asyncio
+from typing import Callable
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from history_store import estimate_tokens
+
+
+class ScriptedChatModel(BaseChatModel):
+    """
+    Chat model whose reply is computed by `respond(messages) -> AIMessage`, with no network
+    calls. Tool binding only records the size of the bound schemas, so `respond` decides which
+    tool calls to emit. Each call sleeps `delay_seconds`, plus `seconds_per_1k_tokens` per
+    thousand estimated prompt tokens (messages and bound tool schemas) when set.
+    """
+    respond: Callable
+    delay_seconds: float = 0.0
+    seconds_per_1k_tokens: float = 0.0
+    tool_tokens: int = 0
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools, **kwargs):
+        schemas = json.dumps([convert_to_openai_tool(t) for t in tools]) if tools else ""
+        return self.model_copy(update={"tool_tokens": estimate_tokens(schemas)})
+
+    def delay(self, messages) -> float:
+        if not self.seconds_per_1k_tokens:
+            return self.delay_seconds
+        tokens = self.tool_tokens + sum(estimate_tokens(str(m.content)) for m in messages)
+        return self.delay_seconds + self.seconds_per_1k_tokens * tokens / 1000
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay = self.delay(messages)
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=self.respond(messages))])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        delay = self.delay(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=self.respond(messages))])
+
+
+def tool_step(*calls) -> AIMessage:
+    """An AIMessage requesting `calls`, each a (tool name, args) pair, in one model step."""
+    return AIMessage(content="", tool_calls=[
+        {"name": name, "args": args, "id": f"call_{i}_{name}"} for i, (name, args) in enumerate(calls)
+    ])
@@ -1,11 +1,86 @@
+import os
 import json
+import time
 import asyncio
 import asyncio
+from dataclasses                    import dataclass, field
 from dotenv                         import load_dotenv
 from langchain_mcp_adapters.client  import MultiServerMCPClient
 from langgraph.prebuilt             import create_react_agent
 from langchain_google_genai         import ChatGoogleGenerativeAI
-from langchain_core.messages        import ToolMessage
+from langchain_core.callbacks       import AsyncCallbackHandler
+from langchain_core.messages        import AIMessage, HumanMessage, SystemMessage, ToolMessage, convert_to_messages
+from tool_schema_cache              import ToolSchemaCache, build_tools, changed_servers, discover_tools
+from tool_result_cache              import ToolResultCache, wrap_tools
+from tool_concurrency               import ServerLimiter, limit_tools
+from history_store                  import HistoryStore, estimate_tokens
+from context_encoders               import get_encoder, is_transaction_data
+from fx_render                      import render_markdown_table
+from context_assembly               import assemble_context, collect_tool_results, message_text
+from tracing                        import TraceCallback, Tracer
+from answer_cache                   import AnswerCache, context_hash
+from fx_frame                       import QueryError, TransactionFrame, contradicts_query, parse_followup, parse_spec, render_result, spec_prompt
+from fx_query                       import MAX_PAGE_SIZE
+from intent_router                  import FOLLOWUP_CUES, IntentRouter, Route
+
+FX_TRANSACTION_TOOL = "GetForeignExchangeTransactionData"
+# Tool arguments that pick a page of a query rather than the query itself.
+PAGING_ARGS = ("cursor", "page_size")
+
+
+@dataclass
+class TurnStats:
+    llm_calls: int = 0
+    prompt_tokens: int = 0
+    tool_calls: int = 0
+    tools: list = field(default_factory=list)
+    answer_cache_hit: bool = False
+    local_query: bool = False
+    route: str = None
+    first_token_seconds: float = None
+    total_seconds: float = None
+
+
+class TurnStatsCallback(AsyncCallbackHandler):
+    """Counts model calls, their estimated prompt tokens and tool invocations made during a single turn."""
+
+    def __init__(self, stats: TurnStats):
+        self.stats = stats
+
+    async def on_chat_model_start(self, serialized, messages, **kwargs):
+        self.stats.llm_calls += 1
+        self.stats.prompt_tokens += sum(estimate_tokens(message_text(m.content)) for batch in messages for m in batch)
+
+    async def on_llm_start(self, serialized, prompts, **kwargs):
+        self.stats.llm_calls += 1
+        self.stats.prompt_tokens += sum(estimate_tokens(p) for p in prompts)
+
+    async def on_tool_start(self, serialized, input_str, **kwargs):
+        self.stats.tool_calls += 1
+        self.stats.tools.append((serialized or {}).get("name") or kwargs.get("name"))
+
+
+@dataclass
+class ConversationState:
+    """Per-conversation state; the compiled agent and MCP client are shared across conversations."""
+    session_id: str = "default"
+    message_history: HistoryStore = field(default_factory=HistoryStore)
+    last_tool_call: tuple = None
+    last_tool_context: object = None
+    current_message_context_json: object = field(default_factory=dict)
+    last_turn_stats: TurnStats = field(default_factory=TurnStats)
+    last_turn_messages: list = field(default_factory=list)
+    fx_query: dict = None
+    # Every row loaded for fx_query: the pages the model saw plus any fetched since for local
+    # follow-ups. Kept out of last_tool_context, which is what prompts are built from.
+    fx_rows: list = None
+    fx_frame: tuple = None
+    last_active: float = field(default_factory=time.monotonic)
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock, repr=False)
+
+    def touch(self):
+        self.last_active = time.monotonic()
+
 
 class TestAgent:
     SYSTEM_PROMPT = """You are a helpful AI assistant with access to specialized tools through MCP (Model Context Protocol).
@@ -32,13 +107,49 @@ class TestAgent:
 
 Be efficient and thoughtful: use tools when they add value, but respond directly when you can provide accurate information from your knowledge base."""
 
-    def __init__(self):
+    def __init__(self, connect: bool = True, tool_cache: ToolSchemaCache = None, history_token_budget: int = 4000, history_policy: str = "summarize", context_encoding: str = "table",
+                 fx_answer_mode: str = "summary", fx_table_columns: list = None, fx_table_max_rows: int = None, context_token_budget: int = 1500,
+                 context_compression_ratio: float = 0.25, tracer: Tracer = None, answer_cache: AnswerCache = None, fx_followup_mode: str = "rules+llm",
+                 intent_routing: bool = True):
+        # Pass connect=False (or use `await TestAgent.create()`) when an event loop is already running.
         load_dotenv()
         self.connection_info = {}
-        self.message_history = []
-        self.last_tool_call = None
-        self.last_tool_context = None
-        self.current_message_context_json = {}
+        self.history_token_budget = history_token_budget
+        self.history_policy = history_policy
+        self.session = self.new_session()
+        # How tool results are written into prompts; see context_encoders.ENCODERS.
+        self.context_encoder = get_encoder(context_encoding)
+        # FX transaction answers: "summary" renders the table locally and asks the model only for a short
+        # narrative, "table" returns the locally rendered table without a second model call, and "llm"
+        # keeps the old behaviour of having the model write the table.
+        if fx_answer_mode not in ("summary", "table", "llm"):
+            raise ValueError(f"Unknown fx_answer_mode: {fx_answer_mode}")
+        self.fx_answer_mode = fx_answer_mode
+        self.fx_table_columns = fx_table_columns
+        self.fx_table_max_rows = fx_table_max_rows
+        # Follow-ups on stored FX rows ("which ones were in CAD?", "total buy amount?") are answered by
+        # fx_frame without the graph: "rules" only when parse_followup reads the question, "rules+llm"
+        # also asks the model for a query spec once at least fx_followup_translate_min_rows rows are
+        # stored and the message reads as a follow-up (see looks_like_followup), and "off" always sends
+        # follow-ups to the graph.
+        if fx_followup_mode not in ("rules+llm", "rules", "off"):
+            raise ValueError(f"Unknown fx_followup_mode: {fx_followup_mode}")
+        self.fx_followup_mode = fx_followup_mode
+        self.fx_followup_translate_min_rows = 100
+        # Remaining pages are loaded before a local query, up to this many rows.
+        self.fx_followup_max_rows = 10000
+        # Stored FX rows encoded into a follow-up turn's prompt; the rest are described by count.
+        self.followup_context_max_rows = 20
+        # Token budget for the retrieved context injected into the answer call (see context_assembly).
+        self.context_token_budget = context_token_budget
+        # Share of each retrieved chunk kept by query-focused sentence extraction; None sends chunks whole.
+        self.context_compression_ratio = context_compression_ratio
+        self.tool_cache = tool_cache or ToolSchemaCache()
+        # Timing spans for each phase of a turn; disabled unless a sink is given or AGENT_TRACE is set.
+        self.tracer = tracer or Tracer.from_env()
+        self.startup_stats = {}
+        self.revalidation_task = None
+        self.tools_by_name = {}
         self.multi_mcp_config = {
             "mcp1": {
                 "url": "http://localhost:8001/mcp",
@@ -49,32 +160,101 @@ Be efficient and thoughtful: use tools when they add value, but respond directly
                 "transport": "streamable_http",
             },
         }
+        # Tool calls from one model step run concurrently; these cap in-flight calls per server and
+        # bound each call (seconds). A timed-out call returns an error result instead of failing the turn; it is never cached.
+        self.mcp_server_limits = {
+            "mcp1": {"max_concurrency": 8, "timeout": 30},
+            "mcp2": {"max_concurrency": 8, "timeout": 30},
+            "default": {"max_concurrency": 8, "timeout": 30},
+        }
+        self.server_limiter = ServerLimiter(self.mcp_server_limits)
+        # Functions (tools -> tools) applied around the raw MCP tools before the limiter and result
+        # cache, e.g. eval_runner.Cassette.wrap_tools to record or replay tool results.
+        self.tool_middleware = []
+        # Seconds a tool result stays reusable for identical (normalized) arguments; 0 disables caching.
+        self.tool_result_ttls = {
+            "GetForeignExchangeTransactionData": 30,
+            "ForeignExchangeLookup": 3600,
+            "SemanticSearch": 600,
+        }
+        # Arguments each tool compares case-insensitively, so "cad" and "CAD" share a cache entry.
+        self.tool_result_casefold = {
+            "GetForeignExchangeTransactionData": ("currency", "product_type", "channel", "currency_pair"),
+            "ForeignExchangeLookup": ("currencyCode",),
+        }
+        self.tool_result_cache = ToolResultCache(max_entries=2048, default_ttl=60, ttls=self.tool_result_ttls, casefold=self.tool_result_casefold)
+        # Whole turns for repeated questions, served without an LLM call while their tool results are
+        # unchanged; ANSWER_CACHE_PATH persists it across restarts. Set to None to disable.
+        self.answer_cache = answer_cache if answer_cache is not None else AnswerCache(path=os.environ.get("ANSWER_CACHE_PATH"))
+        # Each message is classified locally (see intent_router) and run on a graph that carries only
+        # the tools of its route; an unsure router, or intent_routing=False, uses the graph with every tool.
+        self.intent_routing = intent_routing
+        self.intent_router = None
+        self.graph_tools = []
+        self.route_agents = {}
         self.multi_mcp_client = MultiServerMCPClient(self.multi_mcp_config)
         self.model_client = ChatGoogleGenerativeAI(model="gemini-2.0-flash", convert_system_message_to_human=True)
-        self.connection_info = asyncio.run(self.create_mcp_session())
+        if connect:
+            self.connection_info = asyncio.run(self.create_mcp_session(revalidate=False))
 
-    def extract_tool_context(self, messages):
-        tool_call_made = any(isinstance(item, ToolMessage) for item in messages)
-        if not tool_call_made:
-            return None, None
-        tool_message = next((m for m in messages if isinstance(m, ToolMessage)), None)
-        if not tool_message:
+    @classmethod
+    async def create(cls, **kwargs):
+        agent = cls(connect=False, **kwargs)
+        agent.connection_info = await agent.create_mcp_session()
+        return agent
+
+    # The single-conversation attributes below delegate to the default session so that
+    # existing callers (main, deep_eval) keep working unchanged.
+    @property
+    def message_history(self):
+        return self.session.message_history
+
+    @message_history.setter
+    def message_history(self, value):
+        self.session.message_history.replace(value)
+
+    @property
+    def last_tool_call(self):
+        return self.session.last_tool_call
+
+    @last_tool_call.setter
+    def last_tool_call(self, value):
+        self.session.last_tool_call = value
+
+    @property
+    def last_tool_context(self):
+        return self.session.last_tool_context
+
+    @last_tool_context.setter
+    def last_tool_context(self, value):
+        self.session.last_tool_context = value
+
+    @property
+    def current_message_context_json(self):
+        return self.session.current_message_context_json
+
+    @current_message_context_json.setter
+    def current_message_context_json(self, value):
+        self.session.current_message_context_json = value
+
+    @property
+    def last_turn_stats(self):
+        return self.session.last_turn_stats
+
+    def new_session(self, session_id: str = "default") -> ConversationState:
+        history = HistoryStore(token_budget=self.history_token_budget, policy=self.history_policy)
+        return ConversationState(session_id=session_id, message_history=history)
+
+    def extract_tool_context(self, messages, query=None):
+        # Every non-FX tool result of the turn, hits deduplicated and ranked by score within the token budget.
+        tool_messages = [m for m in messages if isinstance(m, ToolMessage) and getattr(m, 'name', None) != FX_TRANSACTION_TOOL]
+        if not tool_messages:
             return None, None
         try:
-            tool_data = json.loads(tool_message.content)
-            extracted_chunks = []
-            document_urls = []
-            for chunk in tool_data.get("result", {}).get("hits", []):
-                title = chunk["record"].get("title", "Unknown Document")
-                context = chunk["record"].get("raw_context", "")
-                url = chunk["record"].get("url", "")
-                if context:
-                    extracted_chunks.append(f"📘 {title}\n{context}\n" + "*" * 20)
-                if url and url not in document_urls:
-                    document_urls.append(url)
-            final_chunk_text = "\n\n".join(extracted_chunks) if extracted_chunks else None
-            return final_chunk_text, document_urls
-        except (json.JSONDecodeError, KeyError, AttributeError) as e:
+            ranked_hits, others = collect_tool_results(tool_messages)
+            return assemble_context(ranked_hits, others, token_budget=self.context_token_budget,
+                                    query=query, compression_ratio=self.context_compression_ratio)
+        except (KeyError, AttributeError, TypeError, ValueError) as e:
             print(f"Error parsing tool message: {e}")
             return None, None
 
@@ -84,44 +264,220 @@ Be efficient and thoughtful: use tools when they add value, but respond directly
         enhanced_messages = messages.copy()
         context_message = {
             "role": "system",
-            "content": f"""Based on the tool search results, here is the relevant context that should inform your response:\n\n        EXTRACTED CONTEXT:\n        {extracted_context}\n\n        DOCUMENT SOURCES:\n        {', '.join(document_urls) if document_urls else 'No URLs available'}\n\n        Please use this context to provide a comprehensive and accurate response to the user's query. Reference the specific information from these sources when relevant."""
+            "content": f"""Based on the tool search results, here is the relevant context that should inform your response:\n\n        EXTRACTED CONTEXT:\n        {extracted_context}\n\n        DOCUMENT SOURCES:\n        {'; '.join(f'[{i}] {url}' for i, url in enumerate(document_urls, 1)) if document_urls else 'No URLs available'}\n\n        Please use this context to provide a comprehensive and accurate response to the user's query. Reference the specific information from these sources when relevant."""
         }
         enhanced_messages.append(context_message)
         return enhanced_messages
 
-    def enhance_tool_context_json(self, messages):
-        tool_message = next((m for m in messages if isinstance(m, ToolMessage)), None)
-        if not tool_message:
+    def transaction_data(self, tool_message):
+        try:
+            tool_data = json.loads(message_text(tool_message.content))
+        except (json.JSONDecodeError, TypeError):
             return None
+        result = tool_data.get("result") if isinstance(tool_data, dict) else None
+        return result if result and is_transaction_data(result) else None
+
+    def merged_transaction_data(self, messages):
+        # FX rows from every FX tool call of the turn (e.g. several pages or filters), in call order.
+        results = [self.transaction_data(m) for m in messages
+                   if isinstance(m, ToolMessage) and getattr(m, 'name', None) == FX_TRANSACTION_TOOL]
+        results = [r for r in results if r]
+        if len(results) <= 1:
+            return results[0] if results else None
+        return [row for r in results for row in (r if isinstance(r, list) else [r])]
+
+    def enhance_tool_context_json(self, messages, session=None):
         try:
-            tool_data = json.loads(tool_message.content)
-            result = tool_data.get("result")
-            if not result:
-                return None
-            if (isinstance(result, dict) and "transactionId" in result) or (
-                isinstance(result, list) and result and isinstance(result[0], dict) and "transactionId" in result[0]
-            ):
-                json_str = json.dumps(result, indent=2)
+            result = self.merged_transaction_data(messages)
+            if result:
+                encoded = self.context_encoder.encode(result)
+                if self.fx_answer_mode == "llm":
+                    instruction = (
+                        "Represent this data as a table in your response. If there are nested fields, flatten them appropriately. "
+                    )
+                else:
+                    instruction = (
+                        "This data is already shown to the user as a table directly below your reply, so do not reproduce it. "
+                        "Write only a short narrative summary (two or three sentences) of what stands out. "
+                    )
                 system_message = {
                     "role": "system",
                     "content": (
                         "You have received the following Foreign Exchange Transaction Data from a tool call. "
-                        "Represent this data as a table in your response. If there are nested fields, flatten them appropriately. "
-                        "Here is the data (in JSON):\n\n"
-                        f"{json_str}"
+                        f"{instruction}"
+                        f"Here is the data ({self.context_encoder.description}):\n\n"
+                        f"{encoded}"
                     ),
                 }
-                self.current_message_context_json = result
+                (session or self.session).current_message_context_json = result
                 return system_message
             return None
         except Exception as e:
             print(f"Error in enhance_tool_context_json: {e}")
             return None
 
-    async def create_mcp_session(self):
+    def tool_call_args(self, tool_message, messages) -> dict:
+        # Arguments the model sent for `tool_message`, from the AIMessage in `messages` that made the call.
+        return next(
+            (call["args"] for m in messages if isinstance(m, AIMessage)
+             for call in m.tool_calls if call.get("id") == tool_message.tool_call_id),
+            {},
+        )
+
+    def tool_call_signature(self, tool_message, messages=()):
+        """
+        (tool name, arguments) identifying the query behind `tool_message`, and its parsed content.
+
+        The arguments come from the call in `messages`, without the paging arguments (cursor,
+        page_size), so every page of one FX query has the same signature while differently
+        filtered or projected queries do not. Without the call, the non-result, non-paging
+        keys of the content stand in for them.
+        """
+        tool_name = getattr(tool_message, 'name', None)
+        try:
+            tool_content = json.loads(message_text(tool_message.content))
+        except Exception:
+            tool_content = tool_message.content
+        args = self.tool_call_args(tool_message, messages)
+        if args:
+            params = tuple(sorted((k, str(v)) for k, v in args.items() if k not in PAGING_ARGS))
+        elif isinstance(tool_content, dict):
+            params = tuple(sorted((k, str(v)) for k, v in tool_content.items() if k not in ('result', 'offset', 'next_cursor') + PAGING_ARGS))
+        else:
+            params = tuple()
+        return (tool_name, params), tool_content
+
+    def followup_context_message(self, last_tool_context):
+        data = last_tool_context
+        more = ""
+        if isinstance(last_tool_context, dict) and is_transaction_data(last_tool_context.get("result")):
+            data = last_tool_context["result"]
+            if isinstance(data, list) and len(data) > self.followup_context_max_rows:
+                more = (
+                    f" Only the first {self.followup_context_max_rows} of {len(data)} row(s) are shown; if the user needs the others, "
+                    f"call {FX_TRANSACTION_TOOL} again with the same filters."
+                )
+                data = data[:self.followup_context_max_rows]
+        if isinstance(data, (dict, list)):
+            encoded = self.context_encoder.encode(data)
+            description = self.context_encoder.description if is_transaction_data(data) else "in JSON"
+        else:
+            encoded, description = str(data), "as text"
+        if not more and isinstance(last_tool_context, dict) and last_tool_context.get("next_cursor"):
+            more = (
+                f" This is only the first {len(last_tool_context.get('result') or [])} row(s); if the user needs more rows, call "
+                f"{FX_TRANSACTION_TOOL} again with the same filters and cursor=\"{last_tool_context['next_cursor']}\"."
+            )
+        return {
+            "role": "system",
+            "content": (
+                f"Here is the data context from the previous tool call ({description}):\n\n"
+                f"{encoded}\n\nIf the user's question is a follow-up about this data, answer it directly from this context "
+                f"without calling a tool. Otherwise, use your tools as usual.{more}"
+            )
+        }
+
+    def tool_context_summary(self, last_tool_call, last_tool_context) -> dict:
+        # What a turn that is not a follow-up learns about the stored context: one capped line, no data.
+        name, params = last_tool_call or (None, ())
+        args = ", ".join(f"{k}={v}" for k, v in params)
+        args = args if len(args) <= 200 else args[:199] + "…"
+        rows = last_tool_context.get("result") if isinstance(last_tool_context, dict) else None
+        size = f"{len(rows)} row(s)" if isinstance(rows, list) else f"about {estimate_tokens(str(last_tool_context))} tokens of data"
+        return {
+            "role": "system",
+            "content": (
+                f"The previous turn called {name or 'a tool'}({args}), which returned {size}; that data is not included here. "
+                "If the user's question needs it, call the tool again."
+            ),
+        }
+
+    def inject_turn_context(self, state, config):
+        # Runs inside the graph before every model call. After the tools of this turn have run,
+        # it injects their context into the answer call so the turn never needs a second graph run.
+        turn = config.get("configurable", {}).get("turn_state") or {}
+        messages = state["messages"]
+        history_len = turn.get("history_len", len(messages))
+        turn_messages = messages[history_len:]
+        tool_messages = [m for m in turn_messages if isinstance(m, ToolMessage)]
+        if not tool_messages:
+            if turn.get("last_tool_context"):
+                # The stored data only for a follow-up; any other turn gets a one-line summary of it.
+                if turn.get("followup"):
+                    context_message = self.followup_context_message(turn["last_tool_context"])
+                else:
+                    context_message = self.tool_context_summary(turn.get("last_tool_call"), turn["last_tool_context"])
+                return {"llm_input_messages": messages + convert_to_messages([context_message])}
+            return {"llm_input_messages": messages}
+        signature, _ = self.tool_call_signature(tool_messages[0], turn_messages)
+        llm_input = list(messages)
+        if signature != turn.get("last_tool_call"):
+            # A different tool call starts a new topic: answer from the current user message only.
+            llm_input = list(messages[history_len - 1:])
+        with self.tracer.span("enhance_tool_context_json"):
+            system_message = self.enhance_tool_context_json(tool_messages, turn.get("session"))
+        if system_message:
+            llm_input.append(system_message)
+        with self.tracer.span("extract_tool_context", tool_messages=len(tool_messages)):
+            extracted_context, document_urls = self.extract_tool_context(tool_messages, query=message_text(messages[history_len - 1].content))
+        llm_input = self.enhance_message_with_context(llm_input, extracted_context, document_urls)
+        return {"llm_input_messages": convert_to_messages(llm_input)}
+
+    def compile_agent(self, tools):
+        for middleware in self.tool_middleware:
+            tools = middleware(tools)
+        # Cache outside the limiter, so cache hits never wait for a server slot.
+        tools = wrap_tools(limit_tools(tools, self.server_limiter), self.tool_result_cache)
+        self.tools_by_name = {t.name: t for t in tools}
+        if self.fx_answer_mode == "table":
+            # End the graph right after the FX tool; finish_turn renders the table locally.
+            tools = [t.model_copy(update={"return_direct": True}) if t.name == FX_TRANSACTION_TOOL else t for t in tools]
+        self.graph_tools = tools
+        self.route_agents = {}
+        if self.intent_routing:
+            self.intent_router = IntentRouter({t.name: t.description for t in tools})
+        return self.build_graph(tools)
+
+    def build_graph(self, tools):
+        return create_react_agent(self.model_client, tools, prompt=self.SYSTEM_PROMPT, pre_model_hook=self.inject_turn_context)
+
+    def route_turn(self, session: ConversationState, user_message: str) -> Route:
+        if self.intent_router is None:
+            return Route("all", None, reason="routing off")
+        last_tool = session.last_tool_call[0] if session.last_tool_call else None
+        return self.intent_router.route(user_message, last_tool=last_tool, has_context=session.last_tool_context is not None)
+
+    def agent_for(self, route: Route):
+        # One graph per tool subset, compiled on first use; "all" (or a tool this agent lacks) gets the full graph.
+        if route.tools is None or any(name not in self.tools_by_name for name in route.tools):
+            return self.connection_info['agent']
+        key = tuple(sorted(route.tools))
+        if key not in self.route_agents:
+            self.route_agents[key] = self.build_graph([t for t in self.graph_tools if t.name in route.tools])
+        return self.route_agents[key]
+
+    async def create_mcp_session(self, revalidate: bool = True):
+        # Warm start compiles the agent from cached tool schemas without contacting the servers,
+        # then (when revalidate is set) checks the servers for schema changes in the background.
         try:
-            tools = await self.multi_mcp_client.get_tools()
-            agent = create_react_agent(self.model_client, tools, prompt=self.SYSTEM_PROMPT)
+            started = time.perf_counter()
+            with self.tracer.span("get_tools") as span:
+                servers = self.tool_cache.load(self.multi_mcp_config)
+                if servers is not None:
+                    mode = "warm"
+                    if revalidate:
+                        self.revalidation_task = asyncio.create_task(self.revalidate_tools(servers))
+                else:
+                    mode = "cold"
+                    servers = await discover_tools(self.multi_mcp_client)
+                    self.tool_cache.save(servers)
+                tools = build_tools(self.multi_mcp_client, servers)
+                if span is not None:
+                    span["mode"] = mode
+            with self.tracer.span("compile_agent"):
+                agent = self.compile_agent(tools)
+            self.startup_stats = {"mode": mode, "seconds": time.perf_counter() - started, "tools": len(tools)}
+            print(f"Agent ready ({mode} start, {len(tools)} tools) in {self.startup_stats['seconds'] * 1000:.1f} ms")
             return {
                 'agent': agent,
                 'multi_mcp_client': self.multi_mcp_client,
@@ -130,98 +486,368 @@ Be efficient and thoughtful: use tools when they add value, but respond directly
             print(f"Error creating Multi-MCP session: {e}")
             raise
 
-    async def ask_agent(self, user_message: str) -> str:
-        if not self.connection_info or 'agent' not in self.connection_info:
-            raise RuntimeError("Agent not initialized. Please initialize the agent first.")
+    async def revalidate_tools(self, cached_servers):
         try:
-            if not self.message_history:
-                self.message_history.append({"role": "system", "content": self.SYSTEM_PROMPT})
-            self.message_history.append({"role": "user", "content": user_message})
-            agent = self.connection_info['agent']
-            response = await agent.ainvoke({"messages": self.message_history})
-            full_messages = response.get("messages", []) if isinstance(response, dict) else []
-            first_tool_message = next((m for m in full_messages if isinstance(m, ToolMessage)), None)
-            new_tool_call_signature = None
-            tool_context_to_store = None
-            if first_tool_message:
-                tool_name = getattr(first_tool_message, 'name', None)
-                try:
-                    tool_content = json.loads(first_tool_message.content)
-                except Exception:
-                    tool_content = first_tool_message.content
-                if isinstance(tool_content, dict):
-                    params = tuple(sorted((k, str(v)) for k, v in tool_content.items() if k != 'result'))
-                else:
-                    params = tuple()
-                new_tool_call_signature = (tool_name, params)
-                tool_context_to_store = tool_content
-            context_reset = False
-            is_followup = False
-            if new_tool_call_signature and new_tool_call_signature != self.last_tool_call:
-                context_reset = True
-                self.last_tool_call = new_tool_call_signature
-                self.last_tool_context = tool_context_to_store
-                self.message_history = [{"role": "system", "content": self.SYSTEM_PROMPT}, {"role": "user", "content": user_message}]
-                response = await agent.ainvoke({"messages": self.message_history})
-                full_messages = response.get("messages", []) if isinstance(response, dict) else []
-            elif new_tool_call_signature:
-                self.last_tool_call = new_tool_call_signature
-                self.last_tool_context = tool_context_to_store
-            elif not new_tool_call_signature and self.last_tool_context:
-                is_followup = True
-            if is_followup:
-                enhanced_messages = [{"role": "system", "content": self.SYSTEM_PROMPT}]
-                json_str = json.dumps(self.last_tool_context, indent=2) if isinstance(self.last_tool_context, dict) else str(self.last_tool_context)
-                enhanced_messages.append({
-                    "role": "system",
-                    "content": (
-                        "You are answering a follow-up question. Here is the previous data context (in JSON):\n\n"
-                        f"{json_str}\n\nUse this data to answer the user's question."
-                    )
-                })
-                enhanced_messages.append({"role": "user", "content": user_message})
-                final_response = await agent.ainvoke({"messages": enhanced_messages})
-                response = final_response
-                self.message_history.append({"role": "assistant", "content": str(response)})
-                if isinstance(response, dict) and 'messages' in response:
-                    return response['messages'][-1].content
-                else:
-                    return str(response)
-            elif not full_messages:
-                self.message_history.append({"role": "assistant", "content": str(response)})
-                if isinstance(response, dict) and 'messages' in response:
-                    return response['messages'][-1].content
-                else:
-                    return str(response)
+            started = time.perf_counter()
+            live_servers = await discover_tools(self.multi_mcp_client)
+            changed = changed_servers(cached_servers, live_servers)
+            if changed:
+                self.tool_cache.save(live_servers)
+                self.connection_info['agent'] = self.compile_agent(build_tools(self.multi_mcp_client, live_servers))
+                print(f"Tool schemas changed on {', '.join(changed)}; agent recompiled")
+            self.startup_stats["revalidated_seconds"] = time.perf_counter() - started
+            self.startup_stats["changed_servers"] = changed
+            return changed
+        except Exception as e:
+            print(f"Error revalidating MCP tool schemas: {e}")
+            return None
+
+    def start_turn(self, session: ConversationState, user_message: str):
+        # The graph's prompt supplies SYSTEM_PROMPT, so the history holds only conversation turns.
+        session.message_history.append("user", user_message)
+        input_messages = session.message_history.messages()
+        stats = TurnStats()
+        session.last_turn_stats = stats
+        turn_state = {
+            "session": session,
+            "history_len": len(input_messages),
+            "last_tool_call": session.last_tool_call,
+            "last_tool_context": session.last_tool_context,
+            # Set once the turn is routed: whether the stored tool data goes into its prompt.
+            "followup": False,
+        }
+        callbacks = [TurnStatsCallback(stats)]
+        if self.tracer.enabled:
+            callbacks.append(TraceCallback(self.tracer))
+        config = {"callbacks": callbacks, "configurable": {"turn_state": turn_state}}
+        return {"messages": input_messages}, config
+
+    def finish_turn(self, session: ConversationState, user_message: str, response, config) -> str:
+        history = session.message_history
+        history_len = config["configurable"]["turn_state"]["history_len"]
+        full_messages = response.get("messages", []) if isinstance(response, dict) else []
+        turn_messages = full_messages[history_len:]
+        session.last_turn_messages = turn_messages
+        first_tool_message = next((m for m in turn_messages if isinstance(m, ToolMessage)), None)
+        if first_tool_message:
+            new_tool_call_signature, tool_context_to_store = self.tool_call_signature(first_tool_message, turn_messages)
+            page = tool_context_to_store.get("result") if isinstance(tool_context_to_store, dict) else None
+            page = page if isinstance(page, list) else [page] if page else []
+            if new_tool_call_signature != session.last_tool_call:
+                history.reset()
+                history.append("user", user_message)
+                session.fx_rows = None
+            if not is_transaction_data(page):
+                session.fx_rows = None
+            elif session.fx_rows is not None and self.tool_call_args(first_tool_message, turn_messages).get("cursor"):
+                # The next page of the stored query: the model sees this page, local follow-ups every row.
+                session.fx_rows.extend(page)
             else:
-                fx_tool_message = next((m for m in full_messages if isinstance(m, ToolMessage) and getattr(m, 'name', None) == 'GetForeignExchangeTransactionData'), None)
-                if fx_tool_message:
-                    system_message = self.enhance_tool_context_json(full_messages)
-                    enhanced_messages = self.message_history.copy()
-                    if system_message:
-                        enhanced_messages.append(system_message)
-                    final_response = await agent.ainvoke({"messages": enhanced_messages})
-                    response = final_response
-                    self.message_history.append({"role": "assistant", "content": str(response)})
-                    if isinstance(response, dict) and 'messages' in response:
-                        return response['messages'][-1].content
-                    else:
-                        return str(response)
-                else:
-                    extracted_context, document_urls = self.extract_tool_context(full_messages)
-                    enhanced_messages = self.enhance_message_with_context(
-                        self.message_history, extracted_context, document_urls
-                    )
-                    if extracted_context:
-                        final_response = await agent.ainvoke({"messages": enhanced_messages})
-                        response = final_response
-                    self.message_history.append({"role": "assistant", "content": str(response)})
-                    if isinstance(response, dict) and 'messages' in response:
-                        return response['messages'][-1].content
-                    else:
-                        return str(response)
+                session.fx_rows = list(page)
+            session.last_tool_call = new_tool_call_signature
+            session.last_tool_context = tool_context_to_store
+        fx_tool_message = next((m for m in turn_messages if isinstance(m, ToolMessage) and m.name == FX_TRANSACTION_TOOL), None)
+        transactions = self.merged_transaction_data(turn_messages) if fx_tool_message and self.fx_answer_mode != "llm" else None
+        if fx_tool_message:
+            self.remember_fx_query(session, fx_tool_message, turn_messages)
+        if transactions:
+            session.current_message_context_json = transactions
+            table = render_markdown_table(transactions, columns=self.fx_table_columns, max_rows=self.fx_table_max_rows)
+            last_message = full_messages[-1]
+            summary = "" if isinstance(last_message, ToolMessage) else message_text(last_message.content).strip()
+            count = len(transactions) if isinstance(transactions, list) else 1
+            # Keep the rendered table out of the history; the data itself lives in last_tool_context.
+            history.append("assistant", (summary + "\n" if summary else "") + f"[Displayed a table of {count} FX transaction(s).]")
+            return f"{summary}\n\n{table}" if summary else table
+        if full_messages:
+            answer = message_text(full_messages[-1].content)
+        else:
+            answer = str(response)
+        history.append("assistant", answer)
+        return answer
+
+    def remember_fx_query(self, session: ConversationState, fx_tool_message, turn_messages):
+        # Keep the FX tool arguments and the next page cursor so more rows can be fetched on demand.
+        args = self.tool_call_args(fx_tool_message, turn_messages)
+        try:
+            content = json.loads(message_text(fx_tool_message.content))
+        except (json.JSONDecodeError, TypeError):
+            content = {}
+        next_cursor = content.get("next_cursor") if isinstance(content, dict) else None
+        session.fx_query = {"args": {k: v for k, v in args.items() if k != "cursor"}, "next_cursor": next_cursor}
+
+    def remember_answer(self, user_message: str, response, config, seconds: float):
+        # Only turns whose answer depended on nothing but the question and this turn's tool results
+        # are cached: a new topic (the history was reset) or a direct answer opening a session.
+        if self.answer_cache is None:
+            return
+        turn = config["configurable"]["turn_state"]
+        full_messages = response.get("messages", []) if isinstance(response, dict) else []
+        turn_messages = full_messages[turn["history_len"]:]
+        if not turn_messages:
+            return
+        tool_messages = [m for m in turn_messages if isinstance(m, ToolMessage)]
+        if tool_messages:
+            if self.tool_call_signature(tool_messages[0], turn_messages)[0] == turn["last_tool_call"]:
+                return
+            contents = [self.tool_call_signature(m)[1] for m in tool_messages]
+            if any(isinstance(c, dict) and (c.get("error") or c.get("Error")) for c in contents):
+                return
+        elif turn["history_len"] > 1 or turn["last_tool_context"] is not None:
+            return
+        tool_calls = [{"name": c["name"], "args": c["args"], "id": c["id"]}
+                      for m in turn_messages if isinstance(m, AIMessage) for c in m.tool_calls]
+        last_message = full_messages[-1]
+        final_text = None if isinstance(last_message, ToolMessage) else message_text(last_message.content)
+        tool_results = [(m.name, message_text(m.content)) for m in tool_messages]
+        self.answer_cache.put(user_message, tool_calls, tool_results, final_text, seconds)
+
+    async def answer_from_cache(self, session: ConversationState, user_message: str):
+        """
+        Answer a repeated question from `answer_cache` without calling the model, or return None.
+
+        The cached turn's tool calls are run again (through the tool result cache). The cached
+        answer is used only when their results hash to the same context; otherwise the entry is
+        dropped. The session then goes through finish_turn as if the graph had produced the turn.
+        """
+        if self.answer_cache is None:
+            return None
+        started = time.perf_counter()
+        entry = self.answer_cache.lookup(user_message)
+        if entry is None:
+            return None
+        if not entry.tool_calls and (session.message_history or session.last_tool_context is not None):
+            self.answer_cache.record_miss()
+            return None
+        try:
+            tool_messages = await asyncio.gather(*(self.tools_by_name[c["name"]].ainvoke({**c, "type": "tool_call"}) for c in entry.tool_calls))
         except Exception as e:
-            return f"❌ Sorry, I encountered an error: {str(e)}"
+            print(f"Could not replay cached tool calls: {e}")
+            self.answer_cache.invalidate(entry)
+            return None
+        if tool_messages and self.tool_call_signature(tool_messages[0], [AIMessage(content="", tool_calls=entry.tool_calls)])[0] == session.last_tool_call:
+            # Same topic as the previous turn: the model would have seen the history, so ask it.
+            self.answer_cache.record_miss()
+            return None
+        if context_hash([(m.name, message_text(m.content)) for m in tool_messages]) != entry.context_hash:
+            self.answer_cache.invalidate(entry)
+            return None
+        agent_input, config = self.start_turn(session, user_message)
+        messages = list(agent_input["messages"])
+        if entry.tool_calls:
+            messages.append(AIMessage(content="", tool_calls=entry.tool_calls))
+            messages.extend(tool_messages)
+        if entry.final_text is not None:
+            messages.append(AIMessage(content=entry.final_text))
+        answer = self.finish_turn(session, user_message, {"messages": messages}, config)
+        stats = session.last_turn_stats
+        stats.answer_cache_hit = True
+        stats.tool_calls = len(tool_messages)
+        stats.tools = [c["name"] for c in entry.tool_calls]
+        self.answer_cache.record_hit(entry, time.perf_counter() - started)
+        return answer
+
+    def transaction_frame(self, session: ConversationState) -> TransactionFrame:
+        # Rebuilt only when the stored rows change (a new query, or more pages appended).
+        rows = session.fx_rows
+        cached = session.fx_frame
+        if cached is None or cached[0] is not rows or cached[1] != len(rows):
+            session.fx_frame = cached = (rows, len(rows), TransactionFrame(rows))
+        return cached[2]
+
+    def looks_like_followup(self, session: ConversationState, user_message: str, route: Route = None) -> bool:
+        # The router's follow-up route, or with routing off a follow-up cue, so that an unrelated
+        # question neither pays for a spec-translation call nor carries the stored tool data.
+        if self.intent_router is not None:
+            return (route or self.route_turn(session, user_message)).name == "followup"
+        return FOLLOWUP_CUES.search(" ".join(user_message.lower().split())) is not None
+
+    async def answer_followup_locally(self, session: ConversationState, user_message: str):
+        """
+        Answer a follow-up over the stored FX rows with a local filter/group/aggregate query, or return None.
+
+        The question is read by fx_frame.parse_followup; failing that (in "rules+llm" mode, over
+        enough rows, for a message that looks like a follow-up) the model translates it into a
+        query spec, and nothing else. Remaining pages
+        of the stored query are loaded before the spec runs, so the answer covers every row.
+        """
+        if self.fx_followup_mode == "off" or not session.fx_rows:
+            return None
+        frame = self.transaction_frame(session)
+        stats = TurnStats(local_query=True)
+        spec = parse_followup(user_message, frame)
+        if (spec is None and self.fx_followup_mode == "rules+llm" and len(frame) >= self.fx_followup_translate_min_rows
+                and self.looks_like_followup(session, user_message)):
+            prompt = [SystemMessage(content=spec_prompt(frame)), HumanMessage(content=user_message)]
+            stats.llm_calls = 1
+            stats.prompt_tokens = sum(estimate_tokens(m.content) for m in prompt)
+            try:
+                reply = await self.model_client.ainvoke(prompt)
+            except Exception as e:
+                print(f"Could not translate follow-up into a query: {e}")
+                return None
+            spec = parse_spec(message_text(reply.content), frame)
+        if spec is None or contradicts_query(spec, (session.fx_query or {}).get("args") or {}):
+            return None
+        if len(frame) < self.fx_followup_max_rows:
+            async for _ in self.iter_transaction_pages(session, page_size=MAX_PAGE_SIZE):
+                stats.tool_calls += 1
+                if len(session.fx_rows) >= self.fx_followup_max_rows:
+                    break
+            frame = self.transaction_frame(session)
+        try:
+            result = frame.execute(spec)
+        except QueryError as e:
+            print(f"Local follow-up query failed: {e}")
+            return None
+        answer = render_result(result, spec)
+        session.message_history.append("user", user_message)
+        # As in finish_turn, a table stays out of the history; its one-line description goes in.
+        session.message_history.append("assistant", answer if len(result["rows"]) <= 1 else answer.split("\n", 1)[0] + f" [Displayed a table of {len(result['rows'])} row(s).]")
+        session.last_turn_stats = stats
+        session.last_turn_messages = []
+        return answer
+
+    async def call_tool(self, name: str, args: dict):
+        tool = self.tools_by_name[name]
+        content = await tool.ainvoke(args)
+        try:
+            return json.loads(message_text(content))
+        except (json.JSONDecodeError, TypeError):
+            return content
+
+    async def iter_transaction_pages(self, session: ConversationState = None, max_pages: int = None, page_size: int = None):
+        """
+        Lazily follow the cursor of the session's last FX transaction query, one page per step.
+
+        Each page's rows are appended to the session's fx_rows, which local follow-ups query, and
+        not to last_tool_context, so the prompts of later turns do not grow with them; only its
+        next_cursor moves on. Iteration stops when the server returns no next_cursor or after
+        `max_pages` pages.
+        `page_size` overrides the page size of the original query (the cursor holds only an offset).
+        """
+        session = session or self.session
+        pages = 0
+        while session.fx_query and session.fx_query.get("next_cursor") and (max_pages is None or pages < max_pages):
+            args = {**session.fx_query["args"], "cursor": session.fx_query["next_cursor"]}
+            if page_size:
+                args["page_size"] = page_size
+            content = await self.call_tool(FX_TRANSACTION_TOOL, args)
+            if not isinstance(content, dict):
+                break
+            rows = content.get("result") or []
+            session.fx_query["next_cursor"] = content.get("next_cursor")
+            if session.fx_rows is not None:
+                session.fx_rows.extend(rows)
+            if isinstance(session.last_tool_context, dict):
+                session.last_tool_context["next_cursor"] = content.get("next_cursor")
+            pages += 1
+            yield rows
+
+    async def ask_agent(self, user_message: str, session: ConversationState = None) -> str:
+        if not self.connection_info or 'agent' not in self.connection_info:
+            raise RuntimeError("Agent not initialized. Please initialize the agent first.")
+        session = session or self.session
+        async with session.lock, self.tracer.turn(session.session_id):
+            session.touch()
+            started = time.perf_counter()
+            try:
+                with self.tracer.span("answer_cache"):
+                    answer = await self.answer_from_cache(session, user_message)
+                if answer is not None:
+                    return answer
+                with self.tracer.span("local_followup"):
+                    answer = await self.answer_followup_locally(session, user_message)
+                if answer is not None:
+                    return answer
+                with self.tracer.span("start_turn"):
+                    agent_input, config = self.start_turn(session, user_message)
+                with self.tracer.span("route") as span:
+                    route = self.route_turn(session, user_message)
+                    if span is not None:
+                        span.update(route=route.name, reason=route.reason)
+                    config["configurable"]["turn_state"]["followup"] = self.looks_like_followup(session, user_message, route)
+                session.last_turn_stats.route = route.name
+                with self.tracer.span("graph"):
+                    response = await self.agent_for(route).ainvoke(agent_input, config=config)
+                with self.tracer.span("finish_turn"):
+                    answer = self.finish_turn(session, user_message, response, config)
+                self.remember_answer(user_message, response, config, time.perf_counter() - started)
+                return answer
+            except Exception as e:
+                return f"❌ Sorry, I encountered an error: {str(e)}"
+            finally:
+                session.last_turn_stats.total_seconds = time.perf_counter() - started
+                session.touch()
+
+    async def ask_agent_stream(self, user_message: str, session: ConversationState = None):
+        """
+        Streaming variant of `ask_agent`. Yields event dicts as the graph runs:
+
+        - {"type": "tool_start", "name", "input"} / {"type": "tool_end", "name", "output"}
+        - {"type": "token", "content"} for each piece of model text
+        - {"type": "final", "content", "stats"} once the turn is complete
+        """
+        if not self.connection_info or 'agent' not in self.connection_info:
+            raise RuntimeError("Agent not initialized. Please initialize the agent first.")
+        session = session or self.session
+        async with session.lock, self.tracer.turn(session.session_id):
+            session.touch()
+            started = time.perf_counter()
+            stats = None
+            try:
+                with self.tracer.span("answer_cache"):
+                    answer = await self.answer_from_cache(session, user_message)
+                if answer is None:
+                    with self.tracer.span("local_followup"):
+                        answer = await self.answer_followup_locally(session, user_message)
+                if answer is not None:
+                    session.last_turn_stats.first_token_seconds = time.perf_counter() - started
+                    yield {"type": "token", "content": answer}
+                else:
+                    with self.tracer.span("start_turn"):
+                        agent_input, config = self.start_turn(session, user_message)
+                    with self.tracer.span("route") as span:
+                        route = self.route_turn(session, user_message)
+                        if span is not None:
+                            span.update(route=route.name, reason=route.reason)
+                        config["configurable"]["turn_state"]["followup"] = self.looks_like_followup(session, user_message, route)
+                    stats = session.last_turn_stats
+                    stats.route = route.name
+                    response = None
+                    streamed_text = ""
+                    with self.tracer.span("graph"):
+                        async for event in self.agent_for(route).astream_events(agent_input, config=config, version="v2"):
+                            kind = event["event"]
+                            if kind == "on_chat_model_stream":
+                                token = message_text(event["data"]["chunk"].content)
+                                if token:
+                                    if stats.first_token_seconds is None:
+                                        stats.first_token_seconds = time.perf_counter() - started
+                                    streamed_text += token
+                                    yield {"type": "token", "content": token}
+                            elif kind == "on_tool_start":
+                                yield {"type": "tool_start", "name": event["name"], "input": event["data"].get("input")}
+                            elif kind == "on_tool_end":
+                                yield {"type": "tool_end", "name": event["name"], "output": event["data"].get("output")}
+                            elif kind == "on_chain_end" and not event.get("parent_ids"):
+                                response = event["data"].get("output")
+                    with self.tracer.span("finish_turn"):
+                        answer = self.finish_turn(session, user_message, response, config)
+                    self.remember_answer(user_message, response, config, time.perf_counter() - started)
+                    # Anything finish_turn added after the streamed text (e.g. a locally rendered table) goes out as one more token.
+                    streamed_prefix = streamed_text if answer.startswith(streamed_text) else streamed_text.rstrip()
+                    if streamed_prefix and answer.startswith(streamed_prefix) and answer[len(streamed_prefix):].strip():
+                        yield {"type": "token", "content": answer[len(streamed_prefix):]}
+                    elif not streamed_text and stats.first_token_seconds is None:
+                        stats.first_token_seconds = time.perf_counter() - started
+            except Exception as e:
+                answer = f"❌ Sorry, I encountered an error: {str(e)}"
+            finally:
+                session.touch()
+            stats = session.last_turn_stats
+            stats.total_seconds = time.perf_counter() - started
+            yield {"type": "final", "content": answer, "stats": stats}
 
     async def main(self):
         print("🚀 Starting chat interface...")
@@ -232,13 +858,29 @@ Be efficient and thoughtful: use tools when they add value, but respond directly
                 if user_input.lower() in ['quit', 'exit', 'q']:
                     print("👋 Goodbye!")
                     break
-                res = await self.ask_agent(user_input)
                 print(f"\n{'='*50}")
                 print("🤖 AGENT RESPONSE:")
                 print(f"{'='*50}")
-                print(res)
-                print(f"\n{'='*50}")
+                streamed = False
+                async for event in self.ask_agent_stream(user_input):
+                    if event["type"] == "tool_start":
+                        print(f"🔧 {event['name']}...", flush=True)
+                    elif event["type"] == "token":
+                        streamed = True
+                        print(event["content"], end="", flush=True)
+                    elif event["type"] == "final" and not streamed:
+                        print(event["content"], end="")
+                print(f"\n\n{'='*50}")
                 print(f"Current message context: {self.current_message_context_json}")
+                stats = self.last_turn_stats
+                ttft = f"{stats.first_token_seconds * 1000:.0f} ms" if stats.first_token_seconds is not None else "n/a"
+                print(f"Turn stats: route {stats.route or 'none'}, {stats.llm_calls} LLM call(s), {stats.tool_calls} tool call(s), "
+                      f"first token {ttft}, total {stats.total_seconds * 1000:.0f} ms")
+                cache_summary = self.tool_result_cache.summary()
+                print(f"Tool result cache: {cache_summary['hits']} hit(s), {cache_summary['misses']} miss(es), {cache_summary['entries']} entries")
+                if self.answer_cache is not None:
+                    answers = self.answer_cache.summary()
+                    print(f"Answer cache: {answers['hits']}/{answers['lookups']} hit(s), {answers['saved_seconds']:.1f} s saved")
                 print(f"{'='*50}\n")
             except KeyboardInterrupt:
                 print("\n👋 Goodbye!")
@@ -0,0 +1,60 @@
+import json
+import chainlit as cl
+from cl_agent import TestAgent
+from session_manager import SessionManager
+
+# One compiled agent and MCP client for the whole Chainlit process; each chat gets its own session state.
+session_manager = None
+
+
+async def get_session_manager() -> SessionManager:
+    global session_manager
+    if session_manager is None:
+        agent = await TestAgent.create()
+        session_manager = SessionManager(agent)
+        session_manager.start()
+    return session_manager
+
+
+def _preview(value, limit=2000):
+    text = value if isinstance(value, str) else json.dumps(value, default=str, indent=2)
+    return text if len(text) <= limit else text[:limit] + "…"
+
+
+@cl.on_chat_start
+async def on_chat_start():
+    await get_session_manager()
+
+
+@cl.on_message
+async def on_message(message: cl.Message):
+    manager = await get_session_manager()
+    session = manager.get_session(cl.context.session.id)
+    reply = cl.Message(content="")
+    steps = {}
+    async for event in manager.agent.ask_agent_stream(message.content, session=session):
+        if event["type"] == "tool_start":
+            step = cl.Step(name=event["name"], type="tool")
+            step.input = _preview(event["input"])
+            await step.send()
+            steps[event["name"]] = step
+        elif event["type"] == "tool_end":
+            step = steps.pop(event["name"], None)
+            if step is not None:
+                step.output = _preview(getattr(event["output"], "content", event["output"]))
+                await step.update()
+        elif event["type"] == "token":
+            await reply.stream_token(event["content"])
+        elif event["type"] == "final":
+            if not reply.content:
+                reply.content = event["content"]
+            stats = event["stats"]
+            ttft = f"{stats.first_token_seconds * 1000:.0f} ms" if stats.first_token_seconds is not None else "n/a"
+            print(f"[{session.session_id}] first token {ttft}, total {stats.total_seconds * 1000:.0f} ms")
+    await reply.send()
+
+
+@cl.on_chat_end
+async def on_chat_end():
+    if session_manager is not None:
+        session_manager.end_session(cl.context.session.id)
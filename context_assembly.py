@@ -0,0 +1,96 @@
+import json
+from history_store import CHARS_PER_TOKEN, estimate_tokens
+from context_compression import compress_text
+
+SEPARATOR = "*" * 20
+
+
+def message_text(content) -> str:
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "".join(block.get("text", "") if isinstance(block, dict) else str(block) for block in content)
+    return str(content)
+
+
+def _tool_payload(message):
+    content = message_text(message.content)
+    try:
+        return json.loads(content)
+    except json.JSONDecodeError:
+        return content
+
+
+def collect_tool_results(tool_messages: list) -> tuple:
+    """
+    Split the tool results of a turn into retrieval hits and other results.
+
+    Hits from every SemanticSearch-style payload ({"result": {"hits": [...]}}) are pooled and
+    deduplicated by chunk_id (document_id when a hit has no chunk_id), keeping the best score,
+    then sorted by descending score. Any other payload is kept as (tool name, payload).
+    """
+    best = {}
+    others = []
+    for message in tool_messages:
+        payload = _tool_payload(message)
+        hits = payload.get("result", {}).get("hits") if isinstance(payload, dict) and isinstance(payload.get("result"), dict) else None
+        if hits is None:
+            others.append((getattr(message, "name", None) or "tool", payload))
+            continue
+        for hit in hits:
+            record = hit.get("record") or {}
+            key = record.get("chunk_id") or record.get("document_id") or record.get("raw_context")
+            if not key:
+                continue
+            score = hit.get("score")
+            score = float(score) if isinstance(score, (int, float)) else 0.0
+            if key not in best or score > best[key][0]:
+                best[key] = (score, record)
+    ranked = sorted(best.values(), key=lambda item: -item[0])
+    return ranked, others
+
+
+def document_url(record: dict) -> str:
+    url = record.get("url") or ""
+    if not url and str(record.get("document_id", "")).startswith(("http://", "https://")):
+        url = record["document_id"]
+    return url
+
+
+def assemble_context(ranked_hits: list, others: list = (), token_budget: int = 1500, query: str = None, compression_ratio: float = None) -> tuple:
+    """
+    Build the retrieval context block for the answer prompt from collect_tool_results output.
+
+    Non-retrieval tool results go first (they answer the question directly), then hits in
+    score order, each added whole while it fits in `token_budget`. When not even the first
+    block fits it is truncated, so a non-empty result never comes back empty. With a `query`
+    and `compression_ratio`, each hit is first cut down to its query-relevant sentences
+    (see context_compression). Hits with a URL are tagged [n], the 1-based position of that
+    URL in the returned list, so excerpts stay citable.
+    Returns (context text or None, document urls of the hits used).
+    """
+    blocks = []
+    urls = []
+    used = 0
+    candidates = [(f"🔧 {name}\n{json.dumps(payload, ensure_ascii=False, separators=(',', ':')) if not isinstance(payload, str) else payload}", None)
+                  for name, payload in others]
+    candidates += [(None, record) for _, record in ranked_hits if record.get("raw_context")]
+    for text, record in candidates:
+        url = document_url(record) if record is not None else ""
+        if record is not None:
+            context = record["raw_context"]
+            if query and compression_ratio:
+                context = compress_text(context, query, compression_ratio)
+            citation = f"[{urls.index(url) + 1 if url in urls else len(urls) + 1}] " if url else ""
+            text = f"📘 {citation}{record.get('title', 'Unknown Document')}\n{context}\n{SEPARATOR}"
+        cost = estimate_tokens(text)
+        if used + cost > token_budget:
+            if blocks:
+                continue
+            text = text[: max(0, token_budget - used) * CHARS_PER_TOKEN]
+            cost = estimate_tokens(text)
+        blocks.append(text)
+        used += cost
+        if url and url not in urls:
+            urls.append(url)
+    return ("\n\n".join(blocks) if blocks else None), urls
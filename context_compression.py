@@ -0,0 +1,67 @@
+import re
+import numpy as np
+from vector_index import HashingEmbedder, tokenize
+
+SENTENCE_RE = re.compile(r"(?<=[.!?])\s+(?=[\"'`(\[A-Z0-9])")
+
+# Question words and function words carry no signal about which sentence answers the question.
+STOPWORDS = frozenset(
+    "a an and are as at be by can did do does for from had has have how i in is it its me my of on or "
+    "our should tell that the their there these this those to was we were what when where which who "
+    "why will with would you your about give show please".split()
+)
+
+_embedder = HashingEmbedder()
+
+
+def content_terms(text: str) -> list:
+    return [t for t in tokenize(text) if t not in STOPWORDS]
+
+
+def split_sentences(text: str) -> list:
+    return [s.strip() for s in SENTENCE_RE.split(" ".join((text or "").split())) if s.strip()]
+
+
+def score_sentences(sentences: list, query: str) -> np.ndarray:
+    """Relevance of each sentence to `query`: embedding cosine plus the share of query terms it contains."""
+    if not sentences:
+        return np.zeros(0, dtype=np.float32)
+    query_terms = set(content_terms(query))
+    focus = " ".join(content_terms(query))
+    similarity = _embedder.embed([" ".join(content_terms(s)) for s in sentences]) @ _embedder.embed_one(focus)
+    overlap = np.array(
+        [len(query_terms & set(content_terms(s))) / len(query_terms) if query_terms else 0.0 for s in sentences],
+        dtype=np.float32,
+    )
+    return similarity + overlap
+
+
+def compress_text(text: str, query: str, ratio: float = 0.25, min_sentences: int = 1, max_sentences: int = None) -> str:
+    """
+    Keep the sentences of `text` most relevant to `query`, in their original order.
+
+    Sentences are taken by descending score until about `ratio` of the text's characters are
+    kept (never fewer than `min_sentences`). Gaps between kept sentences are marked with "…".
+    """
+    sentences = split_sentences(text)
+    if len(sentences) <= min_sentences:
+        return " ".join(sentences)
+    scores = score_sentences(sentences, query)
+    target = ratio * sum(len(s) for s in sentences)
+    kept = []
+    size = 0
+    for i in np.argsort(-scores, kind="stable"):
+        if len(kept) >= min_sentences and (size + len(sentences[i]) > target or (max_sentences and len(kept) >= max_sentences)):
+            continue
+        kept.append(int(i))
+        size += len(sentences[i])
+    kept.sort()
+    parts = []
+    for previous, i in zip([None] + kept, kept):
+        if (previous is None and i > 0) or (previous is not None and i > previous + 1):
+            parts.append("…")
+        parts.append(sentences[i])
+    if kept[-1] < len(sentences) - 1:
+        parts.append("…")
+    return " ".join(parts)
+
@@ -0,0 +1,134 @@
+import json
+from abc import ABC, abstractmethod
+from history_store import estimate_tokens
+
+
+def is_transaction_data(result) -> bool:
+    if isinstance(result, dict):
+        return "transactionId" in result
+    return isinstance(result, list) and bool(result) and isinstance(result[0], dict) and "transactionId" in result[0]
+
+
+def _format_list_item(item) -> str:
+    if isinstance(item, dict):
+        return " ".join(str(v) for v in item.values() if v not in (None, ""))
+    return str(item)
+
+
+def flatten_record(record: dict, prefix: str = "") -> dict:
+    """
+    Flatten nested DTOs into dotted columns, e.g. accountDTO.bankName.
+
+    Lists (historyDTO) become a single column whose entries are joined with "; ".
+    """
+    flat = {}
+    for key, value in record.items():
+        column = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten_record(value, prefix=f"{column}."))
+        elif isinstance(value, list):
+            flat[column] = "; ".join(_format_list_item(item) for item in value)
+        else:
+            flat[column] = value
+    return flat
+
+
+def flatten_records(records) -> tuple:
+    """Return (columns, rows) for a record or list of records, columns in first-seen order."""
+    if isinstance(records, dict):
+        records = [records]
+    flat_rows = [flatten_record(r) for r in records]
+    columns = []
+    seen = set()
+    for row in flat_rows:
+        for column in row:
+            if column not in seen:
+                seen.add(column)
+                columns.append(column)
+    rows = [[row.get(column) for column in columns] for row in flat_rows]
+    return columns, rows
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ""
+    return str(value).replace("|", "/").replace("\n", " ")
+
+
+class ContextEncoder(ABC):
+    """Turns a tool result into prompt text. Subclasses set `name` and `description`."""
+    name = "base"
+    description = ""
+
+    @abstractmethod
+    def encode(self, data) -> str:
+        ...
+
+    def tokens(self, data) -> int:
+        return estimate_tokens(self.encode(data))
+
+
+class IndentedJsonEncoder(ContextEncoder):
+    """The original encoding: pretty-printed JSON."""
+    name = "json"
+    description = "in JSON"
+
+    def encode(self, data) -> str:
+        return json.dumps(data, indent=2)
+
+
+class CompactJsonEncoder(ContextEncoder):
+    name = "compact_json"
+    description = "in compact JSON"
+
+    def encode(self, data) -> str:
+        return json.dumps(data, separators=(",", ":"))
+
+
+class ColumnarEncoder(ContextEncoder):
+    """Flattened records as JSON with the column names listed once."""
+    name = "columnar"
+    description = "in columnar JSON: `columns` names the fields and each entry of `rows` holds one transaction's values in that order"
+
+    def encode(self, data) -> str:
+        if not is_transaction_data(data):
+            return CompactJsonEncoder().encode(data)
+        columns, rows = flatten_records(data)
+        return json.dumps({"columns": columns, "rows": rows}, separators=(",", ":"))
+
+
+class TableEncoder(ContextEncoder):
+    """
+    Flattened records as a pipe-delimited table with one shared header row.
+
+    Columns that are empty in every row are dropped, and columns holding the same value in
+    every row are hoisted into a single `shared:` line above the table.
+    """
+    name = "table"
+    description = "as a pipe-delimited table: `shared:` lists values common to every transaction, then a header row and one row per transaction"
+
+    def encode(self, data) -> str:
+        if not is_transaction_data(data):
+            return CompactJsonEncoder().encode(data)
+        columns, rows = flatten_records(data)
+        keep = [i for i in range(len(columns)) if any(row[i] not in (None, "") for row in rows)]
+        shared = []
+        if len(rows) > 1:
+            shared = [i for i in keep if all(row[i] == rows[0][i] for row in rows)]
+            keep = [i for i in keep if i not in shared]
+        lines = []
+        if shared:
+            lines.append("shared: " + "; ".join(f"{columns[i]}={_cell(rows[0][i])}" for i in shared))
+        lines.append("|".join(columns[i] for i in keep))
+        lines.extend("|".join(_cell(row[i]) for i in keep) for row in rows)
+        return "\n".join(lines)
+
+
+ENCODERS = {encoder.name: encoder for encoder in (IndentedJsonEncoder, CompactJsonEncoder, ColumnarEncoder, TableEncoder)}
+
+
+def get_encoder(name: str) -> ContextEncoder:
+    try:
+        return ENCODERS[name]()
+    except KeyError:
+        raise ValueError(f"Unknown context encoding '{name}', expected one of {sorted(ENCODERS)}") from None
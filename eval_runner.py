@@ -0,0 +1,274 @@
+"""
+Concurrent, cached, optionally offline evaluation runs of TestAgent over a list of goldens.
+
+Each golden gets its own ConversationState on one shared agent, so goldens run concurrently
+(up to `concurrency`) without seeing each other's history or tool context. The tool calls of a
+golden are read from the ToolMessages of its turn. Outputs are cached per golden and code
+revision in an EvalCache, so an unchanged case is not run again.
+
+A Cassette records model replies and tool results ("record") and plays them back ("replay")
+with no model or MCP server reachable. It keeps the tool schemas too, so a replayed agent starts
+warm from them.
+"""
+import json
+import time
+import asyncio
+import hashlib
+import functools
+from pathlib import Path
+from dataclasses import dataclass, asdict, field
+from typing import Any
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, ToolMessage, messages_from_dict, message_to_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.tools import BaseTool, StructuredTool
+from tool_result_cache import normalize_arguments
+from tool_schema_cache import ToolSchemaCache
+
+ROOT = Path(__file__).resolve().parent
+CASSETTE_MODES = ("record", "replay")
+
+
+class ReplayMiss(KeyError):
+    """A model call or tool call with no recording in the cassette."""
+
+
+def code_revision(root: Path = ROOT, exclude: tuple = ("deep_eval.py",)) -> str:
+    """Hash of the top-level Python sources, so uncommitted edits count as a new revision."""
+    digest = hashlib.sha256()
+    for path in sorted(Path(root).glob("*.py")):
+        if path.name in exclude:
+            continue
+        digest.update(path.name.encode("utf-8") + b"\0" + path.read_bytes() + b"\0")
+    return digest.hexdigest()[:16]
+
+
+def _digest(value) -> str:
+    return hashlib.sha256(json.dumps(value, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+def _field(golden, name: str, default=None):
+    return golden.get(name, default) if isinstance(golden, dict) else getattr(golden, name, default)
+
+
+def _tool_names(tools) -> list:
+    # deepeval ToolCall objects, or plain names.
+    return [t if isinstance(t, str) else getattr(t, "name", str(t)) for t in tools or []]
+
+
+class Cassette:
+    """Recorded model replies and tool results under `path` (a directory), keyed by their inputs."""
+
+    def __init__(self, path, mode: str = "replay"):
+        if mode not in CASSETTE_MODES:
+            raise ValueError(f"Unknown cassette mode: {mode}")
+        self.path = Path(path)
+        self.mode = mode
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.replies = self._load("model_replies.json")
+        self.tool_results = self._load("tool_results.json")
+        self.misses = 0
+
+    def _load(self, name: str) -> dict:
+        try:
+            with open(self.path / name, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return {}
+
+    def _save(self, name: str, data: dict):
+        tmp_path = self.path / (name + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, default=str)
+            tmp_path.replace(self.path / name)
+        except OSError as e:
+            print(f"Could not write cassette {self.path / name}: {e}")
+
+    def save(self):
+        if self.mode == "record":
+            self._save("model_replies.json", self.replies)
+            self._save("tool_results.json", self.tool_results)
+
+    @property
+    def tool_cache(self) -> ToolSchemaCache:
+        return ToolSchemaCache(self.path / "tools.json")
+
+    def model_key(self, messages, tool_names) -> str:
+        return _digest([[m.type, m.content, getattr(m, "tool_calls", None) or []] for m in messages] + [sorted(tool_names)])
+
+    def tool_key(self, name: str, arguments: dict) -> str:
+        return f"{name}:{normalize_arguments(arguments)}"
+
+    def lookup(self, table: dict, key: str):
+        if key not in table:
+            self.misses += 1
+            raise ReplayMiss(f"No recording for {key[:80]} in {self.path}")
+        return table[key]
+
+    def attach(self, agent):
+        """Route `agent`'s model and MCP tool calls through this cassette; call before create_mcp_session."""
+        agent.tool_cache = self.tool_cache
+        agent.model_client = RecordedChatModel(inner=agent.model_client if self.mode == "record" else None, cassette=self)
+        agent.tool_middleware.append(self.wrap_tools)
+
+    def wrap_tools(self, tools: list) -> list:
+        return [self.wrap_tool(tool) for tool in tools]
+
+    def wrap_tool(self, tool: BaseTool) -> BaseTool:
+        if not isinstance(tool, StructuredTool) or tool.coroutine is None:
+            return tool
+        call_tool = tool.coroutine
+
+        @functools.wraps(call_tool)
+        async def recorded_call_tool(*args, **arguments):
+            key = self.tool_key(tool.name, {k: v for k, v in arguments.items() if k != "runtime"})
+            if self.mode == "replay":
+                content, artifact = self.lookup(self.tool_results, key)
+                return content, artifact
+            content, artifact = await call_tool(*args, **arguments)
+            self.tool_results[key] = [content, artifact]
+            return content, artifact
+
+        return tool.model_copy(update={"coroutine": recorded_call_tool})
+
+
+class RecordedChatModel(BaseChatModel):
+    """Chat model that records `inner`'s replies into a cassette, or replays them when `inner` is None."""
+    cassette: Any
+    inner: Any = None
+    bound: Any = None
+    tool_names: tuple = ()
+
+    @property
+    def _llm_type(self) -> str:
+        return "recorded"
+
+    def bind_tools(self, tools, **kwargs):
+        names = tuple(t["name"] if isinstance(t, dict) else t.name for t in tools)
+        bound = self.inner.bind_tools(tools, **kwargs) if self.inner is not None else None
+        return self.model_copy(update={"bound": bound, "tool_names": names})
+
+    def _reply(self, key: str) -> ChatResult:
+        message = messages_from_dict([self.cassette.lookup(self.cassette.replies, key)])[0]
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _record(self, key: str, message) -> ChatResult:
+        message = AIMessage(content=message.content, tool_calls=getattr(message, "tool_calls", None) or [])
+        self.cassette.replies[key] = message_to_dict(message)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self.cassette.model_key(messages, self.tool_names)
+        if self.inner is None:
+            return self._reply(key)
+        # No callbacks on the inner call, so the turn counts one model call, not two.
+        return self._record(key, (self.bound or self.inner).invoke(messages, config={"callbacks": []}))
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        key = self.cassette.model_key(messages, self.tool_names)
+        if self.inner is None:
+            return self._reply(key)
+        return self._record(key, await (self.bound or self.inner).ainvoke(messages, config={"callbacks": []}))
+
+
+class EvalCache:
+    """Agent outputs per (golden, revision), one JSON file each under `path`."""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+
+    def get(self, key: str):
+        try:
+            with open(self.path / f"{key}.json", "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+
+    def put(self, key: str, value: dict):
+        tmp_path = self.path / f"{key}.json.tmp"
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(value, f, default=str)
+            tmp_path.replace(self.path / f"{key}.json")
+        except OSError as e:
+            print(f"Could not write eval cache entry {key}: {e}")
+
+
+@dataclass
+class EvalResult:
+    input: str
+    actual_output: str
+    tools_called: list
+    expected_output: str = None
+    expected_tools: list = field(default_factory=list)
+    seconds: float = 0.0
+    llm_calls: int = 0
+    cached: bool = False
+    error: str = None
+
+
+def tool_calls_from(turn_messages: list) -> list:
+    """[{"name", "input_parameters", "output"}] for each ToolMessage of a turn, with the arguments the model sent."""
+    arguments = {call["id"]: call["args"] for m in turn_messages if isinstance(m, AIMessage) for call in m.tool_calls}
+    return [
+        {"name": m.name, "input_parameters": arguments.get(m.tool_call_id, {}), "output": m.content}
+        for m in turn_messages if isinstance(m, ToolMessage)
+    ]
+
+
+async def run_golden(agent, golden, session_id: str) -> EvalResult:
+    session = agent.new_session(session_id)
+    question = _field(golden, "input")
+    started = time.perf_counter()
+    output = await agent.ask_agent(question, session=session)
+    return EvalResult(
+        input=question,
+        actual_output=output,
+        tools_called=tool_calls_from(session.last_turn_messages),
+        expected_output=_field(golden, "expected_output"),
+        expected_tools=_tool_names(_field(golden, "expected_tools")),
+        seconds=time.perf_counter() - started,
+        llm_calls=session.last_turn_stats.llm_calls,
+        # ask_agent reports failures as its answer rather than raising.
+        error=output if output.startswith("❌") else None,
+    )
+
+
+async def run_goldens(agent, goldens: list, concurrency: int = 8, cache: EvalCache = None, revision: str = None) -> list:
+    """
+    Run every golden on `agent`, at most `concurrency` at a time, and return EvalResults in golden order.
+
+    With a `cache`, a golden whose input ran before at the same `revision` (default: code_revision())
+    is served from it; failed runs are not cached. The agent's answer cache is turned off so each
+    golden exercises the model and tools.
+    """
+    revision = revision or code_revision()
+    agent.answer_cache = None
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def evaluate_one(i, golden):
+        key = _digest([revision, _field(golden, "input")])
+        cached = cache.get(key) if cache else None
+        if cached is not None:
+            return EvalResult(**{**cached, "expected_output": _field(golden, "expected_output"),
+                                 "expected_tools": _tool_names(_field(golden, "expected_tools")), "cached": True})
+        async with semaphore:
+            result = await run_golden(agent, golden, f"golden-{i}")
+        if cache and result.error is None:
+            cache.put(key, asdict(result))
+        return result
+
+    return await asyncio.gather(*(evaluate_one(i, golden) for i, golden in enumerate(goldens)))
+
+
+def summarize(results: list) -> dict:
+    ran = [r for r in results if not r.cached]
+    return {
+        "goldens": len(results),
+        "cached": len(results) - len(ran),
+        "errors": sum(r.error is not None for r in results),
+        "run_seconds": round(sum(r.seconds for r in ran), 3),
+        "llm_calls": sum(r.llm_calls for r in ran),
+    }
@@ -0,0 +1,493 @@
+"""
+Local filter / group / aggregate queries over FX transaction rows, for follow-up questions.
+
+A query spec is a small JSON object (what the model is asked for when the rules in
+`parse_followup` cannot read a question):
+
+    {"filters": [{"column": "currency", "op": "eq", "value": "CAD"}],
+     "group_by": ["channel"],
+     "aggregates": [{"op": "sum", "column": "buyCurrencyAmount"}, {"op": "count"}],
+     "sort": {"column": "sum_buyCurrencyAmount", "descending": true},
+     "limit": 10,
+     "select": ["transactionId", "buyCurrencyAmount"]}
+
+Without aggregates the spec lists matching rows. The virtual column "currency" matches either
+side of a trade and "currencyPair" is "BUY/SELL", as in the GetForeignExchangeTransactionData
+filters.
+"""
+import re
+import json
+from datetime import date
+
+import numpy as np
+
+from context_encoders import flatten_records
+from context_compression import STOPWORDS
+from fx_query import VALUE_DATE_FORMAT, parse_filter_date, parse_value_date
+from vector_index import tokenize
+
+FILTER_OPS = ("eq", "ne", "in", "not_in", "gt", "gte", "lt", "lte", "between", "contains")
+AGGREGATE_OPS = ("count", "sum", "mean", "min", "max", "count_distinct")
+DEFAULT_SELECT = ["transactionId", "valueDate", "buyCurrency", "buyCurrencyAmount", "sellCurrency", "sellCurrencyAmount",
+                  "productType", "channel", "settlementStatus"]
+# Categorical columns with more distinct values than this are not scanned for filter values.
+MAX_CATEGORY_VALUES = 200
+MAX_LISTED_ROWS = 50
+# Amount columns and the currency they are in; sums and the like are only taken within one currency.
+AMOUNT_CURRENCIES = {"buyCurrencyAmount": "buyCurrency", "sellCurrencyAmount": "sellCurrency"}
+_MISSING = {"", "no contract", "n/a", "none", "null"}
+_IDENTIFIER_SUFFIXES = ("id", "no", "number", "code")
+
+
+class QueryError(ValueError):
+    pass
+
+
+def column_words(column: str) -> set:
+    """accountDTO.bankName -> {"account", "dto", "bank", "name"}."""
+    return {w.lower() for w in re.findall(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|\d+", column)}
+
+
+def _is_identifier(column: str) -> bool:
+    return column.split(".")[-1].lower().endswith(_IDENTIFIER_SUFFIXES)
+
+
+def _parse_number(value):
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    text = str(value).replace(",", "").strip()
+    if text.lower() in _MISSING:
+        return np.nan
+    return float(text)
+
+
+class TransactionFrame:
+    """
+    Column-oriented view of flattened transaction records.
+
+    Amount-like columns become float64 arrays ("No Contract" is NaN), dd-Mon-yyyy columns
+    datetime64[D] arrays, and everything else an object array plus a lower-cased copy for
+    case-insensitive comparisons. Filters are vectorized boolean masks; grouping uses
+    np.unique codes and bincount.
+    """
+
+    def __init__(self, records: list):
+        columns, rows = flatten_records(records or [])
+        self.size = len(rows)
+        self.columns = {}
+        self.kinds = {}
+        self.lower = {}
+        self._categories = {}
+        for i, column in enumerate(columns):
+            self._add_column(column, [row[i] for row in rows])
+        if "buyCurrency" in self.columns and "sellCurrency" in self.columns:
+            pairs = [f"{b}/{s}" for b, s in zip(self.columns["buyCurrency"], self.columns["sellCurrency"])]
+            self._add_text_column("currencyPair", pairs)
+
+    def _add_column(self, column: str, values: list):
+        present = [v for v in values if v is not None and str(v).strip().lower() not in _MISSING]
+        if present and not _is_identifier(column):
+            try:
+                self.columns[column] = np.array([np.nan if v is None else _parse_number(v) for v in values], dtype=np.float64)
+                self.kinds[column] = "number"
+                return
+            except ValueError:
+                pass
+            try:
+                days = [parse_value_date(v) if v not in (None, "") else None for v in values]
+                self.columns[column] = np.array([np.datetime64(d, "D") if d else np.datetime64("NaT") for d in days])
+                self.kinds[column] = "date"
+                return
+            except (ValueError, TypeError):
+                pass
+        self._add_text_column(column, values)
+
+    def _add_text_column(self, column: str, values: list):
+        array = np.array(["" if v is None else str(v) for v in values], dtype=object)
+        self.columns[column] = array
+        self.lower[column] = np.array([v.lower() for v in array], dtype=object)
+        self.kinds[column] = "text"
+
+    def __len__(self):
+        return self.size
+
+    def resolve(self, name: str) -> str:
+        """Column for `name`: exact, case-insensitive, or the last dotted part (e.g. "bankName")."""
+        if name == "currency" or name in self.columns:
+            return name
+        lowered = str(name).lower()
+        for column in self.columns:
+            if column.lower() == lowered or column.split(".")[-1].lower() == lowered:
+                return column
+        raise QueryError(f"Unknown column '{name}'; available: {', '.join(self.columns)}")
+
+    def categories(self, column: str) -> list:
+        if self.kinds.get(column) != "text":
+            return []
+        if column not in self._categories:
+            values = np.unique(self.columns[column])
+            self._categories[column] = [] if len(values) > MAX_CATEGORY_VALUES else [v for v in values if v]
+        return self._categories[column]
+
+    def _coerce(self, column: str, value):
+        kind = self.kinds[column]
+        if kind == "number":
+            return _parse_number(value)
+        if kind == "date":
+            return np.datetime64(value if isinstance(value, date) else parse_filter_date(str(value)), "D")
+        return str(value).lower()
+
+    def _compare(self, column: str, op: str, value) -> np.ndarray:
+        if column == "currency":
+            return self._compare("buyCurrency", op, value) | self._compare("sellCurrency", op, value)
+        data = self.lower[column] if self.kinds[column] == "text" else self.columns[column]
+        if op in ("in", "not_in"):
+            values = value if isinstance(value, (list, tuple)) else [value]
+            mask = np.isin(data, [self._coerce(column, v) for v in values])
+            return ~mask if op == "not_in" else mask
+        if op == "between":
+            low, high = value
+            return (data >= self._coerce(column, low)) & (data <= self._coerce(column, high))
+        if op == "contains":
+            needle = str(value).lower()
+            return np.array([needle in str(v).lower() for v in data], dtype=bool)
+        target = self._coerce(column, value)
+        comparisons = {"eq": np.equal, "ne": np.not_equal, "gt": np.greater, "gte": np.greater_equal, "lt": np.less, "lte": np.less_equal}
+        if op not in comparisons:
+            raise QueryError(f"Unknown filter op '{op}'; expected one of {', '.join(FILTER_OPS)}")
+        return comparisons[op](data, target)
+
+    def mask(self, filters: list) -> np.ndarray:
+        mask = np.ones(self.size, dtype=bool)
+        for f in filters or []:
+            column = self.resolve(f["column"])
+            op = f.get("op", "eq")
+            if column == "currency" and op in ("ne", "not_in"):
+                positive = {"ne": "eq", "not_in": "in"}[op]
+                mask &= ~self._compare(column, positive, f.get("value"))
+            else:
+                mask &= self._compare(column, op, f.get("value"))
+        return mask
+
+    def _display(self, column: str, values: np.ndarray) -> list:
+        kind = self.kinds[column]
+        if kind == "number":
+            return [None if np.isnan(v) else round(float(v), 2) for v in values]
+        if kind == "date":
+            return [None if np.isnat(v) else v.astype(object).strftime(VALUE_DATE_FORMAT) for v in values]
+        return list(values)
+
+    def _aggregate(self, op: str, column: str, rows: np.ndarray, codes: np.ndarray, groups: int) -> list:
+        if op == "count":
+            return np.bincount(codes, minlength=groups).tolist()
+        values = self.columns[column][rows]
+        if op == "count_distinct":
+            return [len(set(values[codes == g].tolist())) for g in range(groups)]
+        if self.kinds[column] != "number":
+            raise QueryError(f"Cannot {op} non-numeric column '{column}'")
+        present = ~np.isnan(values)
+        counts = np.bincount(codes[present], minlength=groups)
+        if op in ("sum", "mean"):
+            sums = np.bincount(codes[present], weights=values[present], minlength=groups)
+            result = sums if op == "sum" else np.divide(sums, counts, out=np.full(groups, np.nan), where=counts > 0)
+        else:
+            result = np.full(groups, np.inf if op == "min" else -np.inf)
+            (np.minimum if op == "min" else np.maximum).at(result, codes[present], values[present])
+            result[counts == 0] = np.nan
+        return [None if np.isnan(v) else round(float(v), 2) for v in result]
+
+    def _currency_splits(self, aggregates: list, group_by: list, rows: np.ndarray) -> list:
+        # Currency columns to add to group_by so no amount aggregate mixes currencies.
+        splits = []
+        for aggregate in aggregates:
+            column = self.resolve(aggregate["column"]) if aggregate.get("column") else None
+            currency = AMOUNT_CURRENCIES.get(column)
+            if (aggregate.get("op") in ("sum", "mean", "min", "max") and currency in self.columns
+                    and currency not in group_by + splits and len(np.unique(self.columns[currency][rows])) > 1):
+                splits.append(currency)
+        return splits
+
+    def execute(self, spec: dict) -> dict:
+        """
+        Run a query spec. Returns {"columns", "rows", "matched", "total", "split_by"}; an amount
+        aggregate over rows in more than one currency is grouped by that currency too ("split_by").
+        """
+        rows = np.flatnonzero(self.mask(spec.get("filters")))
+        aggregates = spec.get("aggregates") or []
+        group_by = [self.resolve(c) for c in spec.get("group_by") or []]
+        split_by = self._currency_splits(aggregates, group_by, rows)
+        group_by += split_by
+        if aggregates or group_by:
+            aggregates = aggregates or [{"op": "count"}]
+            if group_by:
+                keys = [np.unique(self.columns[c][rows].astype(str) if self.kinds[c] != "number" else self.columns[c][rows], return_inverse=True)
+                        for c in group_by]
+                codes = np.ravel_multi_index([inverse for _, inverse in keys], [len(uniques) for uniques, _ in keys]) if rows.size else np.zeros(0, dtype=np.int64)
+                group_ids, codes = np.unique(codes, return_inverse=True)
+                key_columns = [list(uniques[i]) for (uniques, _), i in zip(keys, np.unravel_index(group_ids, [len(u) for u, _ in keys]))] if rows.size else [[] for _ in group_by]
+            else:
+                group_ids, codes, key_columns = np.zeros(1), np.zeros(rows.size, dtype=np.int64), []
+            columns = list(group_by)
+            values = [list(k) for k in key_columns]
+            for aggregate in aggregates:
+                op = aggregate.get("op", "count")
+                if op not in AGGREGATE_OPS:
+                    raise QueryError(f"Unknown aggregate '{op}'; expected one of {', '.join(AGGREGATE_OPS)}")
+                column = self.resolve(aggregate["column"]) if aggregate.get("column") else None
+                if column is None and op != "count":
+                    raise QueryError(f"Aggregate '{op}' needs a column")
+                columns.append(aggregate.get("alias") or (f"{op}_{column}" if column else "count"))
+                values.append(self._aggregate(op, column, rows, codes, len(group_ids)))
+            table = [list(row) for row in zip(*values)] if values else []
+            sort = spec.get("sort")
+            if sort:
+                name = sort["column"] if sort["column"] in columns else self.resolve(sort["column"])
+                if name in columns:
+                    index = columns.index(name)
+                    present = [r for r in table if r[index] is not None]
+                    table = sorted(present, key=lambda r: r[index], reverse=bool(sort.get("descending"))) + [r for r in table if r[index] is None]
+        else:
+            columns = [self.resolve(c) for c in spec.get("select") or [c for c in DEFAULT_SELECT if c in self.columns]]
+            listed = rows
+            sort = spec.get("sort")
+            if sort:
+                # Sorted and cut on row indices, so only the listed rows are formatted.
+                column = self.resolve(sort["column"])
+                keys = self.columns[column][rows]
+                if sort.get("descending"):
+                    # Negated numbers keep NaN last; other kinds are reversed.
+                    order = np.argsort(-keys, kind="stable") if self.kinds[column] == "number" else np.argsort(keys, kind="stable")[::-1]
+                else:
+                    order = np.argsort(keys, kind="stable")
+                listed = rows[order]
+            if spec.get("limit"):
+                listed = listed[:int(spec["limit"])]
+            table = [list(row) for row in zip(*(self._display(c, self.columns[c][listed]) for c in columns))] if listed.size else []
+        if spec.get("limit"):
+            table = table[:int(spec["limit"])]
+        return {"columns": columns, "rows": table, "matched": int(rows.size), "total": self.size, "split_by": split_by}
+
+
+def describe(spec: dict) -> str:
+    parts = []
+    for f in spec.get("filters") or []:
+        value = f.get("value")
+        value = ", ".join(map(str, value)) if isinstance(value, (list, tuple)) else value
+        parts.append(f"{f['column']} {f.get('op', 'eq')} {value}")
+    text = "where " + " and ".join(parts) if parts else "all rows"
+    if spec.get("group_by"):
+        text += f", grouped by {', '.join(spec['group_by'])}"
+    return text
+
+
+def render_result(result: dict, spec: dict) -> str:
+    """Markdown answer for an executed spec: one sentence for a single value, else a table."""
+    header = f"Computed locally over {result['total']} stored transaction(s), {describe(spec)}: {result['matched']} matched."
+    if result.get("split_by"):
+        header += f" The amounts are in several currencies, so they are shown per {', '.join(result['split_by'])}."
+    columns, rows = result["columns"], result["rows"]
+    if len(rows) == 1 and len(columns) == 1:
+        value = rows[0][0]
+        value = f"{value:,.2f}" if isinstance(value, float) else value
+        return f"{header}\n\n**{columns[0]}: {value}**"
+    if not rows:
+        return f"{header}\n\n_No transactions found._"
+    shown = rows[:MAX_LISTED_ROWS]
+    lines = ["| " + " | ".join(columns) + " |", "|" + "|".join("---" for _ in columns) + "|"]
+    lines += ["| " + " | ".join("" if v is None else (f"{v:,.2f}" if isinstance(v, float) else str(v)).replace("|", "\\|") for v in row) + " |" for row in shown]
+    if len(shown) < len(rows):
+        lines.append(f"\n_{len(rows) - len(shown)} more row(s) not shown._")
+    return header + "\n\n" + "\n".join(lines)
+
+
+INTENT_AGGREGATES = {
+    "count": ("how many", "count", "number of"),
+    "sum": ("total", "sum"),
+    "mean": ("average", "mean", "avg"),
+    "max": ("maximum", "max"),
+    "min": ("minimum", "min"),
+    "count_distinct": ("distinct", "unique", "different"),
+}
+TOP_WORDS = {"largest": True, "biggest": True, "highest": True, "top": True, "smallest": False, "lowest": False, "bottom": False}
+# Words a follow-up may use without referring to anything the rules have not understood.
+QUERY_WORDS = frozenset(
+    "which ones one those these them rows records data transaction transactions trade trades deal deals were was "
+    "booked through via list only just all each per by grouped group broken down breakdown amount amounts value "
+    "values many much count number total sum average mean avg maximum max minimum min distinct unique different "
+    "than more less over under above below greater after before since between year currency currencies "
+    "largest biggest highest top smallest lowest bottom bought sold buy sell buying selling made happened settled "
+    "show me list got get any".split()
+)
+_COMPARE_RE = re.compile(r"\b(over|above|more than|greater than|at least|under|below|less than|at most)\s+([\d,]+(?:\.\d+)?)\s*(k|m)?\b")
+_DATE_RE = re.compile(r"\b(after|since|before|from|until)\s+(\d{4}[-/]\d{1,2}[-/]\d{1,2}|\d{1,2}-[A-Za-z]{3}-\d{4})")
+_YEAR_RE = re.compile(r"\bin\s+((?:19|20)\d{2})\b")
+_TOP_RE = re.compile(r"\b(?:(largest|biggest|highest|top|smallest|lowest|bottom)\s+(\d+)|(\d+)\s+(largest|biggest|highest|smallest|lowest))\b")
+
+
+def _phrase_in(phrase: str, text: str) -> bool:
+    return re.search(r"(?<![\w/])" + re.escape(phrase.lower()) + r"(?![\w/])", text) is not None
+
+
+def _best_column(frame: TransactionFrame, words: set, kind: str, exclude: set = frozenset()) -> str:
+    best, best_score = None, 0
+    for column, column_kind in frame.kinds.items():
+        if column_kind != kind or column in exclude:
+            continue
+        score = len(column_words(column) & words)
+        if score > best_score:
+            best, best_score = column, score
+    return best
+
+
+def parse_followup(question: str, frame: TransactionFrame):
+    """
+    Read a follow-up question as a query spec with keyword rules, or return None when the
+    question contains words the rules do not account for (so it is not answered wrongly).
+    """
+    text = " ".join(question.lower().split())
+    # Singular forms too, so "banks" finds accountDTO.bankName.
+    words = set(tokenize(text))
+    words |= {w[:-1] for w in words if w.endswith("s") and len(w) > 3}
+    explained = set(QUERY_WORDS) | STOPWORDS
+    spec = {"filters": [], "group_by": [], "aggregates": []}
+    side = "buyCurrency" if words & {"buy", "bought", "buying"} else "sellCurrency" if words & {"sell", "sold", "selling"} else "currency"
+
+    # Values of categorical columns named in the question become equality filters.
+    for column in list(frame.columns):
+        if column in ("buyCurrency", "sellCurrency", "currencyPair") or _is_identifier(column):
+            continue
+        for value in frame.categories(column):
+            if len(value) > 1 and value.lower() not in STOPWORDS and _phrase_in(value, text):
+                spec["filters"].append({"column": column, "op": "eq", "value": value})
+                explained |= set(tokenize(value))
+    pairs = [p for p in frame.categories("currencyPair") if _phrase_in(p, text)]
+    if pairs:
+        spec["filters"].append({"column": "currencyPair", "op": "in" if len(pairs) > 1 else "eq", "value": pairs if len(pairs) > 1 else pairs[0]})
+        explained |= {t for p in pairs for t in tokenize(p)}
+    currencies = set(frame.categories("buyCurrency")) | set(frame.categories("sellCurrency"))
+    named = [c for c in sorted(currencies) if c.lower() in words and not any(c in p for p in pairs)]
+    if named:
+        spec["filters"].append({"column": side, "op": "in" if len(named) > 1 else "eq", "value": named if len(named) > 1 else named[0]})
+        explained |= {c.lower() for c in named}
+
+    # The numeric column the question names ("sell amount"), else the buy amount.
+    measure = _best_column(frame, words, "number")
+    if measure:
+        explained |= column_words(measure)
+    elif "buyCurrencyAmount" in frame.columns:
+        measure = "buyCurrencyAmount"
+
+    for match in _COMPARE_RE.finditer(text):
+        if not measure:
+            return None
+        op = "gt" if match.group(1) in ("over", "above", "more than", "greater than") else "gte" if match.group(1) == "at least" else "lte" if match.group(1) == "at most" else "lt"
+        amount = float(match.group(2).replace(",", "")) * {"k": 1e3, "m": 1e6}.get(match.group(3), 1)
+        spec["filters"].append({"column": measure, "op": op, "value": amount})
+        explained |= set(tokenize(match.group(0)))
+    for match in _DATE_RE.finditer(text):
+        op = "gte" if match.group(1) in ("after", "since", "from") else "lte"
+        spec["filters"].append({"column": "valueDate", "op": op, "value": match.group(2)})
+        explained |= set(tokenize(match.group(0)))
+    for match in _YEAR_RE.finditer(text):
+        spec["filters"].append({"column": "valueDate", "op": "between", "value": [f"{match.group(1)}-01-01", f"{match.group(1)}-12-31"]})
+        explained.add(match.group(1))
+
+    # "by channel", "per bank", "for each product type"
+    for match in re.finditer(r"\b(?:by|per|for each|grouped by|broken down by)\s+([a-z ]+?)(?=$|[?,.]| and | with | in | where )", text):
+        group_words = set(tokenize(match.group(1))) - STOPWORDS
+        column = "currencyPair" if {"pair", "pairs"} & group_words else _best_column(frame, group_words, "text", exclude={"currency"})
+        if column is None:
+            return None
+        spec["group_by"].append(column)
+        explained |= group_words
+
+    top = _TOP_RE.search(text)
+    for op, phrases in INTENT_AGGREGATES.items():
+        if any(_phrase_in(p, text) for p in phrases):
+            if op == "count":
+                spec["aggregates"].append({"op": "count"})
+            elif op == "count_distinct":
+                column = _best_column(frame, words - {"distinct", "unique", "different"}, "text") or side
+                spec["aggregates"].append({"op": op, "column": "buyCurrency" if column == "currency" else column})
+                explained |= column_words(column)
+            elif measure:
+                spec["aggregates"].append({"op": op, "column": measure})
+    if not spec["aggregates"] and (top or words & set(TOP_WORDS)) and measure:
+        word = (top.group(1) or top.group(4)) if top else next(w for w in TOP_WORDS if w in words)
+        spec["sort"] = {"column": measure, "descending": TOP_WORDS[word]}
+        spec["limit"] = int(top.group(2) or top.group(3)) if top else 1
+
+    explained |= {t for t in words if t.isdigit()}
+    unexplained = {w for w in words - explained if not (w.endswith("s") and w[:-1] in explained) and w + "s" not in words}
+    if unexplained or not (spec["filters"] or spec["aggregates"] or spec["group_by"] or spec.get("sort")):
+        return None
+    return {k: v for k, v in spec.items() if v}
+
+
+SPEC_PROMPT = """Translate the user's follow-up question about a table of FX transactions into a JSON query spec.
+
+Columns (name: type, example values):
+{columns}
+
+Spec format:
+{{"filters": [{{"column": str, "op": one of {filter_ops}, "value": ...}}],
+ "group_by": [column, ...],
+ "aggregates": [{{"op": one of {aggregate_ops}, "column": numeric column (omit for count)}}],
+ "sort": {{"column": str, "descending": bool}}, "limit": int, "select": [column, ...]}}
+All keys are optional. "currency" matches either side of a trade. Dates are YYYY-MM-DD.
+Reply with the JSON object only. If the question cannot be answered by filtering, grouping or
+aggregating these rows, reply {{"unsupported": true}}."""
+
+
+def spec_prompt(frame: TransactionFrame) -> str:
+    lines = []
+    for column, kind in frame.kinds.items():
+        examples = frame.categories(column)[:6] if kind == "text" else []
+        lines.append(f"- {column}: {kind}" + (f" ({', '.join(examples)})" if examples else ""))
+    lines.append("- currency: text (either buyCurrency or sellCurrency)")
+    return SPEC_PROMPT.format(columns="\n".join(lines), filter_ops=", ".join(FILTER_OPS), aggregate_ops=", ".join(AGGREGATE_OPS))
+
+
+def parse_spec(text: str, frame: TransactionFrame):
+    """Validate a model-written spec against `frame`; None when it is unusable or unsupported."""
+    text = text.strip()
+    if text.startswith("```"):
+        text = text.strip("`").split("\n", 1)[-1] if "\n" in text else ""
+    try:
+        spec = json.loads(text[text.find("{"): text.rfind("}") + 1])
+    except (json.JSONDecodeError, ValueError):
+        return None
+    if not isinstance(spec, dict) or spec.get("unsupported"):
+        return None
+    try:
+        frame.execute(spec)
+    except (QueryError, KeyError, TypeError, ValueError, IndexError):
+        return None
+    return spec
+
+
+# GetForeignExchangeTransactionData filter arguments and the frame columns they filter.
+QUERY_ARG_COLUMNS = {
+    "settlement_status": "settlementStatus",
+    "currency": "currency",
+    "product_type": "productType",
+    "channel": "channel",
+    "currency_pair": "currencyPair",
+}
+
+
+def contradicts_query(spec: dict, query_args: dict) -> bool:
+    """
+    True when `spec` asks for a value the stored rows were already filtered away from, e.g.
+    "CAD" after a currency="EUR" query. Such a question is a new query for the tool, not a
+    follow-up over the stored rows.
+    """
+    for f in spec.get("filters") or []:
+        argument = next((a for a, c in QUERY_ARG_COLUMNS.items() if c == f.get("column")), None)
+        stored = query_args.get(argument) if argument else None
+        if not stored or str(stored).lower() == "all" or f.get("op") not in ("eq", "in"):
+            continue
+        wanted = f["value"] if isinstance(f["value"], list) else [f["value"]]
+        if str(stored).lower() not in {str(v).lower() for v in wanted}:
+            return True
+    return False
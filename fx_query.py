@@ -0,0 +1,118 @@
+import json
+import base64
+import hashlib
+from datetime import date, datetime
+from dataclasses import dataclass, asdict
+
+MAX_PAGE_SIZE = 500
+VALUE_DATE_FORMAT = "%d-%b-%Y"
+
+
+class CursorError(ValueError):
+    pass
+
+
+def parse_value_date(value: str) -> date:
+    """Parse the "08-May-2025" valueDate format used by the transaction records."""
+    return datetime.strptime(value, VALUE_DATE_FORMAT).date()
+
+
+def parse_filter_date(value: str) -> date:
+    """Accept ISO (2025-05-08), slash (2025/05/08) or record-style (08-May-2025) dates."""
+    for fmt in ("%Y-%m-%d", "%Y/%m/%d", VALUE_DATE_FORMAT):
+        try:
+            return datetime.strptime(value.strip(), fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f"Unrecognized date '{value}', expected YYYY-MM-DD")
+
+
+@dataclass(frozen=True)
+class TransactionQuery:
+    settlement_status: str = "Approved"
+    currency: str = None
+    value_date_from: str = None
+    value_date_to: str = None
+    product_type: str = None
+    channel: str = None
+    currency_pair: str = None
+
+    def normalized(self) -> "TransactionQuery":
+        status = (self.settlement_status or "Approved").strip()
+        if status.lower() == "settled":
+            status = "Approved"
+        return TransactionQuery(
+            settlement_status=status,
+            currency=self.currency.strip().upper() if self.currency else None,
+            value_date_from=self.value_date_from,
+            value_date_to=self.value_date_to,
+            product_type=self.product_type.strip().upper() if self.product_type else None,
+            channel=self.channel.strip().lower() if self.channel else None,
+            currency_pair=self.currency_pair.replace(" ", "").upper() if self.currency_pair else None,
+        )
+
+    def fingerprint(self) -> str:
+        canonical = json.dumps(asdict(self), sort_keys=True)
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+
+
+def encode_cursor(query: TransactionQuery, offset: int) -> str:
+    payload = json.dumps({"q": query.fingerprint(), "o": offset}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, query: TransactionQuery) -> int:
+    """Return the offset stored in `cursor`, rejecting cursors issued for a different query."""
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        offset = int(payload["o"])
+        fingerprint = payload["q"]
+    except (ValueError, KeyError, TypeError) as e:
+        raise CursorError(f"Invalid cursor: {e}") from None
+    if fingerprint != query.fingerprint():
+        raise CursorError("Cursor does not belong to this query; request the first page again")
+    return offset
+
+
+def project(record: dict, fields: list) -> dict:
+    """Keep only `fields`; dotted names (accountDTO.bankName) select inside nested DTOs."""
+    if not fields:
+        return record
+    projected = {}
+    for field in fields:
+        head, _, rest = field.partition(".")
+        if head not in record:
+            continue
+        value = record[head]
+        if rest and isinstance(value, dict):
+            if rest in value:
+                projected.setdefault(head, {})[rest] = value[rest]
+        else:
+            projected[head] = value
+    return projected
+
+
+def clamp_page_size(page_size: int) -> int:
+    return max(1, min(int(page_size or 1), MAX_PAGE_SIZE))
+
+
+def paginate(matching_rows, query: TransactionQuery, page_size: int, cursor: str = None, fields: list = None, *, materialize) -> dict:
+    """
+    Materialize one page of matching records.
+
+    `matching_rows` is a sliceable sequence of row ids; `page_size + 1` are taken past the cursor
+    offset (the extra one tells whether another page exists) and only the page's rows are turned
+    into dicts by `materialize(row, fields)`, with only the requested fields copied out.
+    """
+    page_size = clamp_page_size(page_size)
+    offset = decode_cursor(cursor, query) if cursor else 0
+    window = matching_rows[offset:offset + page_size + 1]
+    page = [materialize(row, fields) for row in window[:page_size]]
+    has_more = len(window) > page_size
+    return {
+        "result": page,
+        "page_size": page_size,
+        "offset": offset,
+        "next_cursor": encode_cursor(query, offset + page_size) if has_more else None,
+    }
@@ -0,0 +1,156 @@
+import re
+import json
+import numpy as np
+from pathlib import Path
+from datetime import date, timedelta
+from fx_query import parse_filter_date
+from fx_store import USD_RATES
+
+EPOCH = date(1970, 1, 1)
+TRADING_DAYS_PER_YEAR = 252
+PAIR_RE = re.compile(r"^\s*([A-Za-z]{3})\s*[/\-_ ]?\s*([A-Za-z]{3})\s*$")
+DATE_RANGE_RE = re.compile(r"^\s*(\d{4}[/-]\d{1,2}[/-]\d{1,2})\s*(?:-|–|to|\.\.)\s*(\d{4}[/-]\d{1,2}[/-]\d{1,2})\s*$")
+# Annualized volatility used when generating the synthetic USD/XXX series.
+USD_VOLATILITY = {"CAD": 0.06, "EUR": 0.08, "GBP": 0.09, "JPY": 0.10, "INR": 0.04, "AUD": 0.11, "CHF": 0.08, "MXN": 0.13}
+# Crosses quoted directly by the rate source in addition to the USD pairs.
+DIRECT_CROSSES = ["EUR/GBP", "EUR/JPY", "EUR/CHF", "GBP/JPY"]
+
+
+def parse_pair(value: str) -> tuple:
+    """"USD/CAD", "usdcad", "USD-CAD" -> ("USD", "CAD")."""
+    match = PAIR_RE.match(value or "")
+    if not match:
+        raise ValueError(f"Unrecognized currency pair '{value}', expected e.g. \"USD/CAD\"")
+    return match.group(1).upper(), match.group(2).upper()
+
+
+def parse_date_range(value: str) -> tuple:
+    """"2023/01/01-2024/01/01" (ISO dates and "to" work too) -> (date, date)."""
+    match = DATE_RANGE_RE.match(value or "")
+    if not match:
+        raise ValueError(f"Unrecognized date range '{value}', expected e.g. \"2023/01/01-2024/01/01\"")
+    start, end = parse_filter_date(match.group(1)), parse_filter_date(match.group(2))
+    if end < start:
+        start, end = end, start
+    return start, end
+
+
+def _to_days(d: date) -> int:
+    return (d - EPOCH).days
+
+
+def _format_day(days: int) -> str:
+    return (EPOCH + timedelta(days=int(days))).isoformat()
+
+
+class RateStore:
+    """
+    Daily FX fixings on disk, one memory-mapped float64 row per quoted pair.
+
+    Layout of the store directory:
+
+    - days.i32     business days (days since the epoch), ascending; shared by every series
+    - rates.f64    pairs x days matrix of closing rates (units of quote currency per base unit)
+    - meta.json    pair names in row order
+
+    USD/XXX is quoted for every currency plus a few direct crosses. Any other pair is served
+    from the inverse quote or derived through USD (A/B = USD/B / USD/A). A range query is two
+    binary searches on `days` and a slice of one or two rows, so it never scans the store.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        with open(self.path / "meta.json", "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.pairs = {pair: i for i, pair in enumerate(meta["pairs"])}
+        self.days = np.fromfile(self.path / "days.i32", dtype=np.int32)
+        self.rates = np.memmap(self.path / "rates.f64", dtype=np.float64, mode="r", shape=(len(self.pairs), len(self.days)))
+
+    @classmethod
+    def open_or_generate(cls, path, **kwargs) -> "RateStore":
+        path = Path(path)
+        if not (path / "meta.json").exists():
+            cls.generate(path, **kwargs)
+        return cls(path)
+
+    @classmethod
+    def generate(cls, path, start: date = date(2015, 1, 1), end: date = date(2025, 12, 31), seed: int = 7):
+        """Write seeded geometric-Brownian-motion fixings for every USD pair and DIRECT_CROSSES."""
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        all_days = np.arange(_to_days(start), _to_days(end) + 1, dtype=np.int32)
+        # 1970-01-01 was a Thursday: weekday = (days + 3) % 7, Monday = 0.
+        days = all_days[(all_days + 3) % 7 < 5]
+        rng = np.random.default_rng(seed)
+        usd = {}
+        for currency, level in USD_RATES.items():
+            if currency == "USD":
+                continue
+            sigma = USD_VOLATILITY.get(currency, 0.1) / np.sqrt(TRADING_DAYS_PER_YEAR)
+            walk = np.cumsum(rng.normal(-0.5 * sigma ** 2, sigma, len(days)))
+            # Anchor the walk so the latest fixing is near today's reference level.
+            usd[currency] = level * np.exp(walk - walk[-1])
+        series = {f"USD/{currency}": values for currency, values in usd.items()}
+        for cross in DIRECT_CROSSES:
+            base, quote = cross.split("/")
+            # A direct quote differs from the USD-derived cross by a small independent basis.
+            basis = np.exp(rng.normal(0, 0.0005, len(days)))
+            series[cross] = usd[quote] / usd[base] * basis
+        with open(path / "days.i32", "wb") as f:
+            f.write(days.tobytes())
+        with open(path / "rates.f64", "wb") as f:
+            for values in series.values():
+                f.write(values.astype(np.float64).tobytes())
+        with open(path / "meta.json", "w", encoding="utf-8") as f:
+            json.dump({"pairs": list(series), "start": start.isoformat(), "end": end.isoformat(), "seed": seed}, f)
+
+    def currencies(self) -> set:
+        return {c for pair in self.pairs for c in pair.split("/")}
+
+    def _window(self, start: date, end: date) -> slice:
+        return slice(int(np.searchsorted(self.days, _to_days(start), "left")), int(np.searchsorted(self.days, _to_days(end), "right")))
+
+    def series(self, base: str, quote: str, window: slice) -> tuple:
+        """(rates, source) for base/quote over `window`: direct, inverse, or crossed through USD."""
+        if base == quote:
+            return np.ones(window.stop - window.start), "identity"
+        if f"{base}/{quote}" in self.pairs:
+            return np.asarray(self.rates[self.pairs[f"{base}/{quote}"], window]), "direct"
+        if f"{quote}/{base}" in self.pairs:
+            return 1.0 / np.asarray(self.rates[self.pairs[f"{quote}/{base}"], window]), "inverse"
+        legs = []
+        for currency in (base, quote):
+            if currency == "USD":
+                legs.append(None)
+            elif f"USD/{currency}" in self.pairs:
+                legs.append(np.asarray(self.rates[self.pairs[f"USD/{currency}"], window]))
+            else:
+                raise ValueError(f"No rates for {currency}; available: {', '.join(sorted(self.currencies()))}")
+        usd_base, usd_quote = legs
+        return usd_quote / usd_base, "cross via USD"
+
+    def summary(self, pair: str, date_range: str) -> dict:
+        """OHLC, mean, volatility and percent change of `pair` over `date_range`."""
+        base, quote = parse_pair(pair)
+        start, end = parse_date_range(date_range)
+        window = self._window(start, end)
+        rates, source = self.series(base, quote, window)
+        result = {"ccyPair": f"{base}/{quote}", "date_range": date_range, "source": source, "observations": int(len(rates))}
+        if len(rates) == 0:
+            result["error"] = f"No fixings between {start.isoformat()} and {end.isoformat()}"
+            return result
+        log_returns = np.diff(np.log(rates))
+        daily_vol = float(log_returns.std(ddof=1)) if len(log_returns) > 1 else 0.0
+        result.update({
+            "start": _format_day(self.days[window.start]),
+            "end": _format_day(self.days[window.stop - 1]),
+            "open": round(float(rates[0]), 6),
+            "high": round(float(rates.max()), 6),
+            "low": round(float(rates.min()), 6),
+            "close": round(float(rates[-1]), 6),
+            "mean": round(float(rates.mean()), 6),
+            "daily_volatility": round(daily_vol, 6),
+            "annualized_volatility": round(daily_vol * float(np.sqrt(TRADING_DAYS_PER_YEAR)), 6),
+            "pct_change": round(float((rates[-1] / rates[0] - 1) * 100), 4),
+        })
+        return result
@@ -0,0 +1,34 @@
+from context_encoders import flatten_records
+
+
+def _markdown_cell(value) -> str:
+    if value is None:
+        return ""
+    return str(value).replace("|", "\\|").replace("\n", "<br>")
+
+
+def render_markdown_table(data, columns: list = None, max_rows: int = None) -> str:
+    """
+    Render FX transaction data (one record or a list) as a markdown table.
+
+    Nested DTOs become dotted columns (see context_encoders.flatten_record). `columns`
+    selects and orders a subset of those columns; otherwise, or when none of them exist in
+    the data, every column that is non-empty in at least one row is shown. `max_rows`
+    truncates the table with a trailing note.
+    """
+    all_columns, rows = flatten_records(data)
+    if not rows:
+        return "_No transactions found._"
+    index = {column: i for i, column in enumerate(all_columns)}
+    keep = [index[column] for column in columns or [] if column in index]
+    if not keep:
+        keep = [i for i in range(len(all_columns)) if any(row[i] not in (None, "") for row in rows)]
+    shown = rows if max_rows is None else rows[:max_rows]
+    lines = [
+        "| " + " | ".join(all_columns[i] for i in keep) + " |",
+        "|" + "|".join("---" for _ in keep) + "|",
+    ]
+    lines.extend("| " + " | ".join(_markdown_cell(row[i]) for i in keep) + " |" for row in shown)
+    if len(shown) < len(rows):
+        lines.append(f"\n_{len(rows) - len(shown)} more transaction(s) not shown._")
+    return "\n".join(lines)
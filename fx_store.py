@@ -0,0 +1,280 @@
+import numpy as np
+from datetime import date, timedelta
+from fx_query import TransactionQuery, parse_filter_date, project
+
+SETTLEMENT_STATUSES = ["Approved", "Pending Approval", "Rejected", "Netted", "Uninstructed"]
+STATUS_WEIGHTS = [0.55, 0.15, 0.08, 0.12, 0.10]
+PRODUCT_TYPES = ["FXSPOT", "FXFWD", "FXSWAP"]
+PRODUCT_WEIGHTS = [0.7, 0.25, 0.05]
+CHANNELS = ["FX Online", "API", "Phone", "File Upload"]
+CHANNEL_WEIGHTS = [0.6, 0.25, 0.1, 0.05]
+ACCOUNT_TYPES = ["MCA", "DDA", "SAV"]
+BANKS = ["Wells Fargo Bank", "Bank of Montreal", "HSBC Bank", "Barclays Bank"]
+SWIFT_CODES = [None, "BOFMCAM2", "MIDLGB22", "BARCGB22"]
+PEOPLE = ["Sai Sreekanth T", "Venky Dapulil", "Anita Rao", "Mark Chen", "Laura Diaz", "Tom Becker"]
+# Units of quote currency per USD, used to derive plausible spot rates.
+USD_RATES = {"USD": 1.0, "CAD": 1.36, "EUR": 0.92, "GBP": 0.79, "JPY": 151.0, "INR": 83.2, "AUD": 1.52, "CHF": 0.9, "MXN": 17.1}
+CURRENCIES = list(USD_RATES)
+CURRENCY_WEIGHTS = [0.3, 0.15, 0.15, 0.1, 0.08, 0.07, 0.06, 0.05, 0.04]
+DEFAULT_COMPANIES = [("SITCOMP2", "FXOL 8TEST")] + [(f"COMP{i:04d}", f"Company {i:04d}") for i in range(1, 200)]
+EPOCH = date(1970, 1, 1)
+NO_CONTRACT = "No Contract"
+
+
+def _to_days(d: date) -> int:
+    return (d - EPOCH).days
+
+
+def _format_day(days: int) -> str:
+    return (EPOCH + timedelta(days=int(days))).strftime("%d-%b-%Y")
+
+
+class TransactionStore:
+    """
+    Column-oriented, in-memory store of FX transactions.
+
+    Every field is a NumPy array (strings dictionary-encoded to small integer codes, dates as
+    days since the epoch), so a million rows take tens of megabytes instead of a dict per row.
+    Secondary indexes map companyId, settlementStatus and currency pair codes to sorted int32
+    row ids, and valueDate has a sorted permutation for range lookups. Records are only turned
+    back into dicts for the rows a caller actually pages through.
+    """
+
+    def __init__(self, columns: dict, companies: list):
+        self.columns = columns
+        self.companies = companies
+        self.size = len(columns["transaction_id"])
+        self._build_indexes()
+
+    # ---- construction -------------------------------------------------
+
+    @classmethod
+    def generate(cls, size: int, seed: int = 42, companies: list = None, start: date = date(2023, 1, 2), days: int = 730):
+        """Seeded synthetic data shaped like the GetForeignExchangeTransactionData records."""
+        companies = companies or DEFAULT_COMPANIES
+        rng = np.random.default_rng(seed)
+        company_weights = rng.pareto(1.2, len(companies)) + 1
+        company_weights /= company_weights.sum()
+        # The first company is the one the MCP server serves; make sure it has a realistic book.
+        company_weights[0] = max(company_weights[0], 0.05)
+        company_weights /= company_weights.sum()
+
+        buy = rng.choice(len(CURRENCIES), size, p=CURRENCY_WEIGHTS).astype(np.uint8)
+        sell = rng.choice(len(CURRENCIES) - 1, size).astype(np.uint8)
+        sell = np.where(sell >= buy, sell + 1, sell).astype(np.uint8)
+        product = rng.choice(len(PRODUCT_TYPES), size, p=PRODUCT_WEIGHTS).astype(np.uint8)
+        trade = np.sort(rng.integers(0, days, size)).astype(np.int32) + _to_days(start)
+        settle_lag = np.where(product == 0, 2, rng.integers(7, 180, size)).astype(np.int32)
+        value = trade + settle_lag
+
+        usd = np.array([USD_RATES[c] for c in CURRENCIES])
+        spot = usd[sell] / usd[buy] * rng.normal(1.0, 0.01, size)
+        forward_points = np.where(product == 0, 0.0, rng.normal(0, 25, size)).round(2)
+        buy_amount = np.round(rng.lognormal(9.5, 1.6, size), 2)
+
+        columns = {
+            "transaction_id": np.arange(94806599, 94806599 + size, dtype=np.int64),
+            "company": rng.choice(len(companies), size, p=company_weights).astype(np.uint16),
+            "status": rng.choice(len(SETTLEMENT_STATUSES), size, p=STATUS_WEIGHTS).astype(np.uint8),
+            "buy_currency": buy,
+            "sell_currency": sell,
+            "product_type": product,
+            "channel": rng.choice(len(CHANNELS), size, p=CHANNEL_WEIGHTS).astype(np.uint8),
+            "trade_date": trade,
+            "value_date": value.astype(np.int32),
+            "buy_amount": buy_amount,
+            "spot_rate": spot.astype(np.float64),
+            "forward_points": forward_points,
+            "account_type": rng.integers(0, len(ACCOUNT_TYPES), size, dtype=np.uint8),
+            "account_number": rng.integers(0, 10000, size, dtype=np.uint16),
+            "bank": rng.integers(0, len(BANKS), size, dtype=np.uint8),
+            "submitter": rng.integers(0, len(PEOPLE), size, dtype=np.uint8),
+            "approver": rng.integers(0, len(PEOPLE), size, dtype=np.uint8),
+        }
+        return cls(columns, companies)
+
+    def _build_indexes(self):
+        c = self.columns
+        self.company_index = self._postings(c["company"], len(self.companies))
+        self.status_index = self._postings(c["status"], len(SETTLEMENT_STATUSES))
+        pair = c["buy_currency"].astype(np.uint16) * len(CURRENCIES) + c["sell_currency"]
+        self.pair_index = self._postings(pair, len(CURRENCIES) * len(CURRENCIES))
+        self.value_date_order = np.argsort(c["value_date"], kind="stable").astype(np.int32)
+        self.sorted_value_dates = c["value_date"][self.value_date_order]
+        self.company_codes = {cid: i for i, (cid, _) in enumerate(self.companies)}
+
+    @staticmethod
+    def _postings(codes: np.ndarray, cardinality: int) -> list:
+        """For each code, the sorted int32 row ids holding it (a counting-sort bucket split)."""
+        order = np.argsort(codes, kind="stable").astype(np.int32)
+        bounds = np.searchsorted(codes[order], np.arange(cardinality + 1))
+        return [order[bounds[i]:bounds[i + 1]] for i in range(cardinality)]
+
+    @property
+    def nbytes(self) -> int:
+        index_bytes = sum(a.nbytes for index in (self.company_index, self.status_index, self.pair_index) for a in index)
+        index_bytes += self.value_date_order.nbytes + self.sorted_value_dates.nbytes
+        return sum(a.nbytes for a in self.columns.values()) + index_bytes
+
+    # ---- querying -----------------------------------------------------
+
+    def _pair_rows(self, buy: int, sell: int) -> np.ndarray:
+        return self.pair_index[buy * len(CURRENCIES) + sell]
+
+    def _currency_rows(self, currency: int) -> np.ndarray:
+        n = len(CURRENCIES)
+        parts = [self._pair_rows(currency, other) for other in range(n) if other != currency]
+        parts += [self._pair_rows(other, currency) for other in range(n) if other != currency]
+        return np.sort(np.concatenate(parts)) if parts else np.empty(0, dtype=np.int32)
+
+    def _value_date_rows(self, date_from, date_to) -> np.ndarray:
+        lo = 0 if date_from is None else np.searchsorted(self.sorted_value_dates, _to_days(date_from), side="left")
+        hi = len(self.sorted_value_dates) if date_to is None else np.searchsorted(self.sorted_value_dates, _to_days(date_to), side="right")
+        return np.sort(self.value_date_order[lo:hi])
+
+    def query_rows(self, query: TransactionQuery, company_id: str = None) -> np.ndarray:
+        """
+        Row ids (ascending) matching a normalized query.
+
+        The most selective indexed filter produces the candidate rows; every other filter is
+        then applied as a vectorized mask over just those candidates.
+        """
+        c = self.columns
+        empty = np.empty(0, dtype=np.int32)
+        candidates = []   # (row ids, already-applied filter name)
+        if company_id is not None:
+            code = self.company_codes.get(company_id)
+            if code is None:
+                return empty
+            candidates.append((self.company_index[code], "company"))
+        status = query.settlement_status
+        if status and status != "All":
+            if status not in SETTLEMENT_STATUSES:
+                return empty
+            candidates.append((self.status_index[SETTLEMENT_STATUSES.index(status)], "status"))
+        currency_pair = query.currency_pair
+        if currency_pair:
+            buy, _, sell = currency_pair.partition("/")
+            if buy not in CURRENCIES or sell not in CURRENCIES:
+                return empty
+            candidates.append((self._pair_rows(CURRENCIES.index(buy), CURRENCIES.index(sell)), "pair"))
+        date_from = parse_filter_date(query.value_date_from) if query.value_date_from else None
+        date_to = parse_filter_date(query.value_date_to) if query.value_date_to else None
+
+        if candidates:
+            rows, applied = min(candidates, key=lambda item: len(item[0]))
+        elif query.currency and query.currency in CURRENCIES:
+            rows, applied = self._currency_rows(CURRENCIES.index(query.currency)), "currency"
+        elif date_from or date_to:
+            rows, applied = self._value_date_rows(date_from, date_to), "value_date"
+        else:
+            rows, applied = np.arange(self.size, dtype=np.int32), None
+
+        mask = np.ones(len(rows), dtype=bool)
+        if company_id is not None and applied != "company":
+            mask &= c["company"][rows] == self.company_codes[company_id]
+        if status and status != "All" and applied != "status":
+            mask &= c["status"][rows] == SETTLEMENT_STATUSES.index(status)
+        if currency_pair and applied != "pair":
+            mask &= (c["buy_currency"][rows] == CURRENCIES.index(buy)) & (c["sell_currency"][rows] == CURRENCIES.index(sell))
+        if query.currency and applied != "currency":
+            if query.currency not in CURRENCIES:
+                return empty
+            code = CURRENCIES.index(query.currency)
+            mask &= (c["buy_currency"][rows] == code) | (c["sell_currency"][rows] == code)
+        if (date_from or date_to) and applied != "value_date":
+            values = c["value_date"][rows]
+            if date_from:
+                mask &= values >= _to_days(date_from)
+            if date_to:
+                mask &= values <= _to_days(date_to)
+        if query.product_type:
+            if query.product_type not in PRODUCT_TYPES:
+                return empty
+            mask &= c["product_type"][rows] == PRODUCT_TYPES.index(query.product_type)
+        if query.channel:
+            lowered = [ch.lower() for ch in CHANNELS]
+            if query.channel not in lowered:
+                return empty
+            mask &= c["channel"][rows] == lowered.index(query.channel)
+        return rows[mask]
+
+    # ---- materialization ----------------------------------------------
+
+    def record(self, row: int, fields: list = None) -> dict:
+        """Build the dict for one row, computing only the requested top-level fields."""
+        c = self.columns
+        row = int(row)
+        wanted = None if not fields else {f.partition(".")[0] for f in fields}
+
+        def want(name):
+            return wanted is None or name in wanted
+
+        status = SETTLEMENT_STATUSES[c["status"][row]]
+        contracted = status in ("Approved", "Netted")
+        buy_amount = float(c["buy_amount"][row])
+        spot = float(c["spot_rate"][row])
+        points = float(c["forward_points"][row])
+        all_in = spot + points / 10000 if not np.isnan(spot) else np.nan
+        record = {}
+        if want("transactionId"):
+            record["transactionId"] = str(c["transaction_id"][row])
+        if want("companyId"):
+            record["companyId"] = self.companies[c["company"][row]][0]
+        if want("companyName"):
+            record["companyName"] = self.companies[c["company"][row]][1]
+        if want("valueDate"):
+            record["valueDate"] = _format_day(c["value_date"][row])
+        if want("tradeDate"):
+            record["tradeDate"] = _format_day(c["trade_date"][row])
+        if want("allInRate"):
+            record["allInRate"] = f"{all_in:.6f}" if contracted and not np.isnan(all_in) else NO_CONTRACT
+        if want("buyCurrency"):
+            record["buyCurrency"] = CURRENCIES[c["buy_currency"][row]]
+        if want("buyCurrencyAmount"):
+            record["buyCurrencyAmount"] = f"{buy_amount:.2f}"
+        if want("sellCurrency"):
+            record["sellCurrency"] = CURRENCIES[c["sell_currency"][row]]
+        if want("sellCurrencyAmount"):
+            record["sellCurrencyAmount"] = f"{buy_amount * all_in:.2f}" if contracted and not np.isnan(all_in) else NO_CONTRACT
+        if want("spotRate"):
+            record["spotRate"] = f"{spot:.6f}" if contracted and not np.isnan(spot) else NO_CONTRACT
+        if want("forwardPoints"):
+            record["forwardPoints"] = f"{points:.2f}" if contracted and not np.isnan(points) else NO_CONTRACT
+        if want("productType"):
+            record["productType"] = PRODUCT_TYPES[c["product_type"][row]]
+        if want("channel"):
+            record["channel"] = CHANNELS[c["channel"][row]]
+        if want("settlementStatus"):
+            record["settlementStatus"] = status
+        account_number = f"xx{int(c['account_number'][row]):04d}"
+        if want("templateDTO"):
+            record["templateDTO"] = {"beneName": self.companies[c["company"][row]][1], "beneAccountNo": account_number[2:]}
+        if want("accountDTO"):
+            bank = int(c["bank"][row])
+            record["accountDTO"] = {
+                "accountType": ACCOUNT_TYPES[c["account_type"][row]],
+                "accountNumber": account_number,
+                "bankName": BANKS[bank],
+                "swiftCode": SWIFT_CODES[bank],
+            }
+        if want("historyDTO"):
+            record["historyDTO"] = self._history(row, status)
+        if fields:
+            record = project(record, fields)
+        return record
+
+    def _history(self, row: int, status: str) -> list:
+        c = self.columns
+        trade_day = _format_day(c["trade_date"][row])
+        submitter = PEOPLE[c["submitter"][row]]
+        approver = PEOPLE[c["approver"][row]]
+        history = []
+        if status == "Approved":
+            history.append({"date": trade_day, "time": "09:02:10 am ET", "activity": f"Instructions approved by {approver}"})
+        elif status == "Rejected":
+            history.append({"date": trade_day, "time": "08:18:41 am ET", "activity": f"Instructions rejected by {approver}<br /><b>Reject Reason: </b>Reject"})
+        elif status == "Netted":
+            history.append({"date": trade_day, "time": "05:00:00 pm ET", "activity": "Netted with offsetting transactions"})
+        history.append({"date": trade_day, "time": "04:15:52 am ET", "activity": f"Instructions submitted by {submitter}"})
+        return history
@@ -0,0 +1,113 @@
+import re
+from collections import deque
+
+# Rough chars-per-token ratio for English text; good enough for budgeting without a tokenizer.
+CHARS_PER_TOKEN = 4
+SUMMARY_HEADER = "Summary of the earlier conversation:\n"
+
+
+def estimate_tokens(text: str) -> int:
+    if not text:
+        return 0
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def _first_sentence(text: str, max_chars: int) -> str:
+    text = " ".join(text.split())
+    match = re.match(r"(.+?[.!?])(\s|$)", text)
+    sentence = match.group(1) if match else text
+    return sentence if len(sentence) <= max_chars else sentence[: max_chars - 1] + "…"
+
+
+class HistoryStore:
+    """
+    Bounded conversation history holding only user text and final assistant text.
+
+    The turns kept verbatim plus the rolling summary never exceed `token_budget` tokens.
+    When a new message pushes the history over budget, the oldest messages are either
+    compacted into a one-line-per-message summary (`policy="summarize"`) or discarded
+    (`policy="drop"`). The summary itself is capped at `summary_budget` tokens and at what
+    the kept messages leave of `token_budget`, dropping its oldest lines first, so both
+    memory and prompt size stay flat on long chats. Only a newest message that alone exceeds
+    the budget is kept over it (with no summary).
+    """
+
+    def __init__(self, token_budget: int = 4000, policy: str = "summarize", summary_budget: int = 400, max_excerpt_chars: int = 160):
+        if policy not in ("summarize", "drop"):
+            raise ValueError(f"Unknown history policy: {policy}")
+        self.token_budget = token_budget
+        self.policy = policy
+        self.summary_budget = summary_budget
+        self.max_excerpt_chars = max_excerpt_chars
+        self._messages = deque()
+        self._tokens = 0
+        self._summary_lines = deque()
+        self._summary_tokens = 0
+        self.compacted = 0
+
+    def __len__(self):
+        return len(self._messages)
+
+    def __bool__(self):
+        return bool(self._messages)
+
+    def __iter__(self):
+        return iter(self.messages())
+
+    @property
+    def summary_tokens(self) -> int:
+        return self._summary_tokens + estimate_tokens(SUMMARY_HEADER) if self._summary_lines else 0
+
+    @property
+    def tokens(self) -> int:
+        return self._tokens + self.summary_tokens
+
+    @property
+    def summary(self) -> str:
+        return "\n".join(self._summary_lines)
+
+    def append(self, role: str, content: str):
+        content = content or ""
+        tokens = estimate_tokens(content)
+        self._messages.append((role, content, tokens))
+        self._tokens += tokens
+        self._enforce_budget()
+
+    def reset(self):
+        self._messages.clear()
+        self._tokens = 0
+        self._summary_lines.clear()
+        self._summary_tokens = 0
+
+    def replace(self, messages: list):
+        self.reset()
+        for message in messages:
+            if message.get("role") != "system":
+                self.append(message["role"], message.get("content", ""))
+
+    def messages(self) -> list:
+        history = []
+        if self._summary_lines:
+            history.append({"role": "system", "content": SUMMARY_HEADER + self.summary})
+        history.extend({"role": role, "content": content} for role, content, _ in self._messages)
+        return history
+
+    def _enforce_budget(self):
+        # Always keep the newest message, even if it alone exceeds the budget.
+        while len(self._messages) > 1 and self.tokens > self.token_budget:
+            role, content, tokens = self._messages.popleft()
+            self._tokens -= tokens
+            self.compacted += 1
+            if self.policy == "summarize":
+                self._add_summary_line(f"{role}: {_first_sentence(content, self.max_excerpt_chars)}")
+            self._trim_summary()
+        self._trim_summary()
+
+    def _trim_summary(self):
+        allowance = min(self.summary_budget, self.token_budget - self._tokens)
+        while self._summary_lines and self.summary_tokens > allowance:
+            self._summary_tokens -= estimate_tokens(self._summary_lines.popleft())
+
+    def _add_summary_line(self, line: str):
+        self._summary_lines.append(line)
+        self._summary_tokens += estimate_tokens(line)
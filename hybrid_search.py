@@ -0,0 +1,210 @@
+import math
+import threading
+import numpy as np
+from array import array
+from datetime import datetime
+from vector_index import VectorIndex, tokenize
+
+FILTER_FIELDS = ("usecase_id", "data_classification", "book")
+
+
+def _parse_timestamp(value) -> int:
+    """Seconds since the epoch for an ISO timestamp, or -1 when missing/unparseable."""
+    if not value:
+        return -1
+    try:
+        return int(datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp())
+    except ValueError:
+        return -1
+
+
+class BM25Index:
+    """
+    In-memory inverted index with Okapi BM25 scoring.
+
+    Postings are compact `array` buffers per term (row ids as int32, term frequencies as
+    uint16) that are viewed as NumPy arrays at query time, and scoring accumulates into a
+    dense float32 vector so a query costs one vectorized pass per query term.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings = {}
+        self.doc_lengths = array("i")
+        self.total_length = 0
+
+    def __len__(self):
+        return len(self.doc_lengths)
+
+    def add(self, texts) -> None:
+        for text in texts:
+            row = len(self.doc_lengths)
+            tokens = tokenize(text)
+            counts = {}
+            for token in tokens:
+                counts[token] = counts.get(token, 0) + 1
+            for token, count in counts.items():
+                rows_tfs = self.postings.get(token)
+                if rows_tfs is None:
+                    rows_tfs = self.postings[token] = (array("i"), array("H"))
+                rows_tfs[0].append(row)
+                rows_tfs[1].append(min(count, 65535))
+            self.doc_lengths.append(len(tokens))
+            self.total_length += len(tokens)
+
+    def scores(self, query: str) -> np.ndarray:
+        n = len(self.doc_lengths)
+        scores = np.zeros(n, dtype=np.float32)
+        if n == 0:
+            return scores
+        doc_lengths = np.frombuffer(self.doc_lengths, dtype=np.int32)
+        avg_length = self.total_length / n or 1.0
+        for term in set(tokenize(query)):
+            rows_tfs = self.postings.get(term)
+            if rows_tfs is None:
+                continue
+            rows = np.frombuffer(rows_tfs[0], dtype=np.int32)
+            tfs = np.frombuffer(rows_tfs[1], dtype=np.uint16).astype(np.float32)
+            idf = math.log(1 + (n - len(rows) + 0.5) / (len(rows) + 0.5))
+            norm = self.k1 * (1 - self.b + self.b * doc_lengths[rows] / avg_length)
+            scores[rows] += idf * tfs * (self.k1 + 1) / (tfs + norm)
+        return scores
+
+
+class MetadataColumns:
+    """Dictionary-encoded columns of the filterable record fields, aligned with index rows."""
+
+    def __init__(self):
+        self.codes = {name: array("i") for name in FILTER_FIELDS}
+        self.values = {name: {} for name in FILTER_FIELDS}
+        self.modified = array("q")
+
+    def add(self, records) -> None:
+        for record in records:
+            for name in FILTER_FIELDS:
+                value = record.get(name)
+                vocab = self.values[name]
+                code = vocab.get(value)
+                if code is None:
+                    code = vocab[value] = len(vocab)
+                self.codes[name].append(code)
+            self.modified.append(_parse_timestamp(record.get("sor_last_modified")))
+
+    def mask(self, filters: dict, size: int):
+        """Boolean row mask for `filters`, or None when nothing is filtered."""
+        if not filters:
+            return None
+        mask = np.ones(size, dtype=bool)
+        for name in FILTER_FIELDS:
+            wanted = filters.get(name)
+            if wanted is None:
+                continue
+            code = self.values[name].get(wanted)
+            if code is None:
+                return np.zeros(size, dtype=bool)
+            mask &= np.frombuffer(self.codes[name], dtype=np.int32) == code
+        after = filters.get("modified_after")
+        before = filters.get("modified_before")
+        if after or before:
+            modified = np.frombuffer(self.modified, dtype=np.int64)
+            if after:
+                mask &= modified >= _parse_timestamp(after)
+            if before:
+                mask &= (modified >= 0) & (modified <= _parse_timestamp(before))
+        return mask
+
+
+class HybridSearcher:
+    """
+    BM25 and vector retrieval over the same VectorIndex rows, fused by a weighted sum of each
+    ranker's scores scaled by its best score (`alpha` is the vector weight). Unlike reciprocal
+    rank fusion this keeps a decisive keyword match (a deal reference, a ticker) on top when
+    the vector ranking of the same rows is nearly flat.
+
+    Metadata filters (usecase_id, data_classification, book, modified_after/modified_before on
+    sor_last_modified) are turned into a row mask before either ranking runs, so both rankers
+    only ever score rows that can be returned.
+    """
+
+    def __init__(self, index: VectorIndex, candidates: int = 50, alpha: float = 0.5):
+        self.index = index
+        self.candidates = candidates
+        self.alpha = alpha
+        self.bm25 = BM25Index()
+        self.metadata = MetadataColumns()
+        # Searches may run on worker threads; only one of them catches up with new rows at a time.
+        self._sync_lock = threading.Lock()
+        self._sync()
+
+    def _sync(self):
+        """Catch up with rows appended to the vector index since the last call."""
+        with self._sync_lock:
+            self.index.refresh()
+            start = len(self.bm25)
+            if start >= len(self.index):
+                return
+            for batch in self.index.iter_records(start=start):
+                self.bm25.add(r.get("raw_context", "") for r in batch)
+                self.metadata.add(batch)
+
+    def _vector_ranking(self, query: np.ndarray, k: int, mask, mode: str) -> tuple:
+        if mask is None:
+            return self.index.search_vectors(query, k=k, mode=mode)[0]
+        allowed = np.flatnonzero(mask)
+        if len(allowed) <= 200_000 or self.index.centroids is None:
+            return self.index.search_vectors(query, k=k, candidates=allowed)[0]
+        return self.index.search_vectors(query, k=k, mode="ivf", allowed=mask)[0]
+
+    @staticmethod
+    def _top_rows(scores: np.ndarray, k: int) -> np.ndarray:
+        matched = np.flatnonzero(scores > 0)
+        if len(matched) > k:
+            matched = matched[np.argpartition(-scores[matched], k - 1)[:k]]
+        return matched[np.argsort(-scores[matched], kind="stable")].astype(np.int64)
+
+    def search(self, text: str, k: int = 5, filters: dict = None, mode: str = "hybrid", vector_mode: str = "auto") -> dict:
+        """Return the SemanticSearch payload. `mode` is "hybrid", "vector" or "bm25"."""
+        self._sync()
+        if len(self.bm25) == 0:
+            return {"result": {"hits": []}}
+        mask = self.metadata.mask(filters, len(self.bm25))
+        if len(self.index.deleted):
+            if mask is None:
+                mask = np.ones(len(self.bm25), dtype=bool)
+            mask[self.index.deleted] = False
+        depth = max(k, self.candidates)
+        query = self.index.embedder.embed([text])
+        if mode == "vector":
+            scores, rows = self._vector_ranking(query, k, mask, vector_mode)
+            vector_scores, bm25_scores, fused = scores, np.full(len(rows), np.nan), scores
+        else:
+            bm25_all = self.bm25.scores(text)
+            if mask is not None:
+                bm25_all[~mask] = 0
+            rows = self._top_rows(bm25_all, depth)
+            if mode == "hybrid":
+                # Score the union of both candidate lists with both rankers, so a row found by
+                # only one of them is not penalised for being missing from the other list.
+                _, vector_rows = self._vector_ranking(query, depth, mask, vector_mode)
+                rows = np.union1d(rows, vector_rows).astype(np.int64)
+            bm25_scores = bm25_all[rows]
+            vector_scores = np.asarray(self.index.vectors[rows]) @ query[0] if len(rows) else np.zeros(0, np.float32)
+            if mode == "bm25":
+                fused = bm25_scores
+                vector_scores = np.full(len(rows), np.nan)
+            else:
+                fused = (self.alpha * vector_scores / max(float(vector_scores.max(initial=0)), 1e-9)
+                         + (1 - self.alpha) * bm25_scores / max(float(bm25_scores.max(initial=0)), 1e-9))
+        order = np.argsort(-fused, kind="stable")[:k]
+        hits = []
+        for i, record in zip(order, self.index.records([int(rows[i]) for i in order])):
+            hits.append({
+                "score": float(fused[i]),
+                "scores": {
+                    "vector": None if np.isnan(vector_scores[i]) else float(vector_scores[i]),
+                    "bm25": None if np.isnan(bm25_scores[i]) else float(bm25_scores[i]),
+                },
+                "record": record,
+            })
+        return {"result": {"hits": hits}}
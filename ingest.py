@@ -0,0 +1,297 @@
+"""
+Incremental ingestion of documents into the SemanticSearch index.
+
+    python ingest.py docs/ --index ./semantic_index --usecase-id GENAI101_CEOPT --workers 4
+
+Plain text (.txt, .md) and PDF-extracted text are supported. Form feeds split pages, which is
+how pdftotext writes them. .pdf files are read with pypdf when it is installed. Files are
+chunked into overlapping word windows and embedded in batches by a process pool. The chunks
+are then appended to the VectorIndex, so nothing is rebuilt.
+
+ingest_manifest.json in the index directory records each file's content hash and index rows.
+Unchanged files are skipped. A changed file's old rows are marked deleted before its new
+chunks are appended. The manifest also records how many index rows it accounts for, and is
+written before anything is appended: rows past that count were left by a run that stopped
+before saving the manifest, so the next run marks them deleted before re-ingesting their files.
+"""
+import os
+import sys
+import json
+import time
+import uuid
+import hashlib
+import argparse
+import resource
+from pathlib import Path
+from datetime import datetime
+from dataclasses import dataclass, asdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from vector_index import HashingEmbedder, VectorIndex
+
+TEXT_SUFFIXES = {".txt", ".md"}
+PDF_SUFFIXES = {".pdf"}
+
+
+@dataclass
+class IngestStats:
+    files_seen: int = 0
+    files_skipped: int = 0
+    files_ingested: int = 0
+    files_failed: int = 0
+    chunks: int = 0
+    seconds: float = 0.0
+    chunks_per_second: float = 0.0
+    peak_rss_mb: float = 0.0
+
+
+def content_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def read_pages(path: Path) -> list:
+    """Text of each page of `path`. Plain text files are one page unless form feeds split them."""
+    if path.suffix.lower() in PDF_SUFFIXES:
+        try:
+            from pypdf import PdfReader
+        except ImportError:
+            raise ValueError("pypdf is not installed; extract the text first (e.g. pdftotext) and ingest the .txt")
+        return [page.extract_text() or "" for page in PdfReader(str(path)).pages]
+    with open(path, "r", encoding="utf-8", errors="replace") as f:
+        return f.read().split("\f")
+
+
+def chunk_words(text: str, chunk_words: int = 200, overlap: int = 40) -> list:
+    words = text.split()
+    if not words:
+        return []
+    step = max(1, chunk_words - overlap)
+    chunks = []
+    for start in range(0, len(words), step):
+        chunks.append(" ".join(words[start:start + chunk_words]))
+        if start + chunk_words >= len(words):
+            break
+    return chunks
+
+
+def iter_files(paths: list):
+    for path in paths:
+        path = Path(path)
+        if path.is_dir():
+            for child in sorted(path.rglob("*")):
+                if child.is_file() and child.suffix.lower() in TEXT_SUFFIXES | PDF_SUFFIXES:
+                    yield child
+        elif path.is_file():
+            yield path
+
+
+def _peak_rss_mb() -> float:
+    # ru_maxrss is in KiB on Linux; worker processes are counted separately.
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    return (own + children) / 1024
+
+
+_worker_embedder = None
+
+
+def _init_worker(dim: int):
+    global _worker_embedder
+    _worker_embedder = HashingEmbedder(dim)
+
+
+def _embed_batch(texts: list) -> np.ndarray:
+    return _worker_embedder.embed(texts)
+
+
+class Ingestor:
+    def __init__(self, index: VectorIndex, metadata: dict = None, chunk_words: int = 200, overlap: int = 40,
+                 batch_size: int = 256, workers: int = None):
+        self.index = index
+        self.metadata = metadata or {}
+        self.chunk_words = chunk_words
+        self.overlap = overlap
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 1
+        self.manifest_path = index.path / "ingest_manifest.json"
+        self.manifest, self.committed_rows = self._load_manifest()
+
+    def _load_manifest(self) -> tuple:
+        """(file key -> entry, index rows the manifest accounts for)."""
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return {}, len(self.index)
+        if "files" not in data:
+            # Written before the row count was kept: trust every row in the index.
+            return data, len(self.index)
+        return data["files"], data["committed_rows"]
+
+    def _save_manifest(self, committed_rows: int):
+        self.committed_rows = committed_rows
+        tmp = self.manifest_path.with_suffix(".json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({"committed_rows": committed_rows, "files": self.manifest}, f, indent=1)
+        tmp.replace(self.manifest_path)
+
+    def _drop_uncommitted_rows(self):
+        # Rows appended by an interrupted run that never reached the manifest; their files are
+        # still missing from it (or listed with their old hash), so this run ingests them again.
+        orphans = np.setdiff1d(np.arange(self.committed_rows, len(self.index)), self.index.deleted)
+        if len(orphans):
+            print(f"Dropping {len(orphans)} row(s) left by an interrupted ingest")
+            self.index.delete(orphans)
+        self._save_manifest(len(self.index))
+
+    def file_records(self, path: Path, sha: str):
+        """Chunk records for one file, in the shape of the SemanticSearch seed records."""
+        key = str(path.resolve())
+        file_id = str(uuid.uuid5(uuid.NAMESPACE_URL, key))
+        modified = datetime.fromtimestamp(path.stat().st_mtime).isoformat()
+        inserted = datetime.now().isoformat()
+        for page_number, page in enumerate(read_pages(path), start=1):
+            for i, text in enumerate(chunk_words(page, self.chunk_words, self.overlap)):
+                chunk_id = hashlib.blake2b(f"{sha}:{page_number}:{i}".encode(), digest_size=10).hexdigest()
+                yield {
+                    **self.metadata,
+                    "document_id": key,
+                    "chunk_id": chunk_id,
+                    "raw_context": text,
+                    "file_name": path.name,
+                    "title": path.stem,
+                    "sor_last_modified": modified,
+                    "book": file_id,
+                    "page_number": page_number,
+                    "file_id": file_id,
+                    "chunk_insert_date": inserted,
+                }
+
+    def _pending(self, paths: list, stats: IngestStats):
+        """Yield (key, sha, records) for files that are new or changed since the last run."""
+        for path in iter_files(paths):
+            stats.files_seen += 1
+            key = str(path.resolve())
+            try:
+                sha = content_hash(path)
+                if self.manifest.get(key, {}).get("sha256") == sha:
+                    stats.files_skipped += 1
+                    continue
+                records = list(self.file_records(path, sha))
+            except (OSError, ValueError) as e:
+                print(f"Skipping {path}: {e}")
+                stats.files_failed += 1
+                continue
+            yield key, sha, records
+
+    def _batches(self, paths: list, stats: IngestStats):
+        """Group chunk records across files into embedding batches of `batch_size`."""
+        batch = []
+        for key, sha, records in self._pending(paths, stats):
+            for record in records:
+                batch.append((key, sha, record))
+                if len(batch) == self.batch_size:
+                    yield batch
+                    batch = []
+            if not records:
+                # Still recorded in the manifest, so an empty file is not re-read every run.
+                batch.append((key, sha, None))
+        if batch:
+            yield batch
+
+    def _commit_file(self, key: str, sha: str, first: int, end: int):
+        # A file's chunks are appended back to back, so its rows are the span [first, end).
+        previous = self.manifest.get(key)
+        if previous:
+            self.index.delete(range(*previous["rows"]))
+        self.manifest[key] = {"sha256": sha, "rows": [first, end], "ingested_at": datetime.now().isoformat()}
+
+    def run(self, paths: list) -> IngestStats:
+        stats = IngestStats()
+        started = time.perf_counter()
+        self.index.refresh()
+        self._drop_uncommitted_rows()
+        rows_by_file = {}
+        order = []
+        last_saved = time.monotonic()
+
+        def append(batch, embeddings):
+            nonlocal last_saved
+            records = [record for _, _, record in batch if record is not None]
+            row = self.index.add(records, embeddings).start if records else len(self.index)
+            for key, sha, record in batch:
+                if key not in rows_by_file:
+                    rows_by_file[key] = [sha, row, row]
+                    order.append(key)
+                if record is not None:
+                    row += 1
+                    rows_by_file[key][2] = row
+            stats.chunks += len(records)
+            # Every file before the one still being filled is complete once its batch lands.
+            while len(order) > 1:
+                done = order.pop(0)
+                self._commit_file(done, *rows_by_file.pop(done))
+            if time.monotonic() - last_saved > 5:
+                # The file still being filled is not in the manifest yet, so neither are its rows.
+                self._save_manifest(min((r[1] for r in rows_by_file.values()), default=len(self.index)))
+                last_saved = time.monotonic()
+
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_worker, initargs=(self.index.dim,)) as pool:
+            in_flight = []
+            for batch in self._batches(paths, stats):
+                texts = [record["raw_context"] for _, _, record in batch if record is not None]
+                in_flight.append((batch, pool.submit(_embed_batch, texts)))
+                # Bounded window: at most two batches per worker are chunked ahead of the index.
+                if len(in_flight) >= 2 * self.workers:
+                    batch, future = in_flight.pop(0)
+                    append(batch, future.result())
+            for batch, future in in_flight:
+                append(batch, future.result())
+        for key in order:
+            self._commit_file(key, *rows_by_file.pop(key))
+        self._save_manifest(len(self.index))
+
+        stats.files_ingested = stats.files_seen - stats.files_skipped - stats.files_failed
+        stats.seconds = time.perf_counter() - started
+        stats.chunks_per_second = stats.chunks / stats.seconds if stats.seconds else 0.0
+        stats.peak_rss_mb = _peak_rss_mb()
+        return stats
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Ingest documents into the SemanticSearch index")
+    parser.add_argument("paths", nargs="+")
+    parser.add_argument("--index", default=os.environ.get("SEMANTIC_INDEX_PATH", str(Path(__file__).parent / "semantic_index")))
+    parser.add_argument("--usecase-id", default="GENAI101_CEOPT")
+    parser.add_argument("--data-classification", default="internal")
+    parser.add_argument("--chunk-words", type=int, default=200)
+    parser.add_argument("--overlap", type=int, default=40)
+    parser.add_argument("--batch-size", type=int, default=256)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--train-ivf", action="store_true", help="retrain IVF lists after ingesting")
+    args = parser.parse_args()
+
+    index = VectorIndex(args.index)
+    ingestor = Ingestor(
+        index,
+        metadata={"usecase_id": args.usecase_id, "data_classification": args.data_classification},
+        chunk_words=args.chunk_words,
+        overlap=args.overlap,
+        batch_size=args.batch_size,
+        workers=args.workers,
+    )
+    stats = ingestor.run(args.paths)
+    if args.train_ivf:
+        index.train_ivf()
+    print(json.dumps(asdict(stats), indent=2))
+    return 0 if stats.files_failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
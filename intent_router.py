@@ -0,0 +1,132 @@
+import re
+from dataclasses import dataclass
+
+import numpy as np
+
+from vector_index import HashingEmbedder
+from context_compression import content_terms
+
+# Route -> tools the graph gets for it. "followup" takes the previous turn's tool and "all"
+# (the fallback when the router is unsure) every tool, so neither is listed here.
+ROUTE_TOOLS = {
+    "direct": (),
+    "fx_transactions": ("GetForeignExchangeTransactionData",),
+    "fx_lookup": ("ForeignExchangeLookup",),
+    "semantic_search": ("SemanticSearch",),
+}
+
+# Phrases that decide a route on their own, checked before any embedding.
+KEYWORDS = {
+    "direct": (
+        r"^(hi|hello|hey|thanks|thank you|good (morning|afternoon|evening))\b", r"\bwhat is the difference\b",
+        r"\b(explain|define|definition of)\b", r"\bwhat does \w+( \w+)? mean\b", r"\bhow does \w+( \w+)? work\b",
+        r"\b(write|draft|compose) (a|an|me)\b", r"\b(joke|poem)\b", r"\bwho are you\b", r"\bwhat can you do\b",
+        r"^(what is|what's) (a |an )?\w+( \w+)?\W*$",
+    ),
+    "fx_transactions": (
+        r"\btransactions?\b", r"\b(my|our) (fx )?(trades|deals|payments|bookings)\b", r"\bsettlement status\b",
+        r"\b(approved|pending approval|rejected|netted|uninstructed)\b", r"\bbooked\b", r"\bbeneficiar(y|ies)\b",
+    ),
+    "fx_lookup": (
+        r"\b[a-z]{3}/[a-z]{3}\b", r"\b(exchange|fx|spot|conversion) rates?\b", r"\bvolatility\b",
+        r"\b(appreciate|depreciate|strengthen|weaken)(d|ed)?\b", r"\bfixings?\b", r"\bhistorical rates?\b",
+    ),
+    "semantic_search": (
+        r"\bapril showers\b", r"\b(notes|documents?|reports?|articles?|publications?|commentary|newsletter)\b",
+        r"\baccording to\b", r"\b(economics|economists?|analysts?|strategists?|outlook)\b",
+    ),
+}
+
+# Words that point back at the previous answer. They only count when no other route's keywords
+# match, so "what about the EUR/USD rate?" after a transaction query is still an FX lookup.
+FOLLOWUP_CUES = re.compile(
+    r"\b(those|these|them|which ones?|that one|the (first|last|largest|smallest|same) one|same (period|pair|filters?)|"
+    r"more rows|next page|what about|how about)\b"
+)
+
+# A few labeled questions per route; their centroid, with the tool descriptions, is the route's prototype.
+ROUTE_EXAMPLES = {
+    "direct": [
+        "hello how are you", "what is a currency forward contract", "what is the difference between spot and forward",
+        "explain how interest rate parity works", "tell me a joke", "what can you help me with",
+    ],
+    "fx_transactions": [
+        "show my approved transactions", "list my pending approval fx trades", "which payments did we book last month",
+        "show rejected transactions in CAD", "get my fx transaction data", "what deals did our company make through FX Online",
+    ],
+    "fx_lookup": [
+        "how did USD/CAD move in 2023", "what was the EUR/USD exchange rate last year", "historical rates for GBP/JPY",
+        "volatility of the yen against the dollar", "did the euro strengthen against the pound", "open high low close for AUD/USD",
+    ],
+    "semantic_search": [
+        "what are the april showers notes saying about bond yields", "what does the economics report say about inflation",
+        "summarize the latest commentary on rates", "what are analysts saying about the housing market",
+        "find documents about central bank policy", "what are the key points of the outlook",
+    ],
+}
+
+
+def tool_summary(description: str) -> str:
+    """The prose part of a tool description, without its Args/Returns sections."""
+    return re.split(r"\n\s*(Args|Returns):", description or "", maxsplit=1)[0]
+
+
+@dataclass
+class Route:
+    name: str
+    tools: tuple
+    score: float = 0.0
+    reason: str = ""
+
+
+class IntentRouter:
+    """
+    Cheap pre-graph classification of a user message into a route (see ROUTE_TOOLS), so the
+    graph only carries the tool schemas the route needs.
+
+    In order: a follow-up cue while the session holds tool context routes to the previous tool,
+    unless KEYWORDS of another route match too (then that route's tools are added, or, when the
+    previous tool's route is not among the hits, the cue is ignored); KEYWORDS hits of exactly
+    one route decide it; otherwise the message embedding is compared
+    with each route's prototype (ROUTE_EXAMPLES plus the tool descriptions). A best score below
+    `threshold`, or within `margin` of the runner-up, falls back to "all" tools.
+    """
+
+    def __init__(self, tool_descriptions: dict = None, threshold: float = 0.2, margin: float = 0.03, embedder: HashingEmbedder = None):
+        self.threshold = threshold
+        self.margin = margin
+        self.embedder = embedder or HashingEmbedder()
+        self.keywords = {route: [re.compile(p) for p in patterns] for route, patterns in KEYWORDS.items()}
+        descriptions = tool_descriptions or {}
+        self.routes = list(ROUTE_TOOLS)
+        prototypes = []
+        for route in self.routes:
+            texts = [" ".join(content_terms(t)) for t in ROUTE_EXAMPLES[route]]
+            texts += [" ".join(content_terms(tool_summary(descriptions[tool]))) for tool in ROUTE_TOOLS[route] if descriptions.get(tool)]
+            centroid = self.embedder.embed(texts).mean(axis=0)
+            prototypes.append(centroid / (np.linalg.norm(centroid) or 1.0))
+        self.prototypes = np.stack(prototypes)
+
+    def keyword_routes(self, text: str) -> list:
+        return [route for route, patterns in self.keywords.items() if any(p.search(text) for p in patterns)]
+
+    def route(self, question: str, last_tool: str = None, has_context: bool = False) -> Route:
+        text = " ".join(question.lower().split())
+        hits = self.keyword_routes(text)
+        previous = next((route for route, tools in ROUTE_TOOLS.items() if last_tool in tools), None)
+        if has_context and FOLLOWUP_CUES.search(text) and (not hits or previous in hits):
+            if not last_tool:
+                return Route("followup", None, 1.0, "followup cue")
+            tools = (last_tool,) + tuple(t for route in hits for t in ROUTE_TOOLS[route] if t != last_tool)
+            return Route("followup", tools, 1.0, "followup cue")
+        if len(hits) == 1:
+            return Route(hits[0], ROUTE_TOOLS[hits[0]], 1.0, "keyword")
+        scores = self.prototypes @ self.embedder.embed_one(" ".join(content_terms(question)))
+        candidates = [self.routes.index(r) for r in hits] if hits else range(len(self.routes))
+        ranked = sorted(candidates, key=lambda i: -scores[i])
+        best = ranked[0]
+        runner_up = scores[ranked[1]] if len(ranked) > 1 else -1.0
+        if scores[best] < self.threshold or scores[best] - runner_up < self.margin:
+            return Route("all", None, float(scores[best]), "fallback")
+        name = self.routes[best]
+        return Route(name, ROUTE_TOOLS[name], float(scores[best]), "embedding")
@@ -1,34 +1,62 @@
-from typing import Any, Dict, List
-import httpx
+import asyncio
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional
 from litprinter import lit
 from mcp.server.fastmcp import FastMCP
 from starlette.requests import Request
-from starlette.responses import PlainTextResponse
+from starlette.responses import JSONResponse, PlainTextResponse
+from upstream_client import UpstreamClient, attach_lifespan
+from single_flight import SingleFlight
+from server_metrics import ToolMetrics, server_counters
+from fx_query import TransactionQuery, paginate
+from fx_store import TransactionStore
+from fx_rates import RateStore
 
 mcp = FastMCP(
     name="second-server",
     host="127.0.0.1",
-    port=8002,
+    port=int(os.environ.get("MCP_PORT", "8002")),
 )
 
-DUMMY_POST_API_URL = "https://httpbin.org/post"
+# Artificial per-call latency in seconds, to benchmark concurrent tool execution.
+TOOL_DELAY_SECONDS = float(os.environ.get("TOOL_DELAY_SECONDS", "0"))
+
+DUMMY_POST_API_URL = os.environ.get("DUMMY_POST_API_URL", "https://httpbin.org/post")
+
+# One pooled client for every upstream call, opened and closed with the HTTP app.
+upstream = UpstreamClient.from_env()
+attach_lifespan(mcp, upstream)
+
+# Identical concurrent tool calls share one execution; finished results are reused for
+# TOOL_RESULT_TTL_SECONDS (0 = only while in flight). Counters are served on /coalescing.
+flight = SingleFlight(ttl=float(os.environ.get("TOOL_RESULT_TTL_SECONDS", "0")))
+
+# Per-tool Prometheus metrics on /metrics; MCP_METRICS=0 leaves the handlers uninstrumented.
+metrics = ToolMetrics(enabled=os.environ.get("MCP_METRICS", "1") != "0")
 
 
 async def make_dummy_post_request(data: dict) -> dict:
     """Make a POST request to a dummy endpoint for testing."""
-    async with httpx.AsyncClient() as client:
-        try:
-            response = await client.post(DUMMY_POST_API_URL, json=data, timeout=10.0)
-            response.raise_for_status()
-            return response.json()
-        except Exception as e:
-            return {"error": f"Failed to contact dummy API: {str(e)}"}
+    try:
+        return await upstream.post_json(DUMMY_POST_API_URL, data)
+    except Exception as e:
+        return {"error": f"Failed to contact dummy API: {str(e)}"}
+
+
+# Daily historical fixings; generated (seeded) on first start when FX_RATES_PATH is empty.
+FX_RATES_PATH = os.environ.get("FX_RATES_PATH", str(Path(__file__).parent / "fx_rates"))
+rate_store = RateStore.open_or_generate(FX_RATES_PATH)
 
 
 @mcp.tool(name="ForeignExchangeLookup")
+@metrics.instrument("ForeignExchangeLookup")
+@flight.coalesce("ForeignExchangeLookup")
 async def dummy_post_tool(currencyCode: str, date_range: str) -> Any:
     """
     Look up records for historical foreign exchange data.
+    Returns open/high/low/close, mean, daily and annualized volatility and percent change of the
+    daily fixings in the range. Pairs without a direct quote are derived through USD.
 
     Args:
         currencyCode: String containing two currencies in the fashion currency1/currency2. Example: "USD/CAD".
@@ -36,23 +64,43 @@ async def dummy_post_tool(currencyCode: str, date_range: str) -> Any:
     """
 
     print("TOOL CALL")
+    if TOOL_DELAY_SECONDS:
+        await asyncio.sleep(TOOL_DELAY_SECONDS)
     try:
-        payload = {"ccyPair": currencyCode, "date_range": date_range}
-        print(payload)
-        return payload
-    except:
-        return {"Error": "But OK"}
+        return rate_store.summary(currencyCode, date_range)
+    except ValueError as e:
+        return {"ccyPair": currencyCode, "date_range": date_range, "Error": str(e)}
+
+
+COMPANY_ID = "SITCOMP2"
+# Synthetic transactions for all companies; size and seed are configurable for load testing.
+FX_STORE_SIZE = int(os.environ.get("FX_STORE_SIZE", "100000"))
+FX_STORE_SEED = int(os.environ.get("FX_STORE_SEED", "42"))
+transaction_store = TransactionStore.generate(FX_STORE_SIZE, seed=FX_STORE_SEED)
 
 
 @mcp.tool(name="GetForeignExchangeTransactionData")
+@metrics.instrument("GetForeignExchangeTransactionData")
+@flight.coalesce("GetForeignExchangeTransactionData")
 async def get_foreign_exchange_transaction_data(
     settlement_status: str = "Approved",
-) -> List[Dict[str, Any]]:
+    currency: Optional[str] = None,
+    value_date_from: Optional[str] = None,
+    value_date_to: Optional[str] = None,
+    product_type: Optional[str] = None,
+    channel: Optional[str] = None,
+    currency_pair: Optional[str] = None,
+    fields: Optional[List[str]] = None,
+    page_size: int = 50,
+    cursor: Optional[str] = None,
+) -> Dict[str, Any]:
     """
     Retrieve Foreign Exchange Transaction Data for a specific Company ID and settlement status.
     Provides the company details, currency amount details, channels, account details,
     details about DTO and also personal details of people who made the transaction.
-    If no settlement status provided use `Approved` as its value
+    If no settlement status provided use `Approved` as its value.
+    Results are paginated: when `next_cursor` is returned, call again with the same filters
+    and `cursor` set to it to get the next page.
 
     Args:
         settlement_status: Status code of the transaction in title case.
@@ -63,57 +111,39 @@ async def get_foreign_exchange_transaction_data(
                            - 'Rejected'
                            - 'Netted'
                            - 'Uninstructed'
+        currency: Only transactions buying or selling this ISO currency code, e.g. "CAD".
+        value_date_from: Earliest value date, YYYY-MM-DD.
+        value_date_to: Latest value date, YYYY-MM-DD.
+        product_type: Product type such as "FXSPOT" or "FXFWD".
+        channel: Booking channel such as "FX Online".
+        currency_pair: Bought/sold currency pair, e.g. "CAD/USD".
+        fields: Field names to return, e.g. ["buyCurrency", "accountDTO.bankName"]; transactionId is always included. All fields if omitted.
+        page_size: Number of transactions per page (1-500).
+        cursor: `next_cursor` from the previous page of the same query.
 
     Returns:
-        List of transaction data dictionaries
+        {"result": [transactions...], "page_size", "offset", "next_cursor"}
     """
     lit("GetForeignExchangeFXTransactionData")
-    company_id: str = "SITCOMP2"
-    value_date: str = "NA"
-    if settlement_status.lower() == "settled":
-        settlement_status = "Approved"
-    payload = {
-        "companyId": company_id,
-        "valueDate": value_date,
-        "settlement_status": settlement_status,
-    }
-    sample_response_for_get_transactions = {
-        "transactionId": "94806599",
-        "companyName": "FXOL 8TEST",
-        "valueDate": "08-May-2025",
-        "tradeDate": "07-May-2025",
-        "allInRate": "No Contract",
-        "buyCurrency": "CAD",
-        "buyCurrencyAmount": "50.00",
-        "sellCurrency": "USD",
-        "sellCurrencyAmount": "No Contract",
-        "spotRate": "No Contract",
-        "forwardPoints": "No Contract",
-        "productType": "FXSPOT",
-        "channel": "FX Online",
-        "settlementStatus": "Rejected",
-        "templateDTO": {"beneName": "Name", "beneAccountNo": "213"},
-        "accountDTO": {
-            "accountType": "MCA",
-            "accountNumber": "xx1414",
-            "bankName": "Wells Fargo Bank",
-            "swiftCode": None,
-        },
-        "historyDTO": [
-            {
-                "date": "08-May-2025",
-                "time": "08:18:41 am ET",
-                "activity": "Instructions rejected by Venky Dapulil<br /><b>Reject Reason: </b>Reject",
-            },
-            {
-                "date": "07-May-2025",
-                "time": "04:15:52 am ET",
-                "activity": "Instructions submitted by Sai Sreekanth T",
-            },
-        ],
-    }
-    response = sample_response_for_get_transactions
-    return response
+    if TOOL_DELAY_SECONDS:
+        await asyncio.sleep(TOOL_DELAY_SECONDS)
+    query = TransactionQuery(
+        settlement_status=settlement_status,
+        currency=currency,
+        value_date_from=value_date_from,
+        value_date_to=value_date_to,
+        product_type=product_type,
+        channel=channel,
+        currency_pair=currency_pair,
+    ).normalized()
+    if fields and "transactionId" not in fields:
+        # The agent recognizes transaction rows (and follow-up pages) by their id.
+        fields = ["transactionId", *fields]
+    try:
+        rows = transaction_store.query_rows(query, company_id=COMPANY_ID)
+        return paginate(rows, query, page_size, cursor, fields, materialize=transaction_store.record)
+    except ValueError as e:
+        return {"result": [], "error": str(e)}
 
 
 # Add a custom GET /health route for health checks
@@ -122,6 +152,17 @@ async def health_check(request: Request) -> PlainTextResponse:
     return PlainTextResponse("OK")
 
 
+@mcp.custom_route("/coalescing", methods=["GET"])
+async def coalescing_stats(request: Request) -> JSONResponse:
+    return JSONResponse(flight.summary())
+
+
+@mcp.custom_route("/metrics", methods=["GET"])
+async def prometheus_metrics(request: Request) -> PlainTextResponse:
+    text = metrics.render(server_counters(flight.summary(), upstream.summary()))
+    return PlainTextResponse(text, media_type="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
     transport = "sse"
     if transport == "stdio":
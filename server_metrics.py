@@ -0,0 +1,152 @@
+import json
+import time
+import bisect
+import functools
+from dataclasses import dataclass, field
+
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+
+
+@dataclass
+class Histogram:
+    buckets: tuple
+    counts: list = field(init=False)
+    total: float = 0.0
+    count: int = 0
+
+    def __post_init__(self):
+        self.counts = [0] * len(self.buckets)
+
+    def observe(self, value: float):
+        index = bisect.bisect_left(self.buckets, value)
+        if index < len(self.counts):
+            self.counts[index] += 1
+        self.total += value
+        self.count += 1
+
+    def lines(self, name: str, labels: str) -> list:
+        lines = []
+        cumulative = 0
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.total}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+
+@dataclass
+class ToolSeries:
+    calls: int = 0
+    errors: int = 0
+    latency: Histogram = field(default_factory=lambda: Histogram(LATENCY_BUCKETS))
+    request_bytes: Histogram = field(default_factory=lambda: Histogram(SIZE_BUCKETS))
+    response_bytes: Histogram = field(default_factory=lambda: Histogram(SIZE_BUCKETS))
+
+
+def _payload_size(value) -> int:
+    if isinstance(value, (str, bytes)):
+        return len(value)
+    return len(json.dumps(value, default=str, separators=(",", ":")))
+
+
+def _is_error(result) -> bool:
+    # The tools report failures in the result ({"Error": ...} / {"error": ...}) rather than raising.
+    return isinstance(result, dict) and bool(result.get("error") or result.get("Error"))
+
+
+def _label(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class ToolMetrics:
+    """
+    Per-tool call counts, error counts, latency and payload-size histograms of one MCP server,
+    rendered in the Prometheus text format by `render` for a /metrics route.
+
+    With enabled=False `instrument` returns handlers unchanged, so there is no per-call cost.
+    """
+
+    def __init__(self, enabled: bool = True, prefix: str = "mcp"):
+        self.enabled = enabled
+        self.prefix = prefix
+        self.tools = {}
+
+    def series(self, tool: str) -> ToolSeries:
+        return self.tools.setdefault(tool, ToolSeries())
+
+    def instrument(self, tool: str):
+        """Decorator for an async tool handler; keeps its signature so FastMCP sees the same schema."""
+        def decorator(handler):
+            if not self.enabled:
+                return handler
+
+            @functools.wraps(handler)
+            async def instrumented_handler(*args, **kwargs):
+                series = self.series(tool)
+                series.calls += 1
+                series.request_bytes.observe(_payload_size(kwargs))
+                started = time.perf_counter()
+                try:
+                    result = await handler(*args, **kwargs)
+                except Exception:
+                    series.errors += 1
+                    series.latency.observe(time.perf_counter() - started)
+                    raise
+                series.latency.observe(time.perf_counter() - started)
+                series.response_bytes.observe(_payload_size(result))
+                if _is_error(result):
+                    series.errors += 1
+                return result
+
+            return instrumented_handler
+        return decorator
+
+    def render(self, counters: dict = None) -> str:
+        """
+        Prometheus exposition text. `counters` adds extra series as
+        {metric name: (type, help, {((label, value), ...): sample})}; see `server_counters`.
+        """
+        p = self.prefix
+        lines = [
+            f"# HELP {p}_tool_calls_total Tool calls received.",
+            f"# TYPE {p}_tool_calls_total counter",
+            *(f'{p}_tool_calls_total{{tool="{_label(t)}"}} {s.calls}' for t, s in self.tools.items()),
+            f"# HELP {p}_tool_errors_total Tool calls that raised or returned an error.",
+            f"# TYPE {p}_tool_errors_total counter",
+            *(f'{p}_tool_errors_total{{tool="{_label(t)}"}} {s.errors}' for t, s in self.tools.items()),
+        ]
+        for metric, attribute, help_text in (
+            ("tool_latency_seconds", "latency", "Tool handler latency."),
+            ("tool_request_bytes", "request_bytes", "JSON size of the tool arguments."),
+            ("tool_response_bytes", "response_bytes", "JSON size of the tool results."),
+        ):
+            lines += [f"# HELP {p}_{metric} {help_text}", f"# TYPE {p}_{metric} histogram"]
+            for t, s in self.tools.items():
+                lines += getattr(s, attribute).lines(f"{p}_{metric}", f'tool="{_label(t)}"')
+        for metric, (kind, help_text, samples) in (counters or {}).items():
+            lines += [f"# HELP {p}_{metric} {help_text}", f"# TYPE {p}_{metric} {kind}"]
+            for labels, value in samples.items():
+                label_text = "{" + ",".join(f'{k}="{_label(v)}"' for k, v in labels) + "}" if labels else ""
+                lines.append(f"{p}_{metric}{label_text} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def server_counters(flight_summary: dict, upstream_summary: dict) -> dict:
+    """Extra /metrics series from SingleFlight.summary() and UpstreamClient.summary()."""
+    tools = flight_summary["tools"]
+    counters = {
+        "tool_coalesced_total": ("counter", "Calls that joined an identical in-flight execution.",
+                                 {(("tool", t),): s["coalesced"] for t, s in tools.items()}),
+        "tool_result_reuses_total": ("counter", "Calls answered from a recent identical result.",
+                                     {(("tool", t),): s["ttl_hits"] for t, s in tools.items()}),
+        "tool_executions_total": ("counter", "Tool handler executions after coalescing.",
+                                  {(("tool", t),): s["executions"] for t, s in tools.items()}),
+        "circuit_open": ("gauge", "1 while the upstream circuit breaker is open.",
+                         {(): int(upstream_summary["circuit"] == "open")}),
+    }
+    for name in ("requests", "retries", "failures", "short_circuited"):
+        counters[f"upstream_{name}_total"] = ("counter", f"Upstream HTTP {name.replace('_', ' ')}.", {(): upstream_summary[name]})
+    return counters
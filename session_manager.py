@@ -0,0 +1,86 @@
+import time
+import asyncio
+import tomllib
+from pathlib import Path
+from cl_agent import ConversationState, TestAgent
+
+CHAINLIT_CONFIG_PATH = Path(__file__).parent / ".chainlit" / "config.toml"
+DEFAULT_SESSION_TIMEOUT = 3600
+
+
+def load_session_timeout(config_path=CHAINLIT_CONFIG_PATH) -> int:
+    """Read `project.session_timeout` (seconds) from the Chainlit config, falling back to one hour."""
+    try:
+        with open(config_path, "rb") as f:
+            config = tomllib.load(f)
+        return int(config.get("project", {}).get("session_timeout", DEFAULT_SESSION_TIMEOUT))
+    except (OSError, tomllib.TOMLDecodeError, ValueError) as e:
+        print(f"Could not read session timeout from {config_path}: {e}")
+        return DEFAULT_SESSION_TIMEOUT
+
+
+class SessionManager:
+    """
+    Serves many concurrent conversations from one TestAgent.
+
+    The compiled react agent and the MultiServerMCPClient live on the shared agent; each
+    conversation only owns a ConversationState keyed by session id. Turns of the same session
+    are serialized by the state's lock, turns of different sessions run concurrently.
+    Sessions idle for longer than `session_timeout` seconds are evicted.
+    """
+
+    def __init__(self, agent: TestAgent, session_timeout: int = None, sweep_interval: float = 60.0):
+        self.agent = agent
+        self.session_timeout = session_timeout if session_timeout is not None else load_session_timeout()
+        self.sweep_interval = sweep_interval
+        self.sessions: dict[str, ConversationState] = {}
+        self.evicted = 0
+        self._sweeper = None
+
+    def __len__(self):
+        return len(self.sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self.sessions
+
+    def get_session(self, session_id: str) -> ConversationState:
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self.agent.new_session(session_id)
+            self.sessions[session_id] = session
+        return session
+
+    def end_session(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    async def ask_agent(self, session_id: str, user_message: str) -> str:
+        return await self.agent.ask_agent(user_message, session=self.get_session(session_id))
+
+    def evict_idle(self, now: float = None) -> int:
+        now = time.monotonic() if now is None else now
+        expired = [
+            sid for sid, session in self.sessions.items()
+            if now - session.last_active > self.session_timeout and not session.lock.locked()
+        ]
+        for sid in expired:
+            del self.sessions[sid]
+        self.evicted += len(expired)
+        return len(expired)
+
+    async def _sweep(self):
+        while True:
+            await asyncio.sleep(self.sweep_interval)
+            self.evict_idle()
+
+    def start(self):
+        if self._sweeper is None:
+            self._sweeper = asyncio.create_task(self._sweep())
+
+    async def stop(self):
+        if self._sweeper is not None:
+            self._sweeper.cancel()
+            try:
+                await self._sweeper
+            except asyncio.CancelledError:
+                pass
+            self._sweeper = None
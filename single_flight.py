@@ -0,0 +1,108 @@
+import json
+import time
+import asyncio
+import inspect
+import functools
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+
+
+@dataclass
+class FlightStats:
+    calls: int = 0
+    executions: int = 0
+    coalesced: int = 0
+    ttl_hits: int = 0
+    errors: int = 0
+
+
+def call_key(signature: inspect.Signature, args: tuple, kwargs: dict) -> str:
+    """Canonical arguments of one call: defaults applied, keys sorted, strings trimmed."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+
+    def normalize(value):
+        if isinstance(value, str):
+            return value.strip()
+        if isinstance(value, dict):
+            return {k: normalize(v) for k, v in value.items()}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v) for v in value]
+        return value
+    return json.dumps(normalize(bound.arguments), sort_keys=True, separators=(",", ":"), default=str)
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical tool executions inside one MCP server.
+
+    While a call is in flight, every call with the same tool name and normalized arguments
+    awaits that same execution instead of starting its own. With a `ttl` (seconds), a finished
+    result is also reused for identical calls within that window. Errors are shared with the
+    callers that were waiting but never cached.
+    """
+
+    def __init__(self, ttl: float = 0.0, max_entries: int = 1024, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.in_flight = {}
+        self.results = OrderedDict()
+        self.stats = {}
+
+    def _stats(self, name: str) -> FlightStats:
+        return self.stats.setdefault(name, FlightStats())
+
+    async def run(self, name: str, key: str, call, ttl: float = None):
+        ttl = self.ttl if ttl is None else ttl
+        stats = self._stats(name)
+        stats.calls += 1
+        cache_key = (name, key)
+        cached = self.results.get(cache_key)
+        if cached is not None:
+            expires_at, result = cached
+            if self.clock() < expires_at:
+                stats.ttl_hits += 1
+                return result
+            del self.results[cache_key]
+        task = self.in_flight.get(cache_key)
+        if task is not None:
+            stats.coalesced += 1
+        else:
+            stats.executions += 1
+            task = asyncio.ensure_future(call())
+            self.in_flight[cache_key] = task
+            task.add_done_callback(lambda t: self._finish(name, cache_key, t, ttl))
+        # Shielded, so a caller that gives up does not cancel the execution others are waiting on.
+        return await asyncio.shield(task)
+
+    def _finish(self, name: str, cache_key: tuple, task: asyncio.Task, ttl: float):
+        self.in_flight.pop(cache_key, None)
+        if task.cancelled() or task.exception() is not None:
+            self._stats(name).errors += 1
+            return
+        if ttl and ttl > 0:
+            self.results[cache_key] = (self.clock() + ttl, task.result())
+            self.results.move_to_end(cache_key)
+            while len(self.results) > self.max_entries:
+                self.results.popitem(last=False)
+
+    def coalesce(self, name: str, ttl: float = None):
+        """Decorator for an async tool handler; keeps its signature so FastMCP sees the same schema."""
+        def decorator(handler):
+            signature = inspect.signature(handler)
+
+            @functools.wraps(handler)
+            async def coalesced_handler(*args, **kwargs):
+                key = call_key(signature, args, kwargs)
+                return await self.run(name, key, lambda: handler(*args, **kwargs), ttl)
+
+            return coalesced_handler
+        return decorator
+
+    def summary(self) -> dict:
+        return {
+            "in_flight": len(self.in_flight),
+            "cached_results": len(self.results),
+            "tools": {name: asdict(stats) for name, stats in self.stats.items()},
+        }
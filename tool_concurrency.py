@@ -0,0 +1,70 @@
+import json
+import asyncio
+import functools
+from langchain_core.tools import BaseTool, StructuredTool
+
+SERVER_METADATA_KEY = "mcp_server"
+# Artifact of a timed-out call's error result, so caches in front of the limiter can skip it.
+TIMEOUT_ARTIFACT = {"error": "timeout"}
+
+
+class ServerLimiter:
+    """
+    Per-MCP-server cap on concurrent tool calls plus a per-call timeout.
+
+    `limits` maps a server name to {"max_concurrency": int, "timeout": seconds}; a "default"
+    entry covers tools whose server is unknown. Semaphores are created lazily so they bind to
+    the event loop that actually runs the calls.
+    """
+
+    def __init__(self, limits: dict):
+        self.limits = limits
+        self._semaphores = {}
+        self.timeouts = 0
+
+    def limit_for(self, server: str) -> dict:
+        return self.limits.get(server) or self.limits.get("default") or {}
+
+    def semaphore(self, server: str):
+        max_concurrency = self.limit_for(server).get("max_concurrency")
+        if not max_concurrency:
+            return None
+        if server not in self._semaphores:
+            self._semaphores[server] = asyncio.Semaphore(max_concurrency)
+        return self._semaphores[server]
+
+    async def run(self, server: str, tool_name: str, call):
+        timeout = self.limit_for(server).get("timeout")
+        semaphore = self.semaphore(server)
+        try:
+            if semaphore is None:
+                return await asyncio.wait_for(call(), timeout)
+            async with semaphore:
+                return await asyncio.wait_for(call(), timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            print(f"Tool call {tool_name} on {server} timed out after {timeout}s")
+            error = json.dumps({"error": f"{tool_name} timed out after {timeout} seconds"})
+            return error, dict(TIMEOUT_ARTIFACT)
+
+
+def tool_server(tool: BaseTool) -> str:
+    return (tool.metadata or {}).get(SERVER_METADATA_KEY, "default")
+
+
+def limit_tool(tool: BaseTool, limiter: ServerLimiter) -> BaseTool:
+    """Return a copy of an MCP tool whose calls go through `limiter` for the tool's server."""
+    if not isinstance(tool, StructuredTool) or tool.coroutine is None:
+        return tool
+    call_tool = tool.coroutine
+    server = tool_server(tool)
+
+    @functools.wraps(call_tool)
+    async def limited_call_tool(*args, **arguments):
+        return await limiter.run(server, tool.name, lambda: call_tool(*args, **arguments))
+
+    return tool.model_copy(update={"coroutine": limited_call_tool})
+
+
+def limit_tools(tools: list, limiter: ServerLimiter) -> list:
+    return [limit_tool(tool, limiter) for tool in tools]
@@ -0,0 +1,165 @@
+import json
+import time
+import functools
+from collections import OrderedDict
+from dataclasses import dataclass
+from langchain_core.tools import BaseTool, StructuredTool
+from tool_concurrency import TIMEOUT_ARTIFACT
+from context_assembly import message_text
+
+
+@dataclass
+class ToolCacheStats:
+    hits: int = 0
+    misses: int = 0
+    expired: int = 0
+    evictions: int = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+
+def normalize_arguments(arguments: dict, casefold=()) -> str:
+    """
+    Canonical form of tool arguments: sorted keys, no whitespace, strings trimmed. Only the
+    top-level arguments named in `casefold` are case-folded, since a status, cursor or field
+    name may be case-sensitive to the tool.
+    """
+    def normalize(value, fold=False):
+        if isinstance(value, str):
+            return value.strip().casefold() if fold else value.strip()
+        if isinstance(value, dict):
+            return {k: normalize(v, fold) for k, v in value.items() if v is not None}
+        if isinstance(value, (list, tuple)):
+            return [normalize(v, fold) for v in value]
+        return value
+    normalized = {k: normalize(v, k in casefold) for k, v in (arguments or {}).items() if v is not None}
+    return json.dumps(normalized, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class ToolResultCache:
+    """
+    Size-bounded LRU cache of tool results keyed by tool name plus normalized arguments.
+
+    Each tool gets its own TTL (seconds) from `ttls`, falling back to `default_ttl`.
+    A TTL of 0 disables caching for that tool. `casefold` maps a tool name to the arguments
+    it treats case-insensitively; those alone are case-folded in the key.
+    """
+
+    def __init__(self, max_entries: int = 1024, default_ttl: float = 60.0, ttls: dict = None, casefold: dict = None, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.default_ttl = default_ttl
+        self.ttls = dict(ttls or {})
+        self.casefold = {name: frozenset(args) for name, args in (casefold or {}).items()}
+        self.clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self.stats: dict[str, ToolCacheStats] = {}
+
+    def __len__(self):
+        return len(self._entries)
+
+    def ttl_for(self, tool_name: str) -> float:
+        return self.ttls.get(tool_name, self.default_ttl)
+
+    def _stats(self, tool_name: str) -> ToolCacheStats:
+        return self.stats.setdefault(tool_name, ToolCacheStats())
+
+    def key(self, tool_name: str, arguments: dict) -> tuple:
+        return (tool_name, normalize_arguments(arguments, self.casefold.get(tool_name, ())))
+
+    def get(self, tool_name: str, arguments: dict):
+        """Return (True, result) on a fresh hit, (False, None) otherwise."""
+        stats = self._stats(tool_name)
+        key = self.key(tool_name, arguments)
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, result = entry
+            if expires_at > self.clock():
+                self._entries.move_to_end(key)
+                stats.hits += 1
+                return True, result
+            del self._entries[key]
+            stats.expired += 1
+        stats.misses += 1
+        return False, None
+
+    def put(self, tool_name: str, arguments: dict, result):
+        ttl = self.ttl_for(tool_name)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        key = self.key(tool_name, arguments)
+        self._entries[key] = (self.clock() + ttl, result)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            (evicted_tool, _), _ = self._entries.popitem(last=False)
+            self._stats(evicted_tool).evictions += 1
+
+    def invalidate(self, tool_name: str = None):
+        if tool_name is None:
+            self._entries.clear()
+            return
+        for key in [k for k in self._entries if k[0] == tool_name]:
+            del self._entries[key]
+
+    def summary(self) -> dict:
+        totals = ToolCacheStats()
+        per_tool = {}
+        for name, s in self.stats.items():
+            per_tool[name] = {"hits": s.hits, "misses": s.misses, "expired": s.expired, "evictions": s.evictions, "hit_rate": round(s.hit_rate, 4)}
+            totals.hits += s.hits
+            totals.misses += s.misses
+            totals.expired += s.expired
+            totals.evictions += s.evictions
+        return {
+            "entries": len(self._entries),
+            "hits": totals.hits,
+            "misses": totals.misses,
+            "expired": totals.expired,
+            "evictions": totals.evictions,
+            "hit_rate": round(totals.hit_rate, 4),
+            "tools": per_tool,
+        }
+
+
+def is_error_result(result) -> bool:
+    """
+    True for a tool result that must not be reused: the limiter's timeout result, or content
+    that is a JSON object with a top-level "error"/"Error" key (how the servers report failures).
+    """
+    content, artifact = result if isinstance(result, tuple) and len(result) == 2 else (result, None)
+    if artifact == TIMEOUT_ARTIFACT:
+        return True
+    text = message_text(content).strip()
+    if not text.startswith("{"):
+        return False
+    try:
+        payload = json.loads(text)
+    except json.JSONDecodeError:
+        return False
+    return isinstance(payload, dict) and ("error" in payload or "Error" in payload)
+
+
+def wrap_tool(tool: BaseTool, cache: ToolResultCache) -> BaseTool:
+    """Return a copy of an MCP tool whose results are served from `cache` when fresh; error results are not cached."""
+    if cache.ttl_for(tool.name) <= 0 or not isinstance(tool, StructuredTool) or tool.coroutine is None:
+        return tool
+    call_tool = tool.coroutine
+
+    @functools.wraps(call_tool)
+    async def cached_call_tool(*args, **arguments):
+        key_arguments = {k: v for k, v in arguments.items() if k != "runtime"}
+        hit, result = cache.get(tool.name, key_arguments)
+        if hit:
+            return result
+        result = await call_tool(*args, **arguments)
+        if not is_error_result(result):
+            cache.put(tool.name, key_arguments, result)
+        return result
+
+    return tool.model_copy(update={"coroutine": cached_call_tool})
+
+
+def wrap_tools(tools: list, cache: ToolResultCache) -> list:
+    return [wrap_tool(tool, cache) for tool in tools]
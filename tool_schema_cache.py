@@ -0,0 +1,105 @@
+import json
+import asyncio
+import hashlib
+from pathlib import Path
+from mcp.types import Tool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import convert_mcp_tool_to_langchain_tool
+from tool_concurrency import SERVER_METADATA_KEY
+
+DEFAULT_CACHE_PATH = Path(__file__).parent / ".mcp_tool_cache.json"
+CACHE_VERSION = 1
+
+
+def fingerprint(tool_defs: list) -> str:
+    """Stable hash of a server's tool definitions, used to detect schema changes."""
+    canonical = json.dumps(tool_defs, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def _connection_key(connection: dict) -> dict:
+    return {"url": connection.get("url"), "transport": connection.get("transport")}
+
+
+async def discover_server_tools(client: MultiServerMCPClient, server_name: str) -> list:
+    """List the raw MCP tool definitions exposed by one server."""
+    tool_defs = []
+    async with client.session(server_name) as session:
+        cursor = None
+        while True:
+            result = await session.list_tools(cursor=cursor)
+            tool_defs.extend(t.model_dump(mode="json", exclude_none=True) for t in result.tools)
+            cursor = result.nextCursor
+            if not cursor:
+                break
+    return tool_defs
+
+
+async def discover_tools(client: MultiServerMCPClient) -> dict:
+    names = list(client.connections)
+    results = await asyncio.gather(*(discover_server_tools(client, name) for name in names))
+    return {
+        name: {
+            "connection": _connection_key(client.connections[name]),
+            "fingerprint": fingerprint(tool_defs),
+            "tools": tool_defs,
+        }
+        for name, tool_defs in zip(names, results)
+    }
+
+
+def build_tools(client: MultiServerMCPClient, servers: dict) -> list:
+    """Turn cached tool definitions into LangChain tools without contacting the servers.
+
+    Like `MultiServerMCPClient.get_tools()`, every tool opens its own session when called.
+    """
+    tools = []
+    for name, connection in client.connections.items():
+        for tool_def in servers[name]["tools"]:
+            tool = convert_mcp_tool_to_langchain_tool(
+                None, Tool.model_validate(tool_def), connection=connection, server_name=name
+            )
+            # Remember the server so per-server limits (tool_concurrency) can find it.
+            tools.append(tool.model_copy(update={"metadata": {**(tool.metadata or {}), SERVER_METADATA_KEY: name}}))
+    return tools
+
+
+class ToolSchemaCache:
+    """On-disk cache of the tool schemas discovered from each MCP server."""
+
+    def __init__(self, path=DEFAULT_CACHE_PATH):
+        self.path = Path(path)
+
+    def load(self, connections: dict):
+        """Return the cached servers if every configured server has a matching entry, else None."""
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            return None
+        if data.get("version") != CACHE_VERSION:
+            return None
+        servers = data.get("servers", {})
+        for name, connection in connections.items():
+            entry = servers.get(name)
+            if not entry or entry.get("connection") != _connection_key(connection):
+                return None
+            if entry.get("fingerprint") != fingerprint(entry.get("tools", [])):
+                return None
+        return {name: servers[name] for name in connections}
+
+    def save(self, servers: dict):
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": CACHE_VERSION, "servers": servers}, f, indent=2)
+            tmp_path.replace(self.path)
+        except OSError as e:
+            print(f"Could not write tool schema cache {self.path}: {e}")
+
+    def clear(self):
+        self.path.unlink(missing_ok=True)
+
+
+def changed_servers(cached: dict, live: dict) -> list:
+    return [name for name in live if cached.get(name, {}).get("fingerprint") != live[name]["fingerprint"]]
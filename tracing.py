@@ -0,0 +1,154 @@
+import os
+import sys
+import json
+import time
+import uuid
+import threading
+import contextvars
+from contextlib import asynccontextmanager, contextmanager, nullcontext
+from langchain_core.callbacks import AsyncCallbackHandler
+from tool_concurrency import SERVER_METADATA_KEY
+
+# Ids of the turn and of the innermost open span, visible to everything the turn runs
+# (asyncio tasks and executor threads started by the graph copy the context).
+_turn = contextvars.ContextVar("trace_turn", default=None)
+_parent = contextvars.ContextVar("trace_parent", default=None)
+_DISABLED = nullcontext()
+
+
+class JsonlSink:
+    """Appends one JSON object per span to `path`."""
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, span: dict):
+        line = json.dumps(span, default=str, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(line)
+
+
+class MemorySink:
+    """Keeps spans in a list, e.g. for benchmarks that summarize them afterwards."""
+
+    def __init__(self):
+        self.spans = []
+
+    def __call__(self, span: dict):
+        self.spans.append(span)
+
+
+def stderr_sink(span: dict):
+    print(f"[trace] {span['turn_id'] or '-'} {span['name']} {span['duration_ms']:.1f} ms {span['attributes'] or ''}", file=sys.stderr)
+
+
+class Tracer:
+    """
+    Timing spans for the phases of a turn, handed to `sink` (any callable taking a span dict)
+    as each one finishes:
+
+        {"session_id", "turn_id", "span_id", "parent_id", "name", "start", "duration_ms", "attributes"}
+
+    Without a sink the tracer is disabled: `span` returns a shared no-op context manager and
+    no callback is attached to the graph, so tracing costs one attribute check per phase.
+    """
+
+    def __init__(self, sink=None):
+        self.sink = sink
+        self.enabled = sink is not None
+
+    @classmethod
+    def from_env(cls, variable: str = "AGENT_TRACE"):
+        """AGENT_TRACE=stderr prints spans; any other value is a JSONL file to append them to."""
+        target = os.environ.get(variable)
+        if not target:
+            return cls()
+        return cls(stderr_sink if target == "stderr" else JsonlSink(target))
+
+    @asynccontextmanager
+    async def turn(self, session_id: str):
+        if not self.enabled:
+            yield None
+            return
+        turn_id = uuid.uuid4().hex[:16]
+        token = _turn.set((session_id, turn_id))
+        try:
+            with self._span("turn"):
+                yield turn_id
+        finally:
+            _turn.reset(token)
+
+    def span(self, name: str, **attributes):
+        if not self.enabled:
+            return _DISABLED
+        return self._span(name, **attributes)
+
+    @contextmanager
+    def _span(self, name: str, **attributes):
+        span_id = uuid.uuid4().hex[:16]
+        parent_token = _parent.set(span_id)
+        start = time.time()
+        started = time.perf_counter()
+        try:
+            yield attributes
+        except BaseException as e:
+            attributes["error"] = f"{type(e).__name__}: {e}"
+            raise
+        finally:
+            _parent.reset(parent_token)
+            self.record(name, start, time.perf_counter() - started, span_id, attributes)
+
+    def record(self, name: str, start: float, seconds: float, span_id: str = None, attributes: dict = None, parent_id: str = None):
+        session_id, turn_id = _turn.get() or (None, None)
+        self.sink({
+            "session_id": session_id,
+            "turn_id": turn_id,
+            "span_id": span_id or uuid.uuid4().hex[:16],
+            "parent_id": parent_id if parent_id is not None else _parent.get(),
+            "name": name,
+            "start": start,
+            "duration_ms": seconds * 1000,
+            "attributes": attributes or {},
+        })
+
+
+class TraceCallback(AsyncCallbackHandler):
+    """Records an "llm" span per model call and a "tool" span per tool call of the graph."""
+
+    def __init__(self, tracer: Tracer):
+        self.tracer = tracer
+        self.open = {}
+
+    def _start(self, run_id, attributes):
+        self.open[run_id] = (time.time(), time.perf_counter(), _parent.get(), attributes)
+
+    def _end(self, run_id, name, **extra):
+        started = self.open.pop(run_id, None)
+        if started is None:
+            return
+        start, perf_start, parent_id, attributes = started
+        self.tracer.record(name, start, time.perf_counter() - perf_start, attributes={**attributes, **extra}, parent_id=parent_id)
+
+    async def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._start(run_id, {"messages": sum(len(batch) for batch in messages)})
+
+    async def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._start(run_id, {"prompts": len(prompts)})
+
+    async def on_llm_end(self, response, *, run_id, **kwargs):
+        self._end(run_id, "llm")
+
+    async def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "llm", error=str(error))
+
+    async def on_tool_start(self, serialized, input_str, *, run_id, metadata=None, **kwargs):
+        name = (serialized or {}).get("name") or kwargs.get("name")
+        self._start(run_id, {"tool": name, "server": (metadata or {}).get(SERVER_METADATA_KEY)})
+
+    async def on_tool_end(self, output, *, run_id, **kwargs):
+        self._end(run_id, "tool")
+
+    async def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, "tool", error=str(error))
@@ -0,0 +1,198 @@
+import os
+import time
+import random
+import asyncio
+from dataclasses import dataclass, asdict
+from contextlib import asynccontextmanager
+import httpx
+
+RETRY_STATUS_CODES = {429, 502, 503, 504}
+
+
+class CircuitOpenError(Exception):
+    """Raised without contacting the upstream while the circuit breaker is open."""
+
+
+@dataclass
+class UpstreamStats:
+    requests: int = 0
+    retries: int = 0
+    failures: int = 0
+    short_circuited: int = 0
+    circuit_opened: int = 0
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker. After `failure_threshold` failures in a row the circuit
+    opens and calls fail fast for `reset_timeout` seconds; then one trial call is let through
+    (half-open), and its outcome closes the circuit again or re-opens it.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, clock=time.monotonic):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.clock = clock
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if self.clock() - self.opened_at >= self.reset_timeout:
+            return "half-open"
+        return "open"
+
+    def allow(self) -> bool:
+        state = self.state
+        if state == "closed":
+            return True
+        if state == "half-open" and not self.trial_in_flight:
+            self.trial_in_flight = True
+            return True
+        return False
+
+    def record_success(self):
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+
+    def release_trial(self):
+        """End a half-open trial without a verdict (e.g. it was cancelled), so the next call can try."""
+        self.trial_in_flight = False
+
+    def record_failure(self) -> bool:
+        """Count a failure; returns True when this failure opened the circuit."""
+        self.failures += 1
+        if self.trial_in_flight or (self.opened_at is None and self.failures >= self.failure_threshold):
+            self.opened_at = self.clock()
+            self.trial_in_flight = False
+            return True
+        return False
+
+
+class UpstreamClient:
+    """
+    Shared, pooled HTTP client for the back-ends behind the MCP servers.
+
+    One `httpx.AsyncClient` (keep-alive connection pool capped by `max_connections`) is opened
+    for the server's lifetime; see `attach_lifespan`. Requests that fail with a transport
+    error or a 429/502/503/504 are retried up to `retries` times with full-jitter exponential
+    backoff, and a circuit breaker stops calling an upstream that keeps failing.
+    """
+
+    def __init__(self, max_connections: int = 100, max_keepalive_connections: int = 20, keepalive_expiry: float = 30.0,
+                 timeout: float = 10.0, connect_timeout: float = 3.0, retries: int = 2, backoff_base: float = 0.1,
+                 backoff_max: float = 2.0, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive_connections,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = httpx.Timeout(timeout, connect=connect_timeout)
+        self.retries = retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.stats = UpstreamStats()
+        self._client = None
+
+    @classmethod
+    def from_env(cls, prefix: str = "UPSTREAM_"):
+        """Build from UPSTREAM_MAX_CONNECTIONS, UPSTREAM_TIMEOUT, UPSTREAM_RETRIES, ... when set."""
+        settings = {
+            "max_connections": int, "max_keepalive_connections": int, "keepalive_expiry": float,
+            "timeout": float, "connect_timeout": float, "retries": int, "backoff_base": float,
+            "backoff_max": float, "failure_threshold": int, "reset_timeout": float,
+        }
+        kwargs = {name: cast(os.environ[prefix + name.upper()]) for name, cast in settings.items() if prefix + name.upper() in os.environ}
+        return cls(**kwargs)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        # Opened lazily as a fallback (e.g. stdio transport); normally the lifespan opens it.
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(limits=self.limits, timeout=self.timeout)
+        return self._client
+
+    async def open(self):
+        self.client
+        return self
+
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _record_failure(self):
+        self.stats.failures += 1
+        if self.breaker.record_failure():
+            self.stats.circuit_opened += 1
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        for attempt in range(self.retries + 1):
+            if not self.breaker.allow():
+                self.stats.short_circuited += 1
+                raise CircuitOpenError(f"Circuit open for upstream {url}; not calling it for up to {self.breaker.reset_timeout}s")
+            self.stats.requests += 1
+            try:
+                response = await self.client.request(method, url, **kwargs)
+                if response.status_code not in RETRY_STATUS_CODES:
+                    # 4xx other than 429 is the caller's problem, not an unhealthy upstream.
+                    self.breaker.record_success()
+                    return response
+                error = httpx.HTTPStatusError(f"Upstream returned {response.status_code}", request=response.request, response=response)
+            except httpx.TransportError as e:
+                error = e
+            except httpx.HTTPError:
+                # Not retried, but still a failed call to the upstream.
+                self._record_failure()
+                raise
+            except BaseException:
+                # Cancelled, or failed before reaching the upstream: no verdict on its health, but a
+                # half-open trial must not stay in flight or the circuit never closes again.
+                self.breaker.release_trial()
+                raise
+            self._record_failure()
+            if attempt == self.retries:
+                raise error
+            self.stats.retries += 1
+            await asyncio.sleep(self.backoff(attempt))
+
+    async def post_json(self, url: str, data: dict) -> dict:
+        response = await self.request("POST", url, json=data)
+        response.raise_for_status()
+        return response.json()
+
+    def summary(self) -> dict:
+        return {**asdict(self.stats), "circuit": self.breaker.state}
+
+
+def attach_lifespan(mcp, upstream: UpstreamClient):
+    """Open `upstream` when the FastMCP HTTP app starts and close it on shutdown."""
+    build_app = mcp.streamable_http_app
+
+    def streamable_http_app():
+        app = build_app()
+        inner = app.router.lifespan_context
+
+        @asynccontextmanager
+        async def lifespan(starlette_app):
+            async with upstream, inner(starlette_app):
+                yield
+
+        app.router.lifespan_context = lifespan
+        return app
+
+    mcp.streamable_http_app = streamable_http_app
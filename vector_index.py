@@ -0,0 +1,307 @@
+import re
+import json
+import hashlib
+import numpy as np
+from pathlib import Path
+from functools import lru_cache
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:['.][a-z0-9]+)*")
+
+
+def tokenize(text: str) -> list:
+    return TOKEN_RE.findall((text or "").lower())
+
+
+@lru_cache(maxsize=1 << 18)
+def _feature_slot(feature: str, dim: int) -> tuple:
+    digest = hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest()
+    value = int.from_bytes(digest, "little")
+    return value % dim, 1.0 if (value >> 63) & 1 else -1.0
+
+
+class HashingEmbedder:
+    """
+    Deterministic, offline text embedding: signed feature hashing of word unigrams and bigrams
+    with sublinear term frequency, L2-normalized. Same text, same vector, on every machine.
+    """
+    name = "hashing-v1"
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def embed_one(self, text: str) -> np.ndarray:
+        tokens = tokenize(text)
+        features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+        counts = {}
+        for feature in features:
+            counts[feature] = counts.get(feature, 0) + 1
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for feature, count in counts.items():
+            slot, sign = _feature_slot(feature, self.dim)
+            vector[slot] += sign * (1.0 + np.log(count))
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def embed(self, texts: list) -> np.ndarray:
+        if not texts:
+            return np.zeros((0, self.dim), dtype=np.float32)
+        return np.stack([self.embed_one(text) for text in texts])
+
+
+def _top_k(scores: np.ndarray, ids: np.ndarray, k: int) -> tuple:
+    """Top-k (scores, ids) of a 1-D score vector, sorted by descending score."""
+    if len(scores) > k:
+        keep = np.argpartition(-scores, k - 1)[:k]
+        scores, ids = scores[keep], ids[keep]
+    order = np.argsort(-scores, kind="stable")
+    return scores[order], ids[order]
+
+
+class VectorIndex:
+    """
+    Append-only on-disk vector index for SemanticSearch chunks.
+
+    Layout of the index directory:
+
+    - vectors.f32      float32 embedding matrix, memory-mapped (count x dim)
+    - records.jsonl    one chunk record per line; records.off holds each line's byte offset
+    - ivf.npz / ivf_assign.i32   optional IVF centroids and per-row list assignment
+    - deleted.i64      row ids of superseded chunks, excluded by HybridSearcher
+    - meta.json        dim, count, embedder name
+
+    Exact search streams the matrix in blocks through a matrix multiply, so memory stays
+    bounded by `block_rows`. Approximate (IVF) search scores only the rows of the `nprobe`
+    lists closest to the query. Neither loads all vectors or records into RAM.
+    """
+
+    def __init__(self, path, embedder: HashingEmbedder = None, block_rows: int = 65536):
+        self.path = Path(path)
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.embedder = embedder or HashingEmbedder()
+        self.block_rows = block_rows
+        meta = self._read_meta()
+        if meta and (meta["dim"] != self.embedder.dim or meta["embedder"] != self.embedder.name):
+            raise ValueError(f"Index at {self.path} was built with {meta['embedder']}/{meta['dim']}, not {self.embedder.name}/{self.embedder.dim}")
+        self.count = meta["count"] if meta else 0
+        self.centroids = None
+        self._lists = None
+        self._open()
+
+    # ---- files ----------------------------------------------------------
+
+    @property
+    def dim(self) -> int:
+        return self.embedder.dim
+
+    def _file(self, name: str) -> Path:
+        return self.path / name
+
+    def _read_meta(self):
+        try:
+            with open(self._file("meta.json"), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def _write_meta(self):
+        meta = {"dim": self.dim, "count": self.count, "embedder": self.embedder.name, "ivf": self.centroids is not None}
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(meta, f)
+        tmp.replace(self._file("meta.json"))
+
+    def _open(self):
+        self.vectors = (
+            np.memmap(self._file("vectors.f32"), dtype=np.float32, mode="r", shape=(self.count, self.dim))
+            if self.count else np.zeros((0, self.dim), dtype=np.float32)
+        )
+        self.offsets = (
+            np.memmap(self._file("records.off"), dtype=np.int64, mode="r", shape=(self.count,))
+            if self.count else np.zeros(0, dtype=np.int64)
+        )
+        deleted_path = self._file("deleted.i64")
+        self.deleted = np.fromfile(deleted_path, dtype=np.int64) if deleted_path.exists() else np.zeros(0, dtype=np.int64)
+        ivf_path = self._file("ivf.npz")
+        if ivf_path.exists():
+            self.centroids = np.load(ivf_path)["centroids"]
+            self._lists = None
+
+    def __len__(self):
+        return self.count
+
+    def refresh(self) -> bool:
+        """Pick up rows appended by another process (e.g. ingest.py). Returns True if anything changed."""
+        meta = self._read_meta()
+        deleted_path = self._file("deleted.i64")
+        deleted_count = deleted_path.stat().st_size // 8 if deleted_path.exists() else 0
+        if not meta or (meta["count"] == self.count and deleted_count == len(self.deleted)):
+            return False
+        self.count = meta["count"]
+        self._open()
+        return True
+
+    # ---- writing --------------------------------------------------------
+
+    def add(self, records: list, embeddings: np.ndarray = None) -> range:
+        """Append chunk records (embedding their raw_context unless embeddings are given)."""
+        if not records:
+            return range(self.count, self.count)
+        if embeddings is None:
+            embeddings = self.embedder.embed([r.get("raw_context", "") for r in records])
+        embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+        if embeddings.shape != (len(records), self.dim):
+            raise ValueError(f"Expected embeddings of shape {(len(records), self.dim)}, got {embeddings.shape}")
+        first = self.count
+        with open(self._file("records.jsonl"), "ab") as f:
+            position = f.tell()
+            offsets = []
+            for record in records:
+                line = (json.dumps(record, ensure_ascii=False) + "\n").encode("utf-8")
+                offsets.append(position)
+                f.write(line)
+                position += len(line)
+        with open(self._file("records.off"), "ab") as f:
+            f.write(np.asarray(offsets, dtype=np.int64).tobytes())
+        with open(self._file("vectors.f32"), "ab") as f:
+            f.write(embeddings.tobytes())
+        if self.centroids is not None:
+            with open(self._file("ivf_assign.i32"), "ab") as f:
+                f.write(self._assign(embeddings).tobytes())
+        self.count += len(records)
+        self._write_meta()
+        self._open()
+        return range(first, self.count)
+
+    def delete(self, rows) -> None:
+        """Mark rows as superseded. Their data stays on disk; searches skip them."""
+        rows = np.asarray(list(rows), dtype=np.int64)
+        if len(rows) == 0:
+            return
+        with open(self._file("deleted.i64"), "ab") as f:
+            f.write(rows.tobytes())
+        self.deleted = np.concatenate([self.deleted, rows])
+
+    # ---- IVF ------------------------------------------------------------
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        return np.argmax(vectors @ self.centroids.T, axis=1).astype(np.int32)
+
+    def train_ivf(self, nlist: int = None, sample_size: int = 100_000, iterations: int = 8, seed: int = 0):
+        """Spherical k-means over a sample of rows, then assign every row to its nearest centroid."""
+        if self.count == 0:
+            return
+        nlist = nlist or max(1, min(4096, int(4 * np.sqrt(self.count))))
+        rng = np.random.default_rng(seed)
+        sample_ids = np.sort(rng.choice(self.count, min(sample_size, self.count), replace=False))
+        sample = np.asarray(self.vectors[sample_ids])
+        centroids = sample[rng.choice(len(sample), min(nlist, len(sample)), replace=False)].copy()
+        for _ in range(iterations):
+            assign = np.argmax(sample @ centroids.T, axis=1)
+            order = np.argsort(assign, kind="stable")
+            used, starts = np.unique(assign[order], return_index=True)
+            sums = np.add.reduceat(sample[order], starts, axis=0)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            nonzero = norms[:, 0] > 0
+            centroids[used[nonzero]] = sums[nonzero] / norms[nonzero]
+        self.centroids = centroids.astype(np.float32)
+        np.savez(self._file("ivf.npz"), centroids=self.centroids)
+        with open(self._file("ivf_assign.i32"), "wb") as f:
+            for start in range(0, self.count, self.block_rows):
+                f.write(self._assign(np.asarray(self.vectors[start:start + self.block_rows])).tobytes())
+        self._lists = None
+        self._write_meta()
+
+    def _inverted_lists(self) -> tuple:
+        if self._lists is None:
+            assign = np.fromfile(self._file("ivf_assign.i32"), dtype=np.int32, count=self.count)
+            order = np.argsort(assign, kind="stable").astype(np.int64)
+            bounds = np.searchsorted(assign[order], np.arange(len(self.centroids) + 1))
+            self._lists = (order, bounds)
+        return self._lists
+
+    # ---- search ---------------------------------------------------------
+
+    def search_vectors(self, queries: np.ndarray, k: int = 5, mode: str = "auto", nprobe: int = 16, candidates: np.ndarray = None, allowed: np.ndarray = None) -> list:
+        """
+        Top-k (scores, row ids) per query row. `mode` is "exact", "ivf" or "auto" (IVF once
+        trained and the index is large). `candidates` restricts an exact search to those rows;
+        `allowed` is a boolean row mask applied to the rows an IVF search visits.
+        """
+        queries = np.atleast_2d(np.asarray(queries, dtype=np.float32))
+        if self.count == 0 or k <= 0:
+            return [(np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)) for _ in queries]
+        if candidates is not None:
+            return self._exact_rows(queries, k, np.asarray(candidates, dtype=np.int64))
+        if mode == "auto":
+            mode = "ivf" if self.centroids is not None and self.count > 50_000 else "exact"
+        if mode == "ivf" and self.centroids is not None:
+            return [self._ivf_one(q, k, nprobe, allowed) for q in queries]
+        return self._exact(queries, k)
+
+    def _exact(self, queries: np.ndarray, k: int) -> list:
+        best = [(np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)) for _ in queries]
+        for start in range(0, self.count, self.block_rows):
+            block = np.asarray(self.vectors[start:start + self.block_rows])
+            scores = queries @ block.T
+            ids = np.arange(start, start + len(block), dtype=np.int64)
+            for i in range(len(queries)):
+                block_scores, block_ids = _top_k(scores[i], ids, k)
+                best[i] = _top_k(np.concatenate([best[i][0], block_scores]), np.concatenate([best[i][1], block_ids]), k)
+        return best
+
+    def _exact_rows(self, queries: np.ndarray, k: int, rows: np.ndarray) -> list:
+        rows = np.unique(rows)
+        results = [(np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)) for _ in queries]
+        for start in range(0, len(rows), self.block_rows):
+            ids = rows[start:start + self.block_rows]
+            scores = queries @ np.asarray(self.vectors[ids]).T
+            for i in range(len(queries)):
+                block_scores, block_ids = _top_k(scores[i], ids, k)
+                results[i] = _top_k(np.concatenate([results[i][0], block_scores]), np.concatenate([results[i][1], block_ids]), k)
+        return results
+
+    def _ivf_one(self, query: np.ndarray, k: int, nprobe: int, allowed: np.ndarray = None) -> tuple:
+        order, bounds = self._inverted_lists()
+        nearest = np.argsort(-(self.centroids @ query))[:nprobe]
+        ids = np.sort(np.concatenate([order[bounds[c]:bounds[c + 1]] for c in nearest]))
+        if allowed is not None:
+            ids = ids[allowed[ids]]
+        if len(ids) == 0:
+            return np.zeros(0, dtype=np.float32), ids
+        return _top_k(np.asarray(self.vectors[ids]) @ query, ids, k)
+
+    # ---- records --------------------------------------------------------
+
+    def record(self, row: int) -> dict:
+        with open(self._file("records.jsonl"), "rb") as f:
+            f.seek(int(self.offsets[row]))
+            return json.loads(f.readline())
+
+    def records(self, rows) -> list:
+        with open(self._file("records.jsonl"), "rb") as f:
+            out = []
+            for row in rows:
+                f.seek(int(self.offsets[row]))
+                out.append(json.loads(f.readline()))
+            return out
+
+    def iter_records(self, start: int = 0, batch_size: int = 10_000):
+        """Stream records from row `start` onwards in lists of up to `batch_size`."""
+        if start >= self.count:
+            return
+        with open(self._file("records.jsonl"), "rb") as f:
+            f.seek(int(self.offsets[start]))
+            batch = []
+            for _ in range(start, self.count):
+                batch.append(json.loads(f.readline()))
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+
+    def search(self, text: str, k: int = 5, mode: str = "auto", nprobe: int = 16) -> dict:
+        """Search by text and return the SemanticSearch tool payload: {"result": {"hits": [...]}}."""
+        scores, ids = self.search_vectors(self.embedder.embed([text]), k=k, mode=mode, nprobe=nprobe)[0]
+        hits = [{"score": float(score), "record": record} for score, record in zip(scores, self.records(ids))]
+        return {"result": {"hits": hits}}